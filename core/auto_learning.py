@@ -20,6 +20,8 @@ import numpy as np
 import networkx as nx
 import re
 
+from numtriad.utils.feature_hashing import hashed_vectors
+
 if TYPE_CHECKING:
     from numtriad.encoder import NumTriadEncoder
 
@@ -339,6 +341,15 @@ class LearnedDomain:
             v /= norm
         
         return v
+    
+    def _create_omega_bow(self, text: str) -> np.ndarray:
+        """
+        Ο (Omega) fallback: hashed bag-of-words over all words of the text.
+        
+        Returns:
+            L2-normalized signed feature-hashing vector (stable across processes).
+        """
+        return hashed_vectors([text], self.embedding_dim)[0]
 
 
 # ============================================================================
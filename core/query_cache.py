@@ -0,0 +1,104 @@
+"""
+Query Result Cache
+==================
+
+Bounded LRU + TTL cache for search results, invalidated by an index epoch.
+
+The RAG index bumps its `epoch` counter on every add / delete. Each
+entry remembers the epoch it was computed at, and a lookup made at a
+different epoch is a miss. So a cached result can never be older than
+the index it was read from.
+"""
+
+import json
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+def normalize_query(query: str) -> str:
+    """
+    Cache key form of a query: NFKC + collapsed whitespace.
+    Case is kept (the encoders are case-sensitive).
+    """
+    return " ".join(unicodedata.normalize("NFKC", query).split())
+
+
+def make_key(query: str, mode: str, k: int, filters: Optional[Dict[str, Any]] = None) -> Tuple:
+    """Cache key for a search call"""
+    filters_key = json.dumps(filters, sort_keys=True, default=str) if filters else None
+    return (normalize_query(query), mode, int(k), filters_key)
+
+
+class QueryCache:
+    """
+    Thread-safe LRU cache with per-entry TTL and epoch check.
+
+    Args:
+        max_entries: Capacity, least recently used entries are evicted first
+        ttl: Entry lifetime in seconds (None = no expiry)
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = 300.0):
+        if max_entries < 1:
+            raise ValueError(f"max_entries must be >= 1, got {max_entries}")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[int, float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, epoch: int) -> Optional[Any]:
+        """Cached value for key at this index epoch, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry_epoch, expires_at, value = entry
+                if entry_epoch != epoch:
+                    self.invalidations += 1
+                    del self._entries[key]
+                elif expires_at < time.monotonic():
+                    self.expirations += 1
+                    del self._entries[key]
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, epoch: int, value: Any) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+        with self._lock:
+            self._entries[key] = (epoch, expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
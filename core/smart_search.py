@@ -74,7 +74,8 @@ def smart_search(
     query: str,
     mode: str = "auto",
     k: int = 5,
-    verbose: bool = True
+    verbose: bool = True,
+    filters: Optional[Dict[str, Any]] = None
 ) -> List[SearchResult]:
     """
     Intelligent search with automatic mode selection
@@ -84,6 +85,7 @@ def smart_search(
         mode: "auto", "abstract", "concrete", "balanced"
         k: Number of results
         verbose: Print analysis
+        filters: Metadata filters applied before scoring
     
     Returns:
         List of SearchResult
@@ -104,7 +106,7 @@ def smart_search(
             logger.info(f"Auto-selected mode: {mode}")
     
     # Search
-    results = glm.search(query, mode=mode, k=k)
+    results = glm.search(query, mode=mode, k=k, filters=filters)
     
     if verbose:
         logger.info(f"Found {len(results)} results in {mode} mode")
@@ -148,26 +150,19 @@ def search_with_filters(
         mode: Search mode
         k: Number of results
     
+    Filters are pushed down to the RAG index's metadata inverted index:
+    only matching documents are scored, so exactly k results are returned
+    whenever at least k documents match.
+
+    Supported conditions (AND-ed across fields):
+        {"type": "tutorial"}                   equality
+        {"lang": ["en", "fr"]}                 IN
+        {"year": {"$gte": 2020, "$lt": 2024}}  numeric range
+
     Returns:
         Filtered search results
     """
-    results = smart_search(query, mode=mode, k=k*2)  # Get more to filter
-    
-    if filters:
-        filtered = []
-        for result in results:
-            match = True
-            for key, value in filters.items():
-                if result.metadata.get(key) != value:
-                    match = False
-                    break
-            if match:
-                filtered.append(result)
-        
-        logger.info(f"Filtered {len(results)} -> {len(filtered)} results")
-        return filtered[:k]
-    
-    return results[:k]
+    return smart_search(query, mode=mode, k=k, verbose=False, filters=filters)
 
 
 def search_by_triad(
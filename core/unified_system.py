@@ -12,12 +12,15 @@ Complete integration of:
 Provides unified API for encoding, searching, and answering.
 """
 
+import copy
 import logging
 import numpy as np
-from typing import Optional, Dict, Any, List, Tuple, Union
+from typing import Optional, Dict, Any, Iterable, List, Tuple, Union
 from dataclasses import dataclass
 from enum import Enum
 
+from core.query_cache import QueryCache, make_key
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -38,6 +41,7 @@ except ImportError:
 
 try:
     from numtriad.core.system_v4 import NumTriadSystemV4, NumTriadSystemConfig
+    from numtriad.index import HNSWConfig
     NUMTRIAD_AVAILABLE = True
 except ImportError:
     NUMTRIAD_AVAILABLE = False
@@ -162,6 +166,17 @@ class UnifiedGLM:
         self.config = config or {}
         self.device = self.config.get("device", "cpu")
         self.enable_auto_learning = self.config.get("enable_auto_learning", True)
+
+        # Search result cache: "query_cache": False disables it, a dict sets
+        # QueryCache fields (max_entries, ttl)
+        cache_opt = self.config.get("query_cache", True)
+        self.query_cache = None
+        if cache_opt:
+            self.query_cache = QueryCache(**cache_opt) if isinstance(cache_opt, dict) else QueryCache()
+
+        # Document text by doc_id, for SearchResult.content. Kept out of the
+        # index metadata (metadata postings, WAL, segments, shard pipes).
+        self._contents: Dict[str, str] = {}
         
         logger.info("Initializing Unified GLM v4.0...")
         
@@ -210,7 +225,19 @@ class UnifiedGLM:
                     dim_t_cross=32,
                     device=self.device
                 )
-                sys_cfg = NumTriadSystemConfig(multimodal=mm_cfg, device=self.device)
+                # "rag_hnsw": True or a dict of HNSWConfig fields enables the HNSW graph
+                hnsw_opt = self.config.get("rag_hnsw")
+                hnsw_cfg = None
+                if hnsw_opt:
+                    hnsw_cfg = HNSWConfig(**hnsw_opt) if isinstance(hnsw_opt, dict) else HNSWConfig()
+                # "encode_max_batch" > 0 micro-batches concurrent single-text encodes
+                sys_cfg = NumTriadSystemConfig(
+                    multimodal=mm_cfg,
+                    device=self.device,
+                    rag_hnsw=hnsw_cfg,
+                    encode_max_batch=int(self.config.get("encode_max_batch", 0)),
+                    encode_max_wait_ms=float(self.config.get("encode_max_wait_ms", 2.0)),
+                )
                 self.numtriad_system = NumTriadSystemV4(sys_cfg)
                 logger.info("✅ NumTriadSystemV4 initialized")
             except Exception as e:
@@ -414,9 +441,9 @@ class UnifiedGLM:
         if include_numtriad and self.numtriad_system:
             try:
                 if content_type == ContentType.TEXT or content_type == ContentType.CODE:
-                    emb, triad = self.numtriad_system.encode_sample(texts=[content_str])
-                    embedding.numtriad_embedding = emb[0]
-                    embedding.numtriad_triad = TriadScores.from_array(triad[0])
+                    emb, triad = self.numtriad_system.encode_text(content_str)
+                    embedding.numtriad_embedding = emb
+                    embedding.numtriad_triad = TriadScores.from_array(triad)
                     logger.info("✅ NumTriad embedding done")
             except Exception as e:
                 logger.warning(f"NumTriad encoding failed: {e}")
@@ -444,7 +471,7 @@ class UnifiedGLM:
         content: str,
         metadata: Optional[Dict[str, Any]] = None
     ) -> None:
-        """Add document to RAG index"""
+        """Add document to RAG index (content kept for SearchResult, outside the metadata)"""
         if not self.numtriad_system:
             logger.error("NumTriad system not available")
             return
@@ -453,17 +480,60 @@ class UnifiedGLM:
             self.numtriad_system.add_document(
                 doc_id,
                 texts=[content],
-                metadata=metadata or {}
+                metadata=metadata
             )
+            self._contents[doc_id] = content
             logger.info(f"✅ Document {doc_id} added to index")
         except Exception as e:
             logger.error(f"Failed to add document: {e}")
+
+    def add_documents(
+        self,
+        documents: Iterable[Union[Tuple, Dict[str, Any]]],
+        batch_size: int = 256
+    ) -> Dict[str, float]:
+        """
+        Bulk add documents to RAG index
+        
+        Args:
+            documents: Iterable (or generator) of (doc_id, content[, metadata])
+                tuples or {"doc_id", "content", "metadata"} dicts
+            batch_size: Documents per encoder forward pass
+        
+        Returns:
+            Ingestion stats (documents, batches, seconds, docs_per_sec)
+        """
+        if not self.numtriad_system:
+            logger.error("NumTriad system not available")
+            return {}
+
+        def items():
+            for doc in documents:
+                if isinstance(doc, dict):
+                    doc_id, content, metadata = doc["doc_id"], doc["content"], doc.get("metadata")
+                else:
+                    doc_id, content, *rest = doc
+                    metadata = rest[0] if rest else None
+                self._contents[doc_id] = content
+                yield {"doc_id": doc_id, "text": content, "metadata": metadata or {}}
+
+        try:
+            stats = self.numtriad_system.add_documents(items(), batch_size=batch_size)
+            logger.info(
+                f"✅ {stats['documents']} documents added to index "
+                f"({stats['docs_per_sec']:.0f} docs/sec)"
+            )
+            return stats
+        except Exception as e:
+            logger.error(f"Failed to add documents: {e}")
+            return {}
     
     def search(
         self,
         query: str,
         mode: str = "auto",
-        k: int = 5
+        k: int = 5,
+        filters: Optional[Dict[str, Any]] = None
     ) -> List[SearchResult]:
         """
         Unified search with triad control
@@ -472,10 +542,24 @@ class UnifiedGLM:
             query: Search query
             mode: "auto", "abstract", "concrete", "balanced"
             k: Number of results
+            filters: Metadata filters applied before scoring
+                (e.g., {"type": "tutorial"}, {"year": {"$gte": 2020}})
         
         Returns:
             List of SearchResult
+
+        Results are cached per (normalized query, mode, k, filters) until
+        the index epoch changes (any add / delete) or the entry expires.
         """
+        cache_key = make_key(query, mode, k, filters)
+        epoch = self._index_epoch()
+        if self.query_cache is not None and epoch is not None:
+            cached = self.query_cache.get(cache_key, epoch)
+            if cached is not None:
+                logger.info(f"Cache hit: {query} (mode={mode}, k={k})")
+                # callers may mutate results: never hand out the cached objects
+                return copy.deepcopy(cached)
+
         logger.info(f"Searching: {query} (mode={mode}, k={k})...")
         
         results = []
@@ -500,23 +584,32 @@ class UnifiedGLM:
                 numtriad_results = self.numtriad_system.query_documents(
                     query,
                     mode=mode,
-                    k=k
+                    k=k,
+                    filters=filters
                 )
                 
                 for doc, score in numtriad_results:
                     results.append(SearchResult(
                         doc_id=doc.doc_id,
-                        content=doc.texts[0] if doc.texts else "",
+                        content=self._contents.get(doc.doc_id, str(doc.metadata.get("content", ""))),
                         score=float(score),
                         triad=TriadScores.from_array(doc.triad),
-                        metadata=doc.metadata,
+                        metadata=dict(doc.metadata),  # not the live index metadata
                         source="numtriad"
                     ))
                 logger.info(f"✅ Found {len(results)} results")
+                if self.query_cache is not None and epoch is not None:
+                    self.query_cache.put(cache_key, epoch, copy.deepcopy(results))
             except Exception as e:
                 logger.warning(f"NumTriad search failed: {e}")
         
         return results
+
+    def _index_epoch(self) -> Optional[int]:
+        """Current RAG index epoch (None without a NumTriad system)"""
+        if not self.numtriad_system:
+            return None
+        return getattr(self.numtriad_system.rag_index, "epoch", None)
     
     # ========================================================================
     # Q&A
@@ -654,12 +747,13 @@ class UnifiedGLM:
                 "domains": 4,
             },
             "numtriad": {
-                "documents_indexed": len(self.numtriad_system.rag_index.docs) if self.numtriad_system else 0,
+                "documents_indexed": len(self.numtriad_system.rag_index) if self.numtriad_system else 0,
                 "pillars": 4,
             },
             "gemini": {
                 "available": self.gemini_wrapper is not None,
             },
+            "query_cache": self.query_cache.stats() if self.query_cache else None,
             "device": self.device,
         }
 
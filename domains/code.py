@@ -21,6 +21,7 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from core.symbolic import Domain, SymbolicRepresentation
 from delta_infty_omicron import enhance_symbolic_metadata
+from numtriad.utils.feature_hashing import bucket, hashed_counts, stable_gaussian
 
 
 # ============================================================================
@@ -215,13 +216,11 @@ if __name__ == "__main__":
         # Features 50-99 : Hash des noms de fonctions/classes
         names = self._extract_names(tree)
         for name in names[:50]:
-            idx = 50 + (hash(name) % 50)
+            idx = 50 + bucket(name, 50)
             essence[idx] = 1.0
         
-        # Reste : signature stable basée sur le code
-        code_hash = hash(code) % 1000
-        np.random.seed(code_hash)
-        essence[100:] = np.random.randn(self.embedding_dim - 100) * 0.1
+        # Reste : signature stable basée sur le code (sans toucher au RNG global)
+        essence[100:] = stable_gaussian(code, self.embedding_dim - 100) * 0.1
         
         # Normaliser
         essence /= (np.linalg.norm(essence) + 1e-8)
@@ -292,14 +291,13 @@ if __name__ == "__main__":
         for token in tokens:
             token_counts[token] = token_counts.get(token, 0) + 1
         
-        for token, count in sorted(token_counts.items(), key=lambda x: x[1], reverse=True)[:70]:
-            idx = 30 + (hash(token) % 70)
-            embedding[idx] = count / (len(tokens) + 1)
+        top_tokens = sorted(token_counts.items(), key=lambda x: x[1], reverse=True)[:70]
+        embedding[30:100] = hashed_counts(
+            [token for token, _ in top_tokens], 70, weights=[count for _, count in top_tokens]
+        ) / (len(tokens) + 1)
         
         # Reste : signature stable
-        code_hash = hash(code) % 1000
-        np.random.seed(code_hash + 42)
-        embedding[100:] = np.random.randn(self.embedding_dim - 100) * 0.1
+        embedding[100:] = stable_gaussian(code, self.embedding_dim - 100, seed=42) * 0.1
         
         # Normaliser
         embedding /= (np.linalg.norm(embedding) + 1e-8)
@@ -20,6 +20,7 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from core.symbolic import Domain, SymbolicRepresentation
 from delta_infty_omicron import enhance_symbolic_metadata
+from numtriad.utils.feature_hashing import bucket, hashed_counts
 
 
 # ============================================================================
@@ -165,8 +166,8 @@ class TextDomain(Domain):
         
         for i, (word, freq) in enumerate(top_words):
             if i < self.embedding_dim:
-                # Hash du mot pour position stable
-                word_hash = hash(word) % (self.embedding_dim - top_k)
+                # Hash du mot pour position stable (identique d'un processus à l'autre)
+                word_hash = bucket(word, self.embedding_dim - top_k)
                 essence[word_hash] = freq / (len(keywords) + 1)
         
         # Normaliser
@@ -221,11 +222,8 @@ class TextDomain(Domain):
         if words:
             embedding[3] = np.mean([len(w) for w in words]) / 10.0
         
-        # Bag of words (hashed)
-        word_counter = Counter(words)
-        for word, count in word_counter.items():
-            word_hash = hash(word) % (self.embedding_dim - 10)
-            embedding[10 + word_hash] = count / (len(words) + 1)
+        # Bag of words (feature hashing signé, stable entre processus)
+        embedding[10:] = hashed_counts(words, self.embedding_dim - 10) / (len(words) + 1)
         
         # Normaliser
         embedding /= (np.linalg.norm(embedding) + 1e-8)
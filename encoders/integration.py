@@ -24,6 +24,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from core.symbolic import Domain, SymbolicRepresentation
 from encoders.neural import NomicTextEncoder, NomicImageEncoder
+from numtriad.utils.feature_hashing import bucket
 
 
 # ============================================================================
@@ -262,7 +263,7 @@ def compare_encoders():
     for text in texts:
         emb = np.zeros(768)
         for i, word in enumerate(text.lower().split()[:768]):
-            emb[i] = (hash(word) % 1000) / 1000.0
+            emb[i] = bucket(word, 1000) / 1000.0
         norm = np.linalg.norm(emb)
         if norm > 0:
             emb = emb / norm
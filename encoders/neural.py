@@ -24,6 +24,7 @@ import os
 
 # Ajouter le répertoire parent au path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from numtriad.utils.feature_hashing import hashed_vectors
 
 # Optional imports
 try:
@@ -151,26 +152,8 @@ class NomicTextEncoder:
     
     def _fallback_encode(self, texts: List[str]) -> np.ndarray:
         """Fallback encoding using simple TF-IDF"""
-        embeddings = []
-        
-        for text in texts:
-            # Simple hash-based embedding
-            words = text.lower().split()
-            embedding = np.zeros(self.embedding_dim)
-            
-            for i, word in enumerate(words[:self.embedding_dim]):
-                # Use hash to generate deterministic values
-                hash_val = hash(word) % 1000
-                embedding[i] = hash_val / 1000.0
-            
-            # Normalize
-            norm = np.linalg.norm(embedding)
-            if norm > 0:
-                embedding = embedding / norm
-            
-            embeddings.append(embedding)
-        
-        return np.array(embeddings)
+        # Hashed bag-of-words (signed, normalized, stable across processes)
+        return hashed_vectors(texts, self.embedding_dim)
     
     def _resize_embedding(self, embeddings: np.ndarray) -> np.ndarray:
         """Resize embeddings to target dimension"""
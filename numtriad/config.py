@@ -1,6 +1,7 @@
 # numtriad/config.py
 
 from dataclasses import dataclass
+from typing import List, Optional
 
 
 @dataclass
@@ -17,3 +18,7 @@ class NumTriadConfig:
     linguistic_feature_dim: int = 8  # ex: longueur, entropie, etc.
     alpha_semantic: float = 0.7      # poids cosine
     beta_triad: float = 0.3          # poids triad distance
+    embedding_cache_size: int = 10000          # LRU mémoire des embeddings de BaseTextEncoder (0 = désactivé)
+    embedding_cache_dir: Optional[str] = None  # niveau disque du cache (persiste entre les runs)
+    quantize: Optional[str] = None             # "int8" : couches Linear du TriadScorer quantifiées dynamiquement (CPU)
+    quantize_held_out: Optional[List[str]] = None  # textes du rapport de dérive triad int8 vs fp32 au chargement
@@ -9,6 +9,9 @@ Main exports:
   - NumTriadSystemConfig: Configuration
   - DeepTriadTransformer: Sequence-level triad analysis
   - NumTriadRAGIndexV4: Triad-aware RAG index
+  - ShardedRAGIndexV4: NumTriadRAGIndexV4 sharded over worker processes
+  - MicroBatcher: dynamic batching of concurrent single-item encode calls
+  - export_inference / load_inference: TorchScript / ONNX graphs of Pillars A and C
 """
 
 from .system_v4 import (
@@ -20,6 +23,9 @@ from .system_v4 import (
     IndexedDoc,
     TriadMode,
 )
+from .sharded_rag import ShardedRAGIndexV4
+from .batching import MicroBatcher, BatchMetrics
+from .export import export_inference, load_inference
 
 __all__ = [
     "NumTriadSystemV4",
@@ -28,6 +34,11 @@ __all__ = [
     "DeepTriadTransformerConfig",
     "NumTriadRAGIndexV4",
     "IndexedDoc",
+    "ShardedRAGIndexV4",
+    "MicroBatcher",
+    "BatchMetrics",
+    "export_inference",
+    "load_inference",
     "TriadMode",
 ]
 
@@ -0,0 +1,291 @@
+"""
+NumTriad Micro-Batching Scheduler
+=================================
+
+Dynamic batching of concurrent single-item encode calls.
+
+Under concurrent load, every request encodes one text with its own
+forward pass and leaves most of the matmul throughput unused. Instead:
+
+  - callers submit items to a named model queue and get a
+    concurrent.futures.Future back
+  - one worker thread per model takes the oldest pending request, then
+    waits at most `max_wait_ms` (counted from that request's arrival)
+    for the queue to reach `max_batch` items
+  - the batch goes through the model's batch function in one call, and
+    the results are scattered back to the futures in order
+
+A batch function maps a list of items to either a sequence of per-item
+results or a tuple of arrays with a leading batch dimension, so the
+existing batched encoders plug in unchanged:
+
+    batcher = MicroBatcher()
+    batcher.register("v4", lambda texts: system.encode_sample(texts=texts))
+    batcher.register("numtriad", numtriad_encoder.encode_text)   # -> (emb, triads)
+    batcher.register("nomic", nomic_encoder.encode)              # -> (N, D)
+    emb, triad = batcher.submit("v4", "some text").result()
+
+BatchMetrics records, per model, the queue wait of each request and
+the batch size distribution.
+
+Author: GLM Research Team
+Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+# items -> per-item results, or a tuple of (B, ...) arrays
+BatchFn = Callable[[List[Any]], Any]
+
+
+def scatter_results(result: Any, n: int) -> List[Any]:
+    """
+    Split the output of a batch function into n per-item results.
+
+    A tuple whose members all have a leading dimension of n (e.g.
+    (embeddings, triads)) becomes n tuples of rows. Anything else must
+    be a sequence of n results (arrays are split along axis 0).
+    """
+    if isinstance(result, tuple) and result and all(
+        hasattr(part, "__len__") and len(part) == n for part in result
+    ):
+        return list(zip(*result))
+    if isinstance(result, np.ndarray) and result.ndim == 0:
+        raise ValueError("Batch function returned a scalar")
+    results = list(result)
+    if len(results) != n:
+        raise ValueError(f"Batch function returned {len(results)} results for {n} items")
+    return results
+
+
+class BatchMetrics:
+    """
+    Queue wait and batch size statistics of one model queue.
+
+    Args:
+        window: Number of most recent queue waits kept for percentiles
+    """
+
+    def __init__(self, window: int = 10000):
+        self._lock = threading.Lock()
+        self._waits: Deque[float] = deque(maxlen=window)
+        self.batch_sizes: Counter = Counter()
+        self.requests = 0
+        self.batches = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+
+    def record_batch(self, waits: Sequence[float], seconds: float, failed: bool) -> None:
+        with self._lock:
+            self._waits.extend(waits)
+            self.batch_sizes[len(waits)] += 1
+            self.requests += len(waits)
+            self.batches += 1
+            self.busy_seconds += seconds
+            if failed:
+                self.errors += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Returns:
+            {"requests", "batches", "errors", "mean_batch_size",
+             "batch_sizes": {size: count},
+             "queue_wait_ms": {"mean", "p50", "p95", "p99", "max"},
+             "busy_seconds"}
+        """
+        with self._lock:
+            waits = np.asarray(self._waits, dtype=np.float64) * 1000.0
+            sizes = dict(sorted(self.batch_sizes.items()))
+            requests, batches, errors, busy = self.requests, self.batches, self.errors, self.busy_seconds
+        if waits.size:
+            p50, p95, p99 = np.percentile(waits, [50, 95, 99])
+            wait_ms = {"mean": float(waits.mean()), "p50": float(p50), "p95": float(p95),
+                       "p99": float(p99), "max": float(waits.max())}
+        else:
+            wait_ms = {"mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+        return {
+            "requests": requests,
+            "batches": batches,
+            "errors": errors,
+            "mean_batch_size": requests / batches if batches else 0.0,
+            "batch_sizes": sizes,
+            "queue_wait_ms": wait_ms,
+            "busy_seconds": busy,
+        }
+
+
+class ModelQueue:
+    """
+    Pending requests of one model and the worker thread batching them.
+
+    Args:
+        name: Model name (thread name, logs)
+        fn: Batch function, see BatchFn
+        max_batch: Max items per batch
+        max_wait_ms: Max time the oldest pending request waits for the
+            batch to fill up
+    """
+
+    def __init__(self, name: str, fn: BatchFn, max_batch: int = 32, max_wait_ms: float = 2.0):
+        if max_batch < 1:
+            raise ValueError(f"max_batch must be >= 1, got {max_batch}")
+        if max_wait_ms < 0:
+            raise ValueError(f"max_wait_ms must be >= 0, got {max_wait_ms}")
+        self.name = name
+        self.fn = fn
+        self.max_batch = int(max_batch)
+        self.max_wait = max_wait_ms / 1000.0
+        self.metrics = BatchMetrics()
+
+        self._pending: Deque[Tuple[Any, Future, float]] = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name=f"numtriad-batcher-{name}", daemon=True)
+        self._worker.start()
+
+    def __len__(self) -> int:
+        """Number of pending requests"""
+        return len(self._pending)
+
+    def submit(self, item: Any) -> Future:
+        future: Future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError(f"Batcher queue {self.name!r} is closed")
+            self._pending.append((item, future, time.perf_counter()))
+            self._cond.notify()
+        return future
+
+    def _next_batch(self) -> Optional[List[Tuple[Any, Future, float]]]:
+        """Block until a batch is due (None once closed and drained)"""
+        with self._cond:
+            while not self._pending:
+                if self._closed:
+                    return None
+                self._cond.wait()
+            deadline = self._pending[0][2] + self.max_wait
+            while len(self._pending) < self.max_batch and not self._closed:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            n = min(self.max_batch, len(self._pending))
+            return [self._pending.popleft() for _ in range(n)]
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            start = time.perf_counter()
+            waits = [start - enqueued for _, _, enqueued in batch]
+            # skip requests whose caller gave up (Future.cancel)
+            live = [(item, future) for item, future, _ in batch if future.set_running_or_notify_cancel()]
+            failed = False
+            if live:
+                try:
+                    results = scatter_results(self.fn([item for item, _ in live]), len(live))
+                except Exception as e:
+                    failed = True
+                    logger.warning(f"Batch of {len(live)} failed on {self.name!r}: {e}")
+                    for _, future in live:
+                        future.set_exception(e)
+                else:
+                    for (_, future), result in zip(live, results):
+                        future.set_result(result)
+            self.metrics.record_batch(waits, time.perf_counter() - start, failed)
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """Stop accepting requests, finish the pending ones and stop the worker"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._worker.join(timeout=timeout)
+
+
+class MicroBatcher:
+    """
+    Per-model queues of single-item requests, served in dynamic batches.
+
+    Args:
+        max_batch: Default max items per batch
+        max_wait_ms: Default max wait of the oldest request of a batch
+    """
+
+    def __init__(self, max_batch: int = 32, max_wait_ms: float = 2.0):
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self._queues: Dict[str, ModelQueue] = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "MicroBatcher":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __contains__(self, model: str) -> bool:
+        return model in self._queues
+
+    def register(
+        self,
+        model: str,
+        fn: BatchFn,
+        max_batch: Optional[int] = None,
+        max_wait_ms: Optional[float] = None,
+    ) -> ModelQueue:
+        """Create the queue of a model (its worker thread starts right away)"""
+        with self._lock:
+            if model in self._queues:
+                raise ValueError(f"Model {model!r} is already registered")
+            queue = ModelQueue(
+                model,
+                fn,
+                max_batch=self.max_batch if max_batch is None else max_batch,
+                max_wait_ms=self.max_wait_ms if max_wait_ms is None else max_wait_ms,
+            )
+            self._queues[model] = queue
+            return queue
+
+    def _queue(self, model: str) -> ModelQueue:
+        try:
+            return self._queues[model]
+        except KeyError:
+            raise KeyError(f"Unknown model {model!r}, registered: {sorted(self._queues)}") from None
+
+    def submit(self, model: str, item: Any) -> Future:
+        """Queue one item; the future resolves to its result"""
+        return self._queue(model).submit(item)
+
+    def submit_many(self, model: str, items: Sequence[Any]) -> List[Future]:
+        queue = self._queue(model)
+        return [queue.submit(item) for item in items]
+
+    def run(self, model: str, item: Any, timeout: Optional[float] = None) -> Any:
+        """Submit one item and wait for its result"""
+        return self.submit(model, item).result(timeout=timeout)
+
+    def metrics(self, model: Optional[str] = None) -> Dict[str, Any]:
+        """Metrics of one model, or {model: metrics} of all of them"""
+        if model is not None:
+            return self._queue(model).metrics.snapshot()
+        return {name: queue.metrics.snapshot() for name, queue in list(self._queues.items())}
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """Drain and stop every queue"""
+        with self._lock:
+            queues = list(self._queues.values())
+        for queue in queues:
+            queue.close(timeout=timeout)
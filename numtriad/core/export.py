@@ -0,0 +1,385 @@
+"""
+NumTriad Inference Export
+=========================
+
+Exports the tensor part of NumTriadMultimodalV4 (Pillar A) and
+DeepTriadTransformer (Pillar C) to a standalone artifact. Inference
+then runs without eager PyTorch's per-layer Python overhead:
+
+  - "torchscript": torch.jit.trace, then freeze + optimize_for_inference
+    (constant folding, fused conv/linear ops on CPU)
+  - "onnx": torch.onnx export, run with onnxruntime (CPU provider)
+  - "auto": onnx when both onnx and onnxruntime are installed, else torchscript
+
+String preprocessing (char histograms of texts / codes) stays outside the
+graph: the exported graphs take feature tensors. Optional modalities are
+Python branches, so NumTriadMultimodalV4 is exported once per modality
+signature (e.g. text only, code only, text + code).
+
+Layout:
+
+    <dir>/
+      export.json                    -> format, signatures, file names, dims
+      multimodal-<signature>.pt|onnx -> one graph per modality signature
+      deeptriad.pt|onnx              -> (x, padding_mask) -> logits
+      deeptriad-unmasked.pt|onnx     -> (x) -> logits, for unpadded batches
+
+ExportedMultimodalV4 and ExportedDeepTriad are drop-in replacements for
+the eager modules in NumTriadSystemV4 (see NumTriadSystemConfig.inference_artifact).
+
+Author: GLM Research Team
+Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import warnings
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Literal, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+logger = logging.getLogger(__name__)
+
+
+EXPORT_FILE = "export.json"
+EXPORT_VERSION = 1
+
+ExportFormat = Literal["auto", "torchscript", "onnx"]
+
+# modality -> forward_features argument, in graph input order
+MULTIMODAL_INPUTS = (("text", "text_feats"), ("image", "images"), ("code", "code_feats"), ("audio", "audio_feats"))
+MODALITIES = tuple(m for m, _ in MULTIMODAL_INPUTS)
+
+DEFAULT_SIGNATURES: Tuple[Tuple[str, ...], ...] = (("text",), ("code",), ("text", "code"))
+
+_SUFFIX = {"torchscript": ".pt", "onnx": ".onnx"}
+
+
+def onnx_available() -> bool:
+    """True if ONNX export and onnxruntime inference are both possible"""
+    try:
+        import onnx  # noqa: F401
+        import onnxruntime  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def resolve_format(fmt: ExportFormat) -> str:
+    if fmt == "auto":
+        return "onnx" if onnx_available() else "torchscript"
+    if fmt == "onnx" and not onnx_available():
+        raise ImportError("ONNX export needs onnx and onnxruntime: pip install onnx onnxruntime")
+    if fmt not in _SUFFIX:
+        raise ValueError(f"Unknown export format {fmt!r} (auto, torchscript, onnx)")
+    return fmt
+
+
+def signature_key(modalities: Iterable[str]) -> str:
+    """Canonical name of a modality signature ("text+code")"""
+    present = set(modalities)
+    unknown = present - set(MODALITIES)
+    if unknown:
+        raise ValueError(f"Unknown modalities {sorted(unknown)}, expected a subset of {MODALITIES}")
+    return "+".join(m for m in MODALITIES if m in present)
+
+
+# ============================================================================
+# Exportable graphs
+# ============================================================================
+
+class MultimodalGraph(nn.Module):
+    """NumTriadMultimodalV4.forward_features for one fixed modality signature"""
+
+    def __init__(self, model: nn.Module, modalities: Sequence[str]):
+        super().__init__()
+        self.model = model
+        key = signature_key(modalities)
+        self.args = [arg for m, arg in MULTIMODAL_INPUTS if m in key.split("+")]
+
+    def forward(self, *inputs: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+        return self.model.forward_features(**dict(zip(self.args, inputs)))
+
+
+class DeepTriadGraph(nn.Module):
+    """DeepTriadTransformer with an explicit padding mask (True = padding)"""
+
+    def __init__(self, model: nn.Module):
+        super().__init__()
+        self.model = model
+
+    def forward(self, x: torch.Tensor, padding_mask: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+        return self.model(x, padding_mask=padding_mask)
+
+
+class UnmaskedDeepTriadGraph(DeepTriadGraph):
+    """DeepTriadTransformer without padding (skips the masked attention path)"""
+
+    def forward(self, x: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+        return self.model(x)
+
+
+def _multimodal_examples(model: nn.Module, modalities: Sequence[str], batch: int, image_size: int) -> List[torch.Tensor]:
+    cfg = model.cfg
+    shapes = {
+        "text": (batch, model.text_encoder.proj.in_features),
+        "image": (batch, 3, image_size, image_size),
+        "code": (batch, model.code_encoder.proj.in_features),
+        "audio": (batch, model.audio_encoder.fc1.in_features),
+    }
+    key = signature_key(modalities).split("+")
+    return [torch.rand(*shapes[m], device=torch.device(cfg.device)) for m in MODALITIES if m in key]
+
+
+def _save_graph(
+    graph: nn.Module,
+    examples: Sequence[torch.Tensor],
+    path: Path,
+    fmt: str,
+    input_names: List[str],
+    output_names: List[str],
+) -> None:
+    graph = graph.cpu().eval()
+    examples = tuple(x.cpu() for x in examples)
+    encoders = [m for m in graph.modules() if isinstance(m, nn.TransformerEncoder)]
+    nested = [enc.use_nested_tensor for enc in encoders]
+    fastpath = torch.backends.mha.get_fastpath_enabled()
+    # Padded batches go through nested tensors in eager mode, which do not
+    # trace: TorchScript keeps the fused encoder layer op on dense inputs,
+    # ONNX has no fused op and gets the decomposed attention.
+    for enc in encoders:
+        enc.use_nested_tensor = False
+    torch.backends.mha.set_fastpath_enabled(fmt == "torchscript" and fastpath)
+    try:
+        with torch.no_grad(), warnings.catch_warnings():
+            # shape checks in Python become constants of the graph, which is
+            # fine here: the batch dimension never reaches a Python branch
+            warnings.simplefilter("ignore", torch.jit.TracerWarning)
+            if fmt == "torchscript":
+                traced = torch.jit.trace(graph, examples, check_trace=False)
+                torch.jit.save(torch.jit.optimize_for_inference(torch.jit.freeze(traced)), str(path))
+            else:
+                dynamic_axes = {name: {0: "batch"} for name in input_names + output_names}
+                if "x" in input_names:  # DeepTriad: variable sequence length too
+                    for name in ("x", "padding_mask", "logits_steps"):
+                        if name in dynamic_axes:
+                            dynamic_axes[name] = {0: "batch", 1: "length"}
+                torch.onnx.export(
+                    graph,
+                    examples,
+                    str(path),
+                    input_names=input_names,
+                    output_names=output_names,
+                    dynamic_axes=dynamic_axes,
+                    opset_version=17,
+                    dynamo=False,
+                )
+    finally:
+        torch.backends.mha.set_fastpath_enabled(fastpath)
+        for enc, flag in zip(encoders, nested):
+            enc.use_nested_tensor = flag
+
+
+def export_inference(
+    directory: Union[str, Path],
+    embedder: Optional[nn.Module] = None,
+    deeptriad: Optional[nn.Module] = None,
+    format: ExportFormat = "auto",
+    signatures: Sequence[Sequence[str]] = DEFAULT_SIGNATURES,
+    image_size: int = 32,
+) -> Dict[str, Any]:
+    """
+    Export the eager modules (their current weights) for inference.
+
+    Args:
+        directory: Output directory (created if missing)
+        embedder: NumTriadMultimodalV4 to export, or None
+        deeptriad: DeepTriadTransformer to export, or None
+        format: "auto", "torchscript" or "onnx"
+        signatures: Modality signatures of the embedder to export
+        image_size: H = W of the example images used for tracing
+
+    Returns:
+        The written manifest
+    """
+    fmt = resolve_format(format)
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    manifest: Dict[str, Any] = {"version": EXPORT_VERSION, "format": fmt}
+    suffix = _SUFFIX[fmt]
+
+    if embedder is not None:
+        was_training = embedder.training
+        files = {}
+        for modalities in signatures:
+            key = signature_key(modalities)
+            file = f"multimodal-{key}{suffix}"
+            graph = MultimodalGraph(embedder, modalities)
+            _save_graph(
+                graph,
+                _multimodal_examples(embedder, modalities, batch=2, image_size=image_size),
+                directory / file,
+                fmt,
+                input_names=[m for m in MODALITIES if m in key.split("+")],
+                output_names=["embedding", "triad_probs", "triad_logits"],
+            )
+            files[key] = file
+        embedder.to(torch.device(embedder.cfg.device)).train(was_training)
+        manifest["multimodal"] = {"files": files, "embedding_dim": embedder.get_embedding_dim()}
+
+    if deeptriad is not None:
+        was_training = deeptriad.training
+        files = {"masked": f"deeptriad{suffix}", "unmasked": f"deeptriad-unmasked{suffix}"}
+        x = torch.rand(2, 4, deeptriad.cfg.dim_in)
+        mask = torch.zeros(2, 4, dtype=torch.bool)
+        mask[1, 3:] = True
+        outputs = ["logits_global", "logits_steps"]
+        _save_graph(DeepTriadGraph(deeptriad), (x, mask), directory / files["masked"], fmt, ["x", "padding_mask"], outputs)
+        _save_graph(UnmaskedDeepTriadGraph(deeptriad), (x,), directory / files["unmasked"], fmt, ["x"], outputs)
+        deeptriad.to(torch.device(deeptriad.cfg.device)).train(was_training)
+        manifest["deeptriad"] = {"files": files, "dim_in": deeptriad.cfg.dim_in}
+
+    with open(directory / EXPORT_FILE, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    logger.info(f"Exported inference graphs ({fmt}) to {directory}")
+    return manifest
+
+
+# ============================================================================
+# Loading
+# ============================================================================
+
+class _Runner:
+    """Runs one exported graph on CPU tensors, returns CPU tensors"""
+
+    def __init__(self, path: Path, fmt: str, input_names: List[str]):
+        self.fmt = fmt
+        self.input_names = input_names
+        if fmt == "torchscript":
+            self.module = torch.jit.load(str(path), map_location="cpu")
+        else:
+            import onnxruntime
+
+            self.session = onnxruntime.InferenceSession(str(path), providers=["CPUExecutionProvider"])
+
+    def __call__(self, *inputs: torch.Tensor) -> Tuple[torch.Tensor, ...]:
+        inputs = tuple(x.detach().cpu() for x in inputs)
+        if self.fmt == "torchscript":
+            with torch.no_grad():
+                return tuple(self.module(*inputs))
+        feeds = {name: x.numpy() for name, x in zip(self.input_names, inputs)}
+        return tuple(torch.from_numpy(np.asarray(out)) for out in self.session.run(None, feeds))
+
+
+class _ExportedModule:
+    """Eval-only stand-in: eval() / to() are no-ops, inference runs on CPU"""
+
+    training = False
+
+    def eval(self):
+        return self
+
+    def to(self, *args, **kwargs):
+        return self
+
+
+class ExportedMultimodalV4(_ExportedModule):
+    """
+    Inference-only NumTriadMultimodalV4 backed by exported graphs, with
+    the same call signature. Texts / codes are featurized in NumPy before
+    the graph runs.
+    """
+
+    def __init__(self, directory: Union[str, Path], manifest: Dict[str, Any]):
+        from numtriad.multimodal_v4 import SimpleCodeEncoder, SimpleTextEncoder
+
+        self._featurize_text = SimpleTextEncoder.featurize
+        self._featurize_code = SimpleCodeEncoder.featurize
+        directory = Path(directory)
+        fmt = manifest["format"]
+        info = manifest["multimodal"]
+        self.embedding_dim = int(info["embedding_dim"])
+        self.runners = {
+            key: _Runner(directory / file, fmt, key.split("+"))
+            for key, file in info["files"].items()
+        }
+
+    def get_embedding_dim(self) -> int:
+        return self.embedding_dim
+
+    def __call__(
+        self,
+        texts: Optional[List[str]] = None,
+        images: Optional[torch.Tensor] = None,
+        codes: Optional[List[str]] = None,
+        audio_feats: Optional[torch.Tensor] = None,
+        return_triad_objects: bool = False,
+    ):
+        feats = {
+            "text": self._featurize_text(texts) if texts else None,
+            "image": images,
+            "code": self._featurize_code(codes) if codes else None,
+            "audio": audio_feats,
+        }
+        present = [m for m in MODALITIES if feats[m] is not None]
+        if not present:
+            raise ValueError("NumTriadMultimodalV4: at least one modality must be provided")
+        key = signature_key(present)
+        runner = self.runners.get(key)
+        if runner is None:
+            raise ValueError(f"Modality signature {key!r} was not exported (available: {sorted(self.runners)})")
+
+        embedding, triad_probs, triad_logits = runner(*(feats[m] for m in present))
+        if return_triad_objects:
+            from numtriad.multimodal_v4 import Triad
+
+            return embedding, triad_probs, [Triad.from_logits(row) for row in triad_logits]
+        return embedding, triad_probs
+
+
+class ExportedDeepTriad(_ExportedModule):
+    """Inference-only DeepTriadTransformer backed by an exported graph"""
+
+    def __init__(self, directory: Union[str, Path], manifest: Dict[str, Any]):
+        info = manifest["deeptriad"]
+        directory = Path(directory)
+        self.dim_in = int(info["dim_in"])
+        self.masked = _Runner(directory / info["files"]["masked"], manifest["format"], ["x", "padding_mask"])
+        self.unmasked = _Runner(directory / info["files"]["unmasked"], manifest["format"], ["x"])
+
+    def __call__(
+        self,
+        x: torch.Tensor,
+        padding_mask: Optional[torch.Tensor] = None,
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        if padding_mask is None:
+            logits_global, logits_steps = self.unmasked(x)
+        else:
+            logits_global, logits_steps = self.masked(x, padding_mask)
+        return logits_global, logits_steps
+
+
+def read_export_manifest(directory: Union[str, Path]) -> Dict[str, Any]:
+    path = Path(directory) / EXPORT_FILE
+    if not path.exists():
+        raise FileNotFoundError(f"No exported inference graphs in {directory} ({EXPORT_FILE} missing)")
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != EXPORT_VERSION:
+        raise ValueError(f"Unsupported export version {manifest.get('version')} (expected {EXPORT_VERSION})")
+    return manifest
+
+
+def load_inference(
+    directory: Union[str, Path],
+) -> Tuple[Optional[ExportedMultimodalV4], Optional[ExportedDeepTriad]]:
+    """(embedder, deeptriad) of an export directory (None for a module not exported)"""
+    manifest = read_export_manifest(directory)
+    embedder = ExportedMultimodalV4(directory, manifest) if "multimodal" in manifest else None
+    deeptriad = ExportedDeepTriad(directory, manifest) if "deeptriad" in manifest else None
+    return embedder, deeptriad
@@ -0,0 +1,290 @@
+"""
+NumTriad Sharded RAG Index
+==========================
+
+Scatter-gather wrapper around NumTriadRAGIndexV4 that spreads documents
+over N worker processes:
+
+  - each document goes to shard crc32(doc_id) % N, so an id always lands
+    on the same shard (upserts and deletes stay local to one worker)
+  - a query is sent to every shard at once; each worker answers its
+    local top-k, and the coordinator merges the sorted partial lists
+    with a heap (heapq.merge) into the global top-k
+
+Scores are computed by the same NumTriadRAGIndexV4 code in every shard,
+so they are directly comparable and exact queries return the same
+top-k as a single index over the whole corpus.
+
+Each worker owns its shard's memory and search runs on N cores. The
+coordinator exposes the NumTriadRAGIndexV4 interface used by
+NumTriadSystemV4 (add_document / delete / query / save / len), so the
+system facade works unchanged with NumTriadSystemConfig(rag_shards=N).
+
+Author: GLM Research Team
+Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import json
+import logging
+import multiprocessing as mp
+import threading
+import traceback
+import zlib
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from numtriad.index import HNSWConfig
+from numtriad.core.system_v4 import IndexedDoc, NumTriadRAGIndexV4, TriadMode
+
+logger = logging.getLogger(__name__)
+
+
+SHARDS_FILE = "shards.json"
+SHARDS_FORMAT = "numtriad-sharded-index"
+
+
+def shard_of(doc_id: str, n_shards: int) -> int:
+    """Shard owning a doc id (stable across processes, unlike hash())"""
+    return zlib.crc32(doc_id.encode("utf-8")) % n_shards
+
+
+def _shard_worker(conn, load_path: Optional[str], hnsw: Optional[HNSWConfig]) -> None:
+    """
+    Worker loop: owns one NumTriadRAGIndexV4 and runs the index methods
+    sent by the coordinator as (method name, args, kwargs) messages.
+    """
+    try:
+        index = NumTriadRAGIndexV4.load(load_path) if load_path else NumTriadRAGIndexV4()
+        if hnsw is not None and index.ann is None:
+            index.enable_hnsw(
+                M=hnsw.M,
+                ef_construction=hnsw.ef_construction,
+                ef_search=hnsw.ef_search,
+                seed=hnsw.seed,
+            )
+    except Exception as e:
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+        conn.close()
+        return
+    conn.send(("ok", len(index)))
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+        name, args, kwargs = message
+        try:
+            if name == "__len__":
+                result = len(index)
+            else:
+                result = getattr(index, name)(*args, **kwargs)
+                if isinstance(result, threading.Thread):
+                    result = None
+            conn.send(("ok", result))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}\n{traceback.format_exc()}"))
+    conn.close()
+
+
+class ShardedRAGIndexV4:
+    """
+    Hash-partitioned NumTriadRAGIndexV4 over `n_shards` worker processes.
+
+    Use close() (or a `with` block) to stop the workers; they are daemon
+    processes, so they also stop with the coordinator.
+    """
+
+    def __init__(
+        self,
+        n_shards: int = 4,
+        hnsw: Optional[HNSWConfig] = None,
+        start_method: Optional[str] = None,
+        _load_path: Optional[Union[str, Path]] = None,
+    ):
+        if n_shards < 1:
+            raise ValueError(f"n_shards must be >= 1, got {n_shards}")
+        self.n_shards = int(n_shards)
+        self.hnsw = hnsw
+        self._lock = threading.Lock()  # one scatter-gather round at a time on the pipes
+        self.epoch = 0  # bumped on every add / delete, as NumTriadRAGIndexV4.epoch
+        ctx = mp.get_context(start_method)
+
+        self._conns = []
+        self._procs = []
+        for i in range(self.n_shards):
+            parent, child = ctx.Pipe()
+            load_path = str(Path(_load_path) / f"shard-{i:03d}") if _load_path else None
+            proc = ctx.Process(
+                target=_shard_worker,
+                args=(child, load_path, hnsw),
+                name=f"numtriad-rag-shard-{i}",
+                daemon=True,
+            )
+            proc.start()
+            child.close()
+            self._conns.append(parent)
+            self._procs.append(proc)
+
+        for i in range(self.n_shards):
+            self._recv(i)  # wait for every worker to be ready
+        logger.info(f"Started sharded RAG index ({self.n_shards} shards)")
+
+    # -----------------------------------------------------------------------
+    # Scatter / gather
+    # -----------------------------------------------------------------------
+
+    def _recv(self, shard: int) -> Any:
+        try:
+            status, payload = self._conns[shard].recv()
+        except EOFError:
+            raise RuntimeError(f"RAG shard {shard} worker exited")
+        if status != "ok":
+            raise RuntimeError(f"RAG shard {shard} failed: {payload}")
+        return payload
+
+    def _scatter(self, calls: Dict[int, Tuple[str, tuple, dict]]) -> Dict[int, Any]:
+        """Send one call per shard, then gather every reply (workers run in parallel)"""
+        with self._lock:
+            for shard, call in calls.items():
+                self._conns[shard].send(call)
+            replies, error = {}, None
+            for shard in calls:
+                try:
+                    replies[shard] = self._recv(shard)
+                except RuntimeError as e:
+                    error = error or e  # keep draining the other pipes
+            if error is not None:
+                raise error
+            return replies
+
+    def _broadcast(self, name: str, *args: Any, **kwargs: Any) -> List[Any]:
+        replies = self._scatter({i: (name, args, kwargs) for i in range(self.n_shards)})
+        return [replies[i] for i in range(self.n_shards)]
+
+    # -----------------------------------------------------------------------
+    # Index interface (see NumTriadRAGIndexV4)
+    # -----------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return sum(self._broadcast("__len__"))
+
+    def shard_sizes(self) -> List[int]:
+        return self._broadcast("__len__")
+
+    def add_document(self, doc: IndexedDoc) -> None:
+        """Add (or replace) a document on its shard"""
+        shard = shard_of(doc.doc_id, self.n_shards)
+        self._scatter({shard: ("add_document", (doc,), {})})
+        self.epoch += 1
+
+    def add_documents(self, docs: Iterable[IndexedDoc]) -> None:
+        """Add documents with one message per shard (shards ingest in parallel)"""
+        groups: Dict[int, List[IndexedDoc]] = defaultdict(list)
+        for doc in docs:
+            groups[shard_of(doc.doc_id, self.n_shards)].append(doc)
+        if groups:
+            self._scatter({shard: ("add_documents", (group,), {}) for shard, group in groups.items()})
+            self.epoch += 1
+
+    def upsert(self, doc: IndexedDoc) -> None:
+        self.add_document(doc)
+
+    def delete(self, doc_id: str) -> bool:
+        shard = shard_of(doc_id, self.n_shards)
+        deleted = self._scatter({shard: ("delete", (doc_id,), {})})[shard]
+        if deleted:
+            self.epoch += 1
+        return deleted
+
+    def compact(self) -> None:
+        """Compact every shard (synchronously, in parallel)"""
+        self._broadcast("compact", background=False)
+
+    def enable_hnsw(self, **kwargs: Any) -> None:
+        self._broadcast("enable_hnsw", **kwargs)
+
+    def build_ivf(self, **kwargs: Any) -> None:
+        self._broadcast("build_ivf", **kwargs)
+
+    def build_triad_buckets(self, **kwargs: Any) -> None:
+        self._broadcast("build_triad_buckets", **kwargs)
+
+    def query(
+        self,
+        query_embedding,
+        query_triad=None,
+        k: int = 5,
+        mode: TriadMode = "auto",
+        **kwargs: Any,
+    ) -> List[Tuple[IndexedDoc, float]]:
+        """
+        Scatter the query to every shard and merge the per-shard top-k.
+
+        Extra keyword arguments (alpha_semantic, alpha_triad, nprobe,
+        ef_search, rerank, exact, filters) are passed to each shard's
+        NumTriadRAGIndexV4.query().
+        """
+        partials = self._broadcast(
+            "query", query_embedding, query_triad, k=k, mode=mode, **kwargs
+        )
+        # each partial list is sorted by decreasing score
+        merged = heapq.merge(*partials, key=lambda hit: -hit[1])
+        return list(itertools.islice(merged, k))
+
+    # -----------------------------------------------------------------------
+    # Persistence
+    # -----------------------------------------------------------------------
+
+    def save(self, path: Union[str, Path]) -> Path:
+        """Save every shard as a segment under path/shard-XXX (in parallel)"""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        self._scatter({
+            i: ("save", (str(path / f"shard-{i:03d}"),), {}) for i in range(self.n_shards)
+        })
+        with open(path / SHARDS_FILE, "w", encoding="utf-8") as f:
+            json.dump({"format": SHARDS_FORMAT, "n_shards": self.n_shards, "hash": "crc32"}, f)
+        logger.info(f"Saved sharded RAG index ({self.n_shards} shards) to {path}")
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, Path], start_method: Optional[str] = None) -> "ShardedRAGIndexV4":
+        """Start one worker per saved shard, each opening its own segment"""
+        with open(Path(path) / SHARDS_FILE, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("format") != SHARDS_FORMAT:
+            raise ValueError(f"{path} is not a sharded RAG index")
+        return cls(n_shards=manifest["n_shards"], start_method=start_method, _load_path=path)
+
+    # -----------------------------------------------------------------------
+    # Lifecycle
+    # -----------------------------------------------------------------------
+
+    def close(self) -> None:
+        """Stop the worker processes"""
+        for conn in self._conns:
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for proc in self._procs:
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+        for conn in self._conns:
+            conn.close()
+        self._conns, self._procs = [], []
+
+    def __enter__(self) -> "ShardedRAGIndexV4":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
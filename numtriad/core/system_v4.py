@@ -30,7 +30,12 @@ Usage:
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import List, Optional, Dict, Any, Literal, Tuple
+from itertools import islice
+from pathlib import Path
+import shutil
+import threading
+import time
+from typing import List, Optional, Dict, Any, Iterable, Iterator, Literal, Tuple, Union
 import logging
 
 import numpy as np
@@ -75,6 +80,38 @@ except ImportError:
     VTE_AVAILABLE = False
     logger.warning("VisionTransformationEngine not available - vision features disabled")
 
+from numtriad.index import (
+    VectorStore,
+    IVFIndex,
+    HNSWIndex,
+    HNSWConfig,
+    CompressedIndex,
+    TriadBuckets,
+    MetadataIndex,
+    Tombstones,
+    ReadWriteLock,
+    remap_rows,
+    save_tombstones,
+    load_tombstones,
+    WALRecord,
+    WriteAheadLog,
+    read_checkpoint,
+    write_checkpoint,
+    replay,
+    stream_top_k,
+    read_rows,
+    rebuild_ann,
+    memory_report,
+    top_k_indices,
+    write_segment,
+    open_segment,
+    ann_kind,
+    save_ann,
+    load_ann,
+)
+from numtriad.utils.metrics import recall_at_k
+from numtriad.core.batching import MicroBatcher
+
 
 # ============================================================================
 # PILLAR C: DeepTriadTransformer
@@ -195,11 +232,68 @@ class NumTriadRAGIndexV4:
         * mode "concrete"    -> favor high Θ
         * mode "balanced"    -> neutral mix
         * mode "auto"        -> use query triad
+
+    Embeddings, triads and norms are kept in a contiguous VectorStore
+    (row i <-> self.docs[i]) so a query is one matmul + a vectorized
+    L1 triad term + argpartition top-k.
+
+    Optionally, an ANN index (see build_ivf / enable_hnsw /
+    enable_compression) restricts scoring to a candidate set; the
+    triad-aware score is then applied to the candidates.
+
+    Exact queries can skip whole triad-simplex buckets whose score upper
+    bound cannot enter the top-k (see build_triad_buckets); results are
+    unchanged.
+
+    Metadata is kept in per-field inverted indexes (MetadataIndex) so
+    query(filters=...) scores only the matching rows.
+
+    Doc ids are unique: delete() flags the row in a tombstone bitmap
+    (masked at scoring time) and add_document()/upsert() of an existing
+    id replaces it. Once the dead fraction reaches compaction_threshold,
+    compact() rebuilds the live rows in a background thread while
+    queries keep running on the current state. `epoch` counts the
+    add / delete calls, so callers can tell when cached results are stale.
+
+    Durability (see numtriad.index.wal): recover(directory) opens an
+    index whose adds / deletes are written to a write-ahead log before
+    they return (group-commit fsync), with a checkpoint segment saved
+    every `checkpoint_every` logged operations.
     """
 
-    def __init__(self):
-        self.docs: List[IndexedDoc] = []
-        self.dim: Optional[int] = None
+    def __init__(self, compaction_threshold: float = 0.3, auto_compact: bool = True):
+        self.docs: List[IndexedDoc] = []  # row i <-> docs[i] (including deleted rows)
+        self._store = VectorStore()
+        self.ann: Optional[Any] = None  # ANN candidate generator (IVFIndex / HNSWIndex / CompressedIndex)
+        self.triad_buckets: Optional[TriadBuckets] = None  # bound-based pruning for exact queries
+        self.metadata_index = MetadataIndex()
+
+        self._id_to_row: Dict[str, int] = {}  # live doc id -> row
+        self._tombstones = Tombstones()
+        self._lock = ReadWriteLock()
+        self.compaction_threshold = compaction_threshold
+        self.auto_compact = auto_compact
+        self._compaction: Optional[Dict[str, Any]] = None  # snapshot of a running compaction
+        self._compaction_thread: Optional[threading.Thread] = None
+        self.epoch = 0  # bumped on every add / delete (query result caches key on it)
+
+        self.wal: Optional[WriteAheadLog] = None  # see attach_wal / recover
+        self.wal_dir: Optional[Path] = None
+        self.checkpoint_every = 0
+        self._logged_since_checkpoint = 0
+        self._checkpoint_lock = threading.Lock()
+
+    @property
+    def dim(self) -> Optional[int]:
+        return self._store.dim
+
+    def __len__(self) -> int:
+        """Number of live (non-deleted) documents"""
+        return len(self.docs) - self._tombstones.count
+
+    @property
+    def dead_fraction(self) -> float:
+        return self._tombstones.count / len(self.docs) if self.docs else 0.0
 
     @staticmethod
     def _cosine_sim(a: np.ndarray, b: np.ndarray) -> float:
@@ -209,19 +303,579 @@ class NumTriadRAGIndexV4:
         return num / den
 
     def add_document(self, doc: IndexedDoc) -> None:
-        """Add document to index"""
-        if self.dim is None:
-            self.dim = doc.embedding.shape[0]
-        else:
-            if doc.embedding.shape[0] != self.dim:
-                raise ValueError(
-                    f"Embedding dimension mismatch: {doc.embedding.shape[0]} != {self.dim}"
-                )
-        self.docs.append(doc)
+        """Add document to index (replaces an existing document with the same id)"""
+        with self._lock.write():
+            lsn = self._log([self._add_record(doc)])
+            old_row = self._id_to_row.get(doc.doc_id)
+            self._append(doc)
+            self.epoch += 1
+        self._commit(lsn)
         logger.debug(f"Added document {doc.doc_id} to RAG index")
+        if old_row is not None:
+            self._maybe_compact()
 
-    def _triad_target_from_mode(
+    def add_documents(self, docs: List[IndexedDoc]) -> None:
+        """
+        Add a batch of documents with one store append and one ANN /
+        side-index update (same upsert semantics as add_document; a
+        repeated id keeps its last occurrence).
+        """
+        if not docs:
+            return
+        with self._lock.write():
+            lsn = self._log([self._add_record(doc) for doc in docs])
+            dead_before = self._tombstones.count
+            self._append_many(docs)
+            self.epoch += 1
+            replaced = self._tombstones.count > dead_before
+        self._commit(lsn)
+        logger.debug(f"Added {len(docs)} documents to RAG index")
+        if replaced:
+            self._maybe_compact()
+
+    def upsert(self, doc: IndexedDoc) -> None:
+        """Insert or replace the document with id doc.doc_id"""
+        self.add_document(doc)
+
+    def delete(self, doc_id: str) -> bool:
+        """
+        Delete a document by id (tombstone, reclaimed by compaction).
+
+        Returns:
+            False if the id is not indexed
+        """
+        with self._lock.write():
+            row = self._id_to_row.get(doc_id)
+            if row is None:
+                return False
+            lsn = self._log([WALRecord(op="delete", lsn=0, doc_id=doc_id)])
+            self._delete_row(row)
+            self.epoch += 1
+        self._commit(lsn)
+        logger.debug(f"Deleted document {doc_id} from RAG index")
+        self._maybe_compact()
+        return True
+
+    def _append(self, doc: IndexedDoc) -> int:
+        """Append a row for doc to the store and side indexes (write lock held)"""
+        return int(self._append_many([doc])[0])
+
+    def _append_many(self, docs: List[IndexedDoc]) -> np.ndarray:
+        """
+        Append rows for docs (write lock held). Ids already indexed, or
+        repeated in the batch, tombstone their previous row.
+        """
+        rows = self._store.append(
+            np.stack([np.asarray(d.embedding, dtype="float32") for d in docs]),
+            np.stack([np.asarray(d.triad, dtype="float32") for d in docs]),
+        )
+        self.docs.extend(docs)
+        for doc, row in zip(docs, rows):
+            old_row = self._id_to_row.get(doc.doc_id)
+            if old_row is not None:
+                self._delete_row(old_row)
+            self._id_to_row[doc.doc_id] = int(row)
+        self.metadata_index.add((d.metadata for d in docs), rows)
+        if self.ann is not None:
+            self.ann.add(self._store.embeddings[rows], rows)
+        if self.triad_buckets is not None:
+            self.triad_buckets.add(self._unit_rows(rows), self._store.triads[rows], rows)
+            # bucket state only changes here, under the write lock (queries just read it)
+            self.triad_buckets.refresh_anchors(self._unit_rows)
+        return rows
+
+    def _delete_row(self, row: int) -> None:
+        """Tombstone a row (write lock held)"""
+        self._tombstones.mark(row)
+        self._id_to_row.pop(self.docs[row].doc_id, None)
+        if self._compaction is not None:
+            self._compaction["deleted"].append(row)
+
+    # -----------------------------------------------------------------------
+    # Write-ahead log & checkpoints
+    # -----------------------------------------------------------------------
+
+    @staticmethod
+    def _add_record(doc: IndexedDoc) -> WALRecord:
+        return WALRecord(
+            op="add", lsn=0, doc_id=doc.doc_id,
+            embedding=doc.embedding, triad=doc.triad, metadata=doc.metadata,
+        )
+
+    def _log(self, records: List[WALRecord]) -> int:
+        """
+        Write records to the WAL (write lock held, so lsn order = apply
+        order) and count them towards the next checkpoint.
+
+        Returns:
+            Last lsn written (0 without a WAL)
+        """
+        if self.wal is None:
+            return 0
+        lsn = self.wal.append(records)
+        self._logged_since_checkpoint += len(records)
+        return lsn
+
+    def _commit(self, lsn: int) -> None:
+        """Wait for the group commit covering lsn, then checkpoint if due (no lock held)"""
+        if self.wal is None or not lsn:
+            return
+        self.wal.wait(lsn)
+        if self.checkpoint_every and self._logged_since_checkpoint >= self.checkpoint_every:
+            self.checkpoint()
+
+    def attach_wal(
+        self,
+        directory: Union[str, Path],
+        commit_interval: float = 0.005,
+        checkpoint_every: int = 10000,
+        next_lsn: Optional[int] = None,
+    ) -> WriteAheadLog:
+        """
+        Log every following add / delete to `directory` (see recover()).
+        Documents already in the index are checkpointed right away if
+        the directory has no checkpoint yet.
+        """
+        self.wal_dir = Path(directory)
+        self.wal = WriteAheadLog(self.wal_dir, commit_interval=commit_interval, next_lsn=next_lsn)
+        self.checkpoint_every = checkpoint_every
+        self._logged_since_checkpoint = 0
+        if len(self.docs) and read_checkpoint(self.wal_dir) is None:
+            self.checkpoint()
+        return self.wal
+
+    def checkpoint(self) -> Optional[int]:
+        """
+        Save the index as a checkpoint segment of the WAL directory and
+        drop the log files it covers.
+
+        Returns:
+            Last lsn included in the checkpoint (None if a checkpoint is
+            already running or no WAL is attached)
+        """
+        if self.wal is None or not self._checkpoint_lock.acquire(blocking=False):
+            return None
+        try:
+            previous = read_checkpoint(self.wal_dir)
+            with self._lock.read():
+                # no write can run here: the snapshot is exactly lsns <= lsn
+                lsn = self.wal.rotate()
+                self._logged_since_checkpoint = 0
+                if previous is not None and previous["lsn"] == lsn:
+                    return lsn
+                name = f"checkpoint-{lsn:020d}"
+                self._save(self.wal_dir / name)
+            write_checkpoint(self.wal_dir, lsn, name)
+            self.wal.drop_until(lsn)
+            for old in self.wal_dir.glob("checkpoint-*"):
+                if old.name != name and old.is_dir():
+                    shutil.rmtree(old, ignore_errors=True)
+            logger.info(f"RAG index checkpoint at lsn {lsn} ({len(self)} docs)")
+            return lsn
+        finally:
+            self._checkpoint_lock.release()
+
+    @classmethod
+    def recover(
+        cls,
+        directory: Union[str, Path],
+        commit_interval: float = 0.005,
+        checkpoint_every: int = 10000,
+    ) -> "NumTriadRAGIndexV4":
+        """
+        Open (or create) a durable index: load the last checkpoint, replay
+        the WAL records written after it, and keep logging to `directory`.
+        """
+        directory = Path(directory)
+        ckpt = read_checkpoint(directory)
+        index = cls.load(directory / ckpt["segment"]) if ckpt else cls()
+        after = ckpt["lsn"] if ckpt else 0
+
+        start = time.perf_counter()
+        n_replayed = index._replay(replay(directory, after))
+        index.attach_wal(directory, commit_interval, checkpoint_every, next_lsn=after + 1)
+        logger.info(
+            f"Recovered RAG index from {directory}: checkpoint lsn {after}, "
+            f"{n_replayed} WAL records replayed in {time.perf_counter() - start:.2f}s"
+        )
+        return index
+
+    def _replay(self, records: Iterable[WALRecord]) -> int:
+        """Apply logged records without logging them again"""
+        n = 0
+        pending: List[IndexedDoc] = []
+        with self._lock.write():
+            for record in records:
+                n += 1
+                if record.op == "add":
+                    pending.append(IndexedDoc(
+                        doc_id=record.doc_id,
+                        embedding=record.embedding,
+                        triad=record.triad,
+                        metadata=record.metadata,
+                    ))
+                    continue
+                if pending:
+                    self._append_many(pending)
+                    pending = []
+                row = self._id_to_row.get(record.doc_id)
+                if row is not None:
+                    self._delete_row(row)
+            if pending:
+                self._append_many(pending)
+            self.epoch += 1
+        return n
+
+    def close(self) -> None:
+        """Sync and close the write-ahead log, if any"""
+        if self.wal is not None:
+            self.wal.close()
+            self.wal = None
+
+    # -----------------------------------------------------------------------
+    # Compaction
+    # -----------------------------------------------------------------------
+
+    def _maybe_compact(self) -> None:
+        if self.auto_compact and self._compaction is None \
+                and self.dead_fraction >= self.compaction_threshold:
+            self.compact(background=True)
+
+    def compact(self, background: bool = True) -> Optional[threading.Thread]:
+        """
+        Drop deleted rows and rebuild the store, ANN index, triad buckets
+        and metadata index over the live rows.
+
+        The rebuild runs without holding the lock (in a daemon thread if
+        background=True), so queries are not blocked; rows added and
+        deleted meanwhile are replayed before the new state is swapped in.
+
+        Returns:
+            The compaction thread (background=True), else None
+        """
+        with self._lock.write():
+            if self._compaction is not None:
+                return self._compaction_thread
+            n = len(self.docs)
+            live = np.flatnonzero(~self._tombstones.mask(n))
+            self._compaction = {
+                "n": n,
+                "deleted": [],
+                "ann": self.ann,
+                "triad_buckets": self.triad_buckets,
+            }
+
+        def run() -> None:
+            try:
+                state = self._build_compacted(live)
+                with self._lock.write():
+                    self._install_compacted(state, live)
+                logger.info(f"Compacted RAG index: {len(live)}/{n} rows kept")
+            except Exception as e:
+                logger.error(f"RAG index compaction failed: {e}")
+            finally:
+                with self._lock.write():
+                    self._compaction = None
+                    self._compaction_thread = None
+
+        if not background:
+            run()
+            return None
+        thread = threading.Thread(target=run, name="numtriad-rag-compaction", daemon=True)
+        self._compaction_thread = thread
+        thread.start()
+        return thread
+
+    def _build_compacted(self, live: np.ndarray) -> Dict[str, Any]:
+        """Build the compacted state from the snapshot rows (no lock held)"""
+        snapshot = self._compaction
+        store = self._store.take(live)
+        docs = [self.docs[r] for r in live]
+        metadata_index = MetadataIndex()
+        metadata_index.add((d.metadata for d in docs), range(len(docs)))
+
+        ann = snapshot["ann"]
+        ann = rebuild_ann(ann, store) if ann is not None else None
+
+        buckets = snapshot["triad_buckets"]
+        if buckets is not None:
+            buckets = TriadBuckets(resolution=buckets.resolution, centroids=buckets.centroids)
+            if len(store):
+                buckets.add(self._unit_rows(store=store), store.triads, np.arange(len(store)))
+
+        return {
+            "store": store,
+            "docs": docs,
+            "metadata_index": metadata_index,
+            "ann": ann,
+            "triad_buckets": buckets,
+            "id_to_row": {d.doc_id: i for i, d in enumerate(docs)},
+        }
+
+    def _install_compacted(self, state: Dict[str, Any], live: np.ndarray) -> None:
+        """Swap in the compacted state and replay concurrent changes (write lock held)"""
+        snapshot = self._compaction
+        self._compaction = None  # replayed deletes below must not be recorded again
+        n = snapshot["n"]
+        old_docs, old_tombstones = self.docs, self._tombstones
+        old_ann, old_buckets = self.ann, self.triad_buckets
+
+        self._store = state["store"]
+        self.docs = state["docs"]
+        self.metadata_index = state["metadata_index"]
+        self._id_to_row = state["id_to_row"]
+        self._tombstones = Tombstones()
+        self.ann = state["ann"]
+        self.triad_buckets = state["triad_buckets"]
+
+        # ANN / buckets replaced while compacting: rebuild the current ones
+        if old_ann is not snapshot["ann"]:
+            self.ann = rebuild_ann(old_ann, self._store) if old_ann is not None else None
+        if old_buckets is not snapshot["triad_buckets"]:
+            self.triad_buckets = None
+            if old_buckets is not None:
+                self.build_triad_buckets(resolution=old_buckets.resolution)
+
+        # Deletes of snapshot rows made during the rebuild
+        remap = remap_rows(live, n)
+        for row in snapshot["deleted"]:
+            if row < n and remap[row] >= 0:
+                self._delete_row(int(remap[row]))
+
+        # Rows appended during the rebuild
+        for row in range(n, len(old_docs)):
+            new_row = self._append(old_docs[row])
+            if old_tombstones.is_dead(row):
+                self._delete_row(new_row)
+
+    def _unit_rows(
+        self,
+        rows: Optional[np.ndarray] = None,
+        store: Optional[VectorStore] = None,
+    ) -> np.ndarray:
+        """L2-normalized embeddings of all rows (rows=None) or of the given rows"""
+        store = self._store if store is None else store
+        emb, norms = store.embeddings, store.norms
+        if rows is not None:
+            emb, norms = emb[rows], norms[rows]
+        return emb / (norms[:, None] + 1e-8)
+
+    # -----------------------------------------------------------------------
+    # Triad-simplex pruning (exact)
+    # -----------------------------------------------------------------------
+
+    def build_triad_buckets(
         self,
+        resolution: int = 4,
+        n_clusters: Optional[int] = None,
+        seed: int = 0,
+    ) -> TriadBuckets:
+        """
+        Bucket documents by their (∆, ∞, Θ) simplex cell, split by coarse
+        semantic cluster, and keep per-bucket score bounds. Exact queries
+        then visit buckets by decreasing bound and stop once no remaining
+        bucket can enter the top-k.
+
+        Args:
+            resolution: Cells per triad axis
+            n_clusters: Semantic clusters per triad cell (default ~sqrt(N)/2,
+                0 disables the semantic split)
+            seed: k-means seed
+        """
+        n = len(self._store)
+        if n_clusters is None:
+            n_clusters = max(1, int(np.sqrt(n) / 2))
+        buckets = TriadBuckets(resolution=resolution)
+        if n:
+            unit = self._unit_rows()
+            if n_clusters > 1:
+                buckets.train(unit, n_clusters, seed=seed)
+            buckets.add(unit, self._store.triads, np.arange(n))
+        self.triad_buckets = buckets
+        logger.info(f"Built triad buckets: {buckets.stats()}")
+        return buckets
+
+    def _query_buckets(
+        self,
+        query_embedding: np.ndarray,
+        target_triad: np.ndarray,
+        k: int,
+        alpha_semantic: float,
+        alpha_triad: float,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Exact top-k with bucket pruning.
+
+        Returns:
+            (rows, scores) of the top-k, sorted by decreasing score
+        """
+        buckets = self.triad_buckets
+        q_unit = query_embedding / (np.linalg.norm(query_embedding) + 1e-8)
+        bounds = buckets.upper_bounds(q_unit, target_triad, alpha_semantic, alpha_triad)
+        order = np.argsort(-bounds, kind="stable")
+
+        # 1) Best-bound buckets until k rows are scored -> k-th score threshold
+        n_first = int(np.searchsorted(np.cumsum(buckets.bucket_sizes()[order]), k)) + 1
+        first = order[:n_first]
+        rows = np.concatenate([buckets.rows(int(b)) for b in first])
+        scores = self._score_rows(query_embedding, target_triad, alpha_semantic, alpha_triad, rows)
+        keep = top_k_indices(scores, k)
+        best_rows, best_scores = rows[keep], scores[keep]
+        scanned = rows.size
+
+        # 2) Only buckets whose bound reaches the threshold can still enter the
+        #    top-k (small slack for float rounding between bound and score)
+        rest = order[n_first:]
+        if len(best_rows) >= k:
+            rest = rest[bounds[rest] + 1e-6 >= best_scores[-1]]
+        if rest.size:
+            rows = np.concatenate([buckets.rows(int(b)) for b in rest])
+            scores = self._score_rows(query_embedding, target_triad, alpha_semantic, alpha_triad, rows)
+            scanned += rows.size
+            rows = np.concatenate([best_rows, rows])
+            scores = np.concatenate([best_scores, scores])
+            keep = top_k_indices(scores, k)
+            best_rows, best_scores = rows[keep], scores[keep]
+
+        logger.debug(f"Triad buckets: scanned {scanned}/{len(self._store)} rows")
+        return best_rows, best_scores
+
+    # -----------------------------------------------------------------------
+    # Approximate search (IVF)
+    # -----------------------------------------------------------------------
+
+    def build_ivf(
+        self,
+        nlist: Optional[int] = None,
+        nprobe: int = 8,
+        n_iter: int = 20,
+        seed: int = 0,
+    ) -> IVFIndex:
+        """
+        Train an IVF coarse quantizer on the stored embeddings and switch
+        query() to approximate mode. Documents added afterwards are
+        assigned to the existing lists without retraining.
+
+        Args:
+            nlist: Number of inverted lists (default ~4*sqrt(N))
+            nprobe: Default number of lists probed per query
+            n_iter: k-means iterations
+            seed: k-means seed
+        """
+        n = len(self._store)
+        if n == 0:
+            raise ValueError("Cannot build IVF on an empty index")
+        if nlist is None:
+            nlist = max(1, int(4 * np.sqrt(n)))
+
+        ivf = IVFIndex(nlist=nlist, nprobe=nprobe, n_iter=n_iter, seed=seed)
+        emb = self._store.embeddings
+        ivf.train(emb)
+        ivf.add(emb, np.arange(n))
+        self.ann = ivf
+        logger.info(f"Built IVF index: nlist={ivf.nlist}, nprobe={nprobe}, docs={n}")
+        return ivf
+
+    def enable_hnsw(
+        self,
+        M: int = 16,
+        ef_construction: int = 200,
+        ef_search: int = 64,
+        seed: int = 0,
+    ) -> HNSWIndex:
+        """
+        Attach an HNSW graph and switch query() to approximate mode.
+
+        Existing documents are inserted now; later add_document() calls
+        insert online. ef_search can be overridden per query.
+        """
+        hnsw = HNSWIndex(
+            self._store,
+            M=M,
+            ef_construction=ef_construction,
+            ef_search=ef_search,
+            seed=seed,
+        )
+        if len(self._store):
+            hnsw.add(None, np.arange(len(self._store)))
+        self.ann = hnsw
+        logger.info(f"Enabled HNSW index: M={M}, ef_construction={ef_construction}, docs={len(hnsw)}")
+        return hnsw
+
+    def enable_compression(
+        self,
+        kind: str = "sq",
+        rerank: int = 100,
+        m: int = 8,
+        nbits: int = 8,
+        seed: int = 0,
+    ) -> CompressedIndex:
+        """
+        Score queries over quantized codes, then rerank a shortlist exactly.
+
+        Args:
+            kind: "sq" (per-dimension int8) or "pq" (product quantization + ADC)
+            rerank: Shortlist size re-scored with the float32 rows
+            m: PQ sub-quantizers (dim must be divisible by m)
+            nbits: PQ bits per sub-quantizer
+            seed: k-means seed (PQ)
+
+        The quantizer is trained on the current documents. Saving and
+        re-loading with mmap=True keeps the float32 rows on disk, so only
+        the codes are resident (see memory_report()).
+        """
+        n = len(self._store)
+        if n == 0:
+            raise ValueError("Cannot train a quantizer on an empty index")
+        compressed = CompressedIndex(kind=kind, rerank=rerank, m=m, nbits=nbits, seed=seed)
+        emb = self._store.embeddings
+        compressed.train(emb)
+        compressed.add(emb, np.arange(n))
+        self.ann = compressed
+        report = self.memory_report()
+        logger.info(
+            f"Enabled {kind} compression: {report['code_bytes_per_doc']} B/doc "
+            f"vs {report['float32_bytes_per_doc']} B/doc float32 ({report['reduction']:.1f}x)"
+        )
+        return compressed
+
+    def memory_report(self) -> Dict[str, Any]:
+        """Memory per document of the float32 rows vs compressed codes (if enabled)"""
+        compressed = self.ann if isinstance(self.ann, CompressedIndex) else None
+        return memory_report(len(self), self.dim, compressed)
+
+    def evaluate_ann_recall(
+        self,
+        query_embeddings: np.ndarray,
+        query_triads: Optional[np.ndarray] = None,
+        k: int = 10,
+        mode: TriadMode = "auto",
+        **ann_params: Any,
+    ) -> float:
+        """
+        Mean recall@k of approximate query() against exact search.
+
+        Extra keyword arguments (nprobe / ef_search / rerank) are forwarded
+        to query().
+        """
+        if self.ann is None:
+            raise RuntimeError(
+                "No ANN index attached (call build_ivf, enable_hnsw or enable_compression first)"
+            )
+        recalls = []
+        for i, q in enumerate(np.atleast_2d(query_embeddings)):
+            t = None if query_triads is None else query_triads[i]
+            exact = self.query(q, t, k=k, mode=mode, exact=True)
+            approx = self.query(q, t, k=k, mode=mode, **ann_params)
+            recalls.append(recall_at_k(
+                [d.doc_id for d, _ in exact],
+                [d.doc_id for d, _ in approx],
+                k,
+            ))
+        return float(np.mean(recalls)) if recalls else 1.0
+
+    @staticmethod
+    def _triad_target_from_mode(
         mode: TriadMode,
         query_triad: Optional[np.ndarray] = None,
     ) -> np.ndarray:
@@ -252,6 +906,72 @@ class NumTriadRAGIndexV4:
         # max possible = 2 (when [1,0,0] vs [0,0,1])
         return 1.0 - d / 2.0
 
+    def _score_rows(
+        self,
+        query_embedding: np.ndarray,
+        target_triad: np.ndarray,
+        alpha_semantic: float,
+        alpha_triad: float,
+        rows: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Vectorized version of the per-document score:
+
+            alpha_semantic * cos_sim + alpha_triad * triad_alignment
+
+        over all rows (rows=None) or over the given row indices.
+        """
+        emb = self._store.embeddings
+        triads = self._store.triads
+        norms = self._store.norms
+        if rows is not None:
+            emb, triads, norms = emb[rows], triads[rows], norms[rows]
+
+        scores = self._block_scores(
+            emb, triads, norms, query_embedding, target_triad, alpha_semantic, alpha_triad
+        )
+
+        # Deleted rows never rank
+        if self._tombstones.count:
+            dead = self._tombstones.mask(len(self.docs))
+            scores[dead if rows is None else dead[rows]] = -np.inf
+        return scores
+
+    @staticmethod
+    def _block_scores(
+        emb: np.ndarray,
+        triads: np.ndarray,
+        norms: np.ndarray,
+        query_embedding: np.ndarray,
+        target_triad: np.ndarray,
+        alpha_semantic: float,
+        alpha_triad: float,
+    ) -> np.ndarray:
+        """Triad-aware scores of a block of rows (shared by query() and stream_query())"""
+        q_norm = float(np.linalg.norm(query_embedding))
+        cos_sim = (emb @ query_embedding) / (norms * q_norm + 1e-8)
+        triad_score = 1.0 - np.abs(triads - target_triad).sum(axis=1) / 2.0
+        return alpha_semantic * cos_sim + alpha_triad * triad_score
+
+    def _results(
+        self,
+        rows: Optional[np.ndarray],
+        scores: np.ndarray,
+        idxs: np.ndarray,
+    ) -> List[Tuple[IndexedDoc, float]]:
+        """(doc, score) pairs for the selected score indices, skipping deleted rows"""
+        doc_rows = idxs if rows is None else rows[idxs]
+        return [
+            (self.docs[r], float(scores[i]))
+            for i, r in zip(idxs, doc_rows)
+            if np.isfinite(scores[i])
+        ]
+
+    def _ann_candidates(self, query_embedding: np.ndarray, k: int, **params: Any) -> np.ndarray:
+        """Candidate rows from the attached ANN index (None params are dropped)"""
+        params = {name: value for name, value in params.items() if value is not None}
+        return self.ann.candidates(query_embedding, k, **params)
+
     def query(
         self,
         query_embedding: np.ndarray,
@@ -260,28 +980,201 @@ class NumTriadRAGIndexV4:
         mode: TriadMode = "auto",
         alpha_semantic: float = 0.7,
         alpha_triad: float = 0.3,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        rerank: Optional[int] = None,
+        exact: bool = False,
+        filters: Optional[Dict[str, Any]] = None,
     ) -> List[Tuple[IndexedDoc, float]]:
         """
         Query with triad-aware scoring.
         
         score = alpha_semantic * cos_sim + alpha_triad * triad_alignment
+
+        filters (see numtriad.index.metadata) are pushed down: only the
+        matching rows are scored (exactly), so k hits are returned whenever
+        at least k documents match.
+
+        If an ANN index is attached (and exact=False), only its candidates
+        are scored; nprobe (IVF) / ef_search (HNSW) / rerank (compressed)
+        override the ANN defaults for this query. Exact queries use the
+        triad buckets, when built, to skip buckets that cannot reach the
+        top-k.
         """
-        if self.dim is None or len(self.docs) == 0:
+        with self._lock.read():
+            return self._query(
+                query_embedding, query_triad, k, mode, alpha_semantic, alpha_triad,
+                nprobe, ef_search, rerank, exact, filters,
+            )
+
+    def _query(
+        self,
+        query_embedding: np.ndarray,
+        query_triad: Optional[np.ndarray],
+        k: int,
+        mode: TriadMode,
+        alpha_semantic: float,
+        alpha_triad: float,
+        nprobe: Optional[int],
+        ef_search: Optional[int],
+        rerank: Optional[int],
+        exact: bool,
+        filters: Optional[Dict[str, Any]],
+    ) -> List[Tuple[IndexedDoc, float]]:
+        """query() body (read lock held)"""
+        if self.dim is None or len(self) == 0:
             logger.warning("RAG index is empty")
             return []
 
         query_embedding = query_embedding.astype("float32")
         target_triad = self._triad_target_from_mode(mode, query_triad)
 
-        scored: List[Tuple[IndexedDoc, float]] = []
-        for doc in self.docs:
-            cos_sim = self._cosine_sim(query_embedding, doc.embedding)
-            triad_score = self._triad_alignment_score(doc.triad, target_triad)
-            score = alpha_semantic * cos_sim + alpha_triad * triad_score
-            scored.append((doc, score))
+        if filters:
+            rows = self.metadata_index.rows(filters, len(self.docs))
+            logger.debug(f"Metadata filters matched {rows.size}/{len(self.docs)} docs")
+            if rows.size == 0:
+                return []
+            scores = self._score_rows(query_embedding, target_triad, alpha_semantic, alpha_triad, rows)
+            return self._results(rows, scores, top_k_indices(scores, k))
+
+        if (self.ann is None or exact) and self.triad_buckets is not None \
+                and alpha_semantic >= 0 and alpha_triad >= 0:
+            rows, scores = self._query_buckets(
+                query_embedding, target_triad, k, alpha_semantic, alpha_triad
+            )
+            return self._results(rows, scores, np.arange(rows.size))
+
+        rows = None
+        if self.ann is not None and not exact:
+            rows = self._ann_candidates(
+                query_embedding, k, nprobe=nprobe, ef_search=ef_search, rerank=rerank
+            )
+            if rows.size == 0:
+                return []
+
+        scores = self._score_rows(query_embedding, target_triad, alpha_semantic, alpha_triad, rows)
+        return self._results(rows, scores, top_k_indices(scores, k))
+
+    @classmethod
+    def stream_query(
+        cls,
+        path: Union[str, Path],
+        query_embedding: np.ndarray,
+        query_triad: Optional[np.ndarray] = None,
+        k: int = 5,
+        mode: TriadMode = "auto",
+        alpha_semantic: float = 0.7,
+        alpha_triad: float = 0.3,
+        block_rows: int = 65536,
+        prefetch: int = 2,
+    ) -> List[Tuple[IndexedDoc, float]]:
+        """
+        Exact query over an index saved with save(), without loading it.
+
+        The segment is streamed from disk in blocks of `block_rows` rows
+        (read ahead by a background thread, see numtriad.index.streaming),
+        so memory stays bounded for corpora larger than RAM. Scores and
+        ranking are those of query(exact=True) on the loaded index.
+        """
+        query_embedding = np.asarray(query_embedding, dtype="float32")
+        target_triad = cls._triad_target_from_mode(mode, query_triad)
+
+        def score_block(emb: np.ndarray, triads: np.ndarray, norms: np.ndarray) -> np.ndarray:
+            return cls._block_scores(
+                emb, triads, norms, query_embedding, target_triad, alpha_semantic, alpha_triad
+            )
+
+        rows, scores = stream_top_k(path, score_block, k, block_rows=block_rows, prefetch=prefetch)
+        hits = read_rows(path, rows)
+        return [
+            (
+                IndexedDoc(
+                    doc_id=hits["ids"][i],
+                    embedding=hits["embeddings"][i],
+                    triad=hits["triads"][i],
+                    metadata=hits["records"][i],
+                ),
+                float(scores[i]),
+            )
+            for i in range(rows.size)
+        ]
+
+    # -----------------------------------------------------------------------
+    # Persistence
+    # -----------------------------------------------------------------------
+
+    def _triad_bucket_settings(self) -> Optional[Dict[str, int]]:
+        """Settings to rebuild the triad buckets on load (None if disabled)"""
+        if self.triad_buckets is None:
+            return None
+        centroids = self.triad_buckets.centroids
+        return {
+            "resolution": self.triad_buckets.resolution,
+            "n_clusters": 0 if centroids is None else int(centroids.shape[0]),
+        }
 
-        scored.sort(key=lambda x: x[1], reverse=True)
-        return scored[:k]
+    def save(self, path: Union[str, Path]) -> Path:
+        """
+        Save the index as an on-disk segment (see numtriad.index.segment).
+        Deleted rows are kept, with their tombstones in a sidecar file.
+        """
+        with self._lock.read():
+            return self._save(path)
+
+    def _save(self, path: Union[str, Path]) -> Path:
+        path = write_segment(
+            path,
+            embeddings=self._store.embeddings,
+            triads=self._store.triads,
+            norms=self._store.norms,
+            ids=[d.doc_id for d in self.docs],
+            records=[d.metadata for d in self.docs],
+            normalized=False,
+            extra={
+                "index": type(self).__name__,
+                "ann": ann_kind(self.ann) if self.ann is not None else None,
+                "triad_buckets": self._triad_bucket_settings(),
+            },
+        )
+        save_ann(self.ann, path)
+        save_tombstones(self._tombstones, len(self.docs), path)
+        logger.info(f"Saved RAG index ({len(self)} docs) to {path}")
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, Path], mmap: bool = True) -> "NumTriadRAGIndexV4":
+        """
+        Open an index saved with save().
+
+        With mmap=True the embedding/triad arrays are read-only np.memmap
+        views: nothing is re-encoded and pages are loaded lazily. Appending
+        to a loaded index copies the matrix into RAM on first growth.
+        """
+        seg = open_segment(path, mmap=mmap)
+        if seg.normalized:
+            raise ValueError(f"Segment {path} stores normalized rows, not a NumTriadRAGIndexV4")
+
+        index = cls()
+        index._store = VectorStore.from_arrays(seg.embeddings, seg.triads, seg.norms)
+        index.docs = [
+            IndexedDoc(
+                doc_id=doc_id,
+                embedding=seg.embeddings[i],
+                triad=seg.triads[i],
+                metadata=seg.records[i],
+            )
+            for i, doc_id in enumerate(seg.ids)
+        ]
+        index.metadata_index.add(seg.records, range(len(seg.records)))
+        index._tombstones = load_tombstones(path)
+        index._id_to_row = {
+            doc_id: i for i, doc_id in enumerate(seg.ids) if not index._tombstones.is_dead(i)
+        }
+        index.ann = load_ann(path, seg.extra.get("ann"), store=index._store)
+        if seg.extra.get("triad_buckets"):
+            index.build_triad_buckets(**seg.extra["triad_buckets"])
+        logger.info(f"Loaded RAG index ({len(index)} docs) from {path}")
+        return index
 
 
 # ============================================================================
@@ -294,12 +1187,34 @@ class NumTriadSystemConfig:
     multimodal: Optional[MultimodalV4Config] = None
     deeptriad: Optional[DeepTriadTransformerConfig] = None
     device: str = "cpu"
+    rag_hnsw: Optional[HNSWConfig] = None  # HNSW graph on the RAG index (online insertion)
+    rag_shards: int = 0  # > 0: hash-partition the RAG index over that many worker processes
+    rag_wal_dir: Optional[str] = None  # durable RAG index (WAL + checkpoints), recovered on start; not with rag_shards
+    encode_max_batch: int = 0  # > 0: micro-batch concurrent single-text encodes (see numtriad.core.batching)
+    encode_max_wait_ms: float = 2.0  # max queue wait of the oldest text of a micro-batch
+    inference_artifact: Optional[str] = None  # export directory (see export_inference) replacing the eager Pillar A / C modules
+    quantize: Optional[str] = None  # "int8": dynamic int8 Linear layers in Pillars A / C (CPU only), see NumTriadSystemV4.quantize
+    quantize_held_out: Optional[List[str]] = None  # texts of the int8 vs fp32 triad drift report computed at load time
 
 
 # ============================================================================
 # MAIN SYSTEM: NumTriadSystemV4
 # ============================================================================
 
+# Modalities accepted by NumTriadSystemV4.add_documents (item key, encode_sample argument)
+BULK_MODALITIES = (("text", "texts"), ("code", "codes"), ("image", "images"), ("audio_feats", "audio_feats"))
+
+
+def _batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Consecutive lists of `size` items (the last one may be shorter)"""
+    it = iter(items)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
 class NumTriadSystemV4:
     """
     Unified facade for 4 pillars:
@@ -307,18 +1222,38 @@ class NumTriadSystemV4:
       - embedder  : NumTriadMultimodalV4 (Pillar A)
       - vte       : VisionTransformationEngine (Pillar B)
       - deeptriad : DeepTriadTransformer (Pillar C)
-      - rag       : NumTriadRAGIndexV4 (Pillar D)
+      - rag       : NumTriadRAGIndexV4 (Pillar D), or ShardedRAGIndexV4
+                    over cfg.rag_shards worker processes; recovered from
+                    (and logged to) cfg.rag_wal_dir when set (in-process
+                    index only)
+      - batcher   : MicroBatcher serving encode_text() when
+                    cfg.encode_max_batch > 0
+
+    With cfg.inference_artifact set, embedder / deeptriad are the exported
+    graphs of that directory (TorchScript or ONNX, CPU) instead of the
+    eager modules. With cfg.quantize="int8", the eager ones run with
+    dynamic int8 Linear layers (see quantize()).
     
     Main methods:
       - encode_sample(...)      -> multimodal embedding + triad
-      - add_document(...)       -> triad-aware indexing
+      - encode_text(...)        -> one text, micro-batched with concurrent callers
+      - add_document(...)       -> triad-aware indexing (upsert by doc_id)
+      - add_documents(...)      -> bulk indexing in encoder batches
+      - delete_document(...)    -> tombstone delete
       - query_documents(...)    -> triad-aware search
       - add_image_to_graph(...) -> visual integration
       - visual_path(...)        -> visual transformation path
       - triad_sequence_analysis(...) -> sequence-level triad analysis
+      - export_inference(...)   -> export Pillar A / C for inference
+      - quantize(...)           -> int8 Pillar A / C + triad drift report vs fp32
     """
 
     def __init__(self, cfg: NumTriadSystemConfig):
+        if cfg.rag_shards > 0 and cfg.rag_wal_dir:
+            raise ValueError(
+                "rag_wal_dir is not supported with rag_shards > 0: the sharded index has no "
+                "write-ahead log (use rag_shards=0 for a durable index)"
+            )
         self.cfg = cfg
         self.device = torch.device(cfg.device) if TORCH_AVAILABLE else None
 
@@ -352,10 +1287,49 @@ class NumTriadSystemV4:
         else:
             logger.warning("⚠️ Pillar C (DeepTriadTransformer) not available")
 
-        # Pillar D: RAG Index
-        self.rag_index = NumTriadRAGIndexV4()
+        # Exported inference graphs replace the eager modules
+        if cfg.inference_artifact:
+            from numtriad.core.export import load_inference
+            embedder, deeptriad = load_inference(cfg.inference_artifact)
+            if embedder is not None:
+                self.embedder = embedder
+            if deeptriad is not None:
+                self.deeptriad = deeptriad
+            logger.info(f"✅ Exported inference graphs loaded from {cfg.inference_artifact}")
+
+        # Dynamic int8 quantization of the eager modules
+        self.quantization_report: Optional[Dict[str, Any]] = None
+        if cfg.quantize:
+            self.quantize(cfg.quantize, held_out_texts=cfg.quantize_held_out)
+
+        # Pillar D: RAG Index (in-process, or sharded over worker processes)
+        if cfg.rag_shards > 0:
+            from numtriad.core.sharded_rag import ShardedRAGIndexV4
+            self.rag_index = ShardedRAGIndexV4(n_shards=cfg.rag_shards, hnsw=cfg.rag_hnsw)
+        else:
+            if cfg.rag_wal_dir:
+                self.rag_index = NumTriadRAGIndexV4.recover(cfg.rag_wal_dir)
+            else:
+                self.rag_index = NumTriadRAGIndexV4()
+            if cfg.rag_hnsw is not None and self.rag_index.ann is None:
+                self.rag_index.enable_hnsw(
+                    M=cfg.rag_hnsw.M,
+                    ef_construction=cfg.rag_hnsw.ef_construction,
+                    ef_search=cfg.rag_hnsw.ef_search,
+                    seed=cfg.rag_hnsw.seed,
+                )
         logger.info("✅ Pillar D (NumTriadRAGIndexV4) initialized")
 
+        # Micro-batching of concurrent single-text encodes
+        self.batcher: Optional[MicroBatcher] = None
+        if cfg.encode_max_batch > 0 and self.embedder is not None:
+            self.batcher = MicroBatcher(max_batch=cfg.encode_max_batch, max_wait_ms=cfg.encode_max_wait_ms)
+            self.batcher.register("text", lambda texts: self.encode_sample(texts=texts))
+            logger.info(
+                f"✅ Encode micro-batching enabled (max_batch={cfg.encode_max_batch}, "
+                f"max_wait_ms={cfg.encode_max_wait_ms})"
+            )
+
     # =====================================================================
     # PILLAR A: Multimodal Encoding
     # =====================================================================
@@ -390,6 +1364,20 @@ class NumTriadSystemV4:
         triad_np = triad_probs.cpu().numpy().astype("float32")
         return emb_np, triad_np
 
+    def encode_text(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Encode a single text. With cfg.encode_max_batch > 0, concurrent
+        callers share one encode_sample forward pass (see MicroBatcher).
+
+        Returns:
+          - embedding_np : (D_total,)
+          - triad_np     : (3,)
+        """
+        if self.batcher is not None:
+            return self.batcher.run("text", text)
+        emb_np, triad_np = self.encode_sample(texts=[text])
+        return emb_np[0], triad_np[0]
+
     # =====================================================================
     # PILLAR D: RAG Indexing & Querying
     # =====================================================================
@@ -426,11 +1414,96 @@ class NumTriadSystemV4:
         )
         self.rag_index.add_document(doc)
 
+    def add_documents(
+        self,
+        documents: Iterable[Union[Dict[str, Any], Tuple]],
+        batch_size: int = 256,
+    ) -> Dict[str, float]:
+        """
+        Bulk indexing: documents are consumed lazily (any iterable or
+        generator), encoded `batch_size` at a time in one encode_sample
+        forward pass, and appended to the RAG index in bulk.
+
+        Each item is either a tuple (doc_id, text[, metadata]) or a dict
+        with "doc_id", "metadata" and any of "text" (str), "code" (str),
+        "image" ((3, H, W) tensor), "audio_feats" (tensor). Items of a
+        batch with different modalities are encoded in separate groups.
+
+        Returns:
+            {"documents", "batches", "seconds", "docs_per_sec"}
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be >= 1, got {batch_size}")
+
+        start = time.perf_counter()
+        n_docs = n_batches = 0
+        for batch in _batched(documents, batch_size):
+            items = [self._bulk_item(item) for item in batch]
+
+            # one forward pass per modality signature, keeping input order
+            groups: Dict[Tuple[str, ...], List[int]] = {}
+            for i, item in enumerate(items):
+                signature = tuple(key for key, _ in BULK_MODALITIES if item.get(key) is not None)
+                if not signature:
+                    raise ValueError(f"Document {item['doc_id']!r} has no content to encode")
+                groups.setdefault(signature, []).append(i)
+
+            docs: List[Optional[IndexedDoc]] = [None] * len(items)
+            for signature, positions in groups.items():
+                inputs = {}
+                for key, arg in BULK_MODALITIES:
+                    if key not in signature:
+                        continue
+                    values = [items[i][key] for i in positions]
+                    inputs[arg] = torch.stack(values) if key in ("image", "audio_feats") else values
+                emb_np, triad_np = self.encode_sample(**inputs)
+                for j, i in enumerate(positions):
+                    docs[i] = IndexedDoc(
+                        doc_id=items[i]["doc_id"],
+                        embedding=emb_np[j],
+                        triad=triad_np[j],
+                        metadata=items[i].get("metadata") or {},
+                    )
+
+            self.rag_index.add_documents(docs)
+            n_docs += len(docs)
+            n_batches += 1
+            elapsed = time.perf_counter() - start
+            logger.debug(f"Indexed {n_docs} documents ({n_docs / max(elapsed, 1e-9):.0f} docs/sec)")
+
+        elapsed = time.perf_counter() - start
+        stats = {
+            "documents": n_docs,
+            "batches": n_batches,
+            "seconds": elapsed,
+            "docs_per_sec": n_docs / elapsed if elapsed > 0 else 0.0,
+        }
+        logger.info(
+            f"Bulk indexed {n_docs} documents in {elapsed:.2f}s "
+            f"({stats['docs_per_sec']:.0f} docs/sec, batch_size={batch_size})"
+        )
+        return stats
+
+    @staticmethod
+    def _bulk_item(item: Union[Dict[str, Any], Tuple]) -> Dict[str, Any]:
+        """Normalize an add_documents item to a dict"""
+        if isinstance(item, dict):
+            if "doc_id" not in item:
+                raise ValueError("add_documents items need a 'doc_id'")
+            return item
+        doc_id, text, *rest = item
+        return {"doc_id": doc_id, "text": text, "metadata": rest[0] if rest else {}}
+
+    def delete_document(self, doc_id: str) -> bool:
+        """Delete an indexed document (see NumTriadRAGIndexV4.delete)"""
+        return self.rag_index.delete(doc_id)
+
     def query_documents(
         self,
         query_text: str,
         mode: TriadMode = "auto",
         k: int = 5,
+        filters: Optional[Dict[str, Any]] = None,
     ) -> List[Tuple[IndexedDoc, float]]:
         """
         Simple text query with triad-aware RAG.
@@ -438,15 +1511,15 @@ class NumTriadSystemV4:
         - Encodes query text
         - Uses query triad if mode="auto"
         - Otherwise applies specified triad mode
+        - Restricts to documents matching `filters` (metadata pushdown)
         """
-        emb_np, triad_np = self.encode_sample(texts=[query_text])
-        e = emb_np[0]
-        t = triad_np[0]
+        e, t = self.encode_text(query_text)
         return self.rag_index.query(
             query_embedding=e,
             query_triad=t,
             k=k,
             mode=mode,
+            filters=filters,
         )
 
     # =====================================================================
@@ -538,6 +1611,101 @@ class NumTriadSystemV4:
 
         return probs_global, probs_steps
 
+    # =====================================================================
+    # Inference Export / Quantization
+    # =====================================================================
+
+    def export_inference(
+        self,
+        directory: Union[str, Path],
+        format: str = "auto",
+        **kwargs: Any,
+    ) -> Dict[str, Any]:
+        """
+        Export the eager Pillar A / C modules to `directory`; a system
+        started with cfg.inference_artifact=directory serves them from there.
+        kwargs go to numtriad.core.export.export_inference (signatures, image_size).
+        """
+        from numtriad.core.export import export_inference
+
+        embedder = self.embedder if isinstance(self.embedder, nn.Module) else None
+        deeptriad = self.deeptriad if isinstance(self.deeptriad, nn.Module) else None
+        if embedder is None and deeptriad is None:
+            raise RuntimeError("No eager Pillar A / C module to export")
+        return export_inference(directory, embedder=embedder, deeptriad=deeptriad, format=format, **kwargs)
+
+    def quantize(
+        self,
+        mode: str = "int8",
+        held_out_texts: Optional[List[str]] = None,
+        held_out_sequences: Optional[List[np.ndarray]] = None,
+        batch_size: int = 32,
+    ) -> Dict[str, Any]:
+        """
+        Replace the eager Pillar A / C modules by dynamic int8 copies.
+
+        Args:
+            mode: "int8"
+            held_out_texts: Texts on which the triad probabilities of the
+                int8 embedder are compared to fp32
+            held_out_sequences: (L, dim_in) sequences, same for DeepTriad
+            batch_size: Texts per embedder batch of the comparison
+
+        Returns:
+            {"mode", "embedder": {...}, "deeptriad": {...}}: per module,
+            the number of quantized Linear layers and, given a held-out
+            set, the triad drift (triad_drift) and fp32 / int8 timings
+        """
+        from numtriad.utils.quantization import compare_quantized, count_quantized_linears, quantize_model
+
+        if not isinstance(self.embedder, nn.Module) and not isinstance(self.deeptriad, nn.Module):
+            raise RuntimeError("No eager Pillar A / C module to quantize")
+
+        report: Dict[str, Any] = {"mode": mode}
+        if isinstance(self.embedder, nn.Module):
+            fp32_embedder = self.embedder.eval()
+            int8_embedder = quantize_model(fp32_embedder, mode)
+            entry: Dict[str, Any] = {"quantized_linears": count_quantized_linears(int8_embedder)}
+            if held_out_texts:
+                entry.update(compare_quantized(
+                    lambda texts: fp32_embedder(texts=texts)[1].numpy(),
+                    lambda texts: int8_embedder(texts=texts)[1].numpy(),
+                    _batched(held_out_texts, batch_size),
+                ))
+            report["embedder"] = entry
+            self.embedder = int8_embedder
+
+        if isinstance(self.deeptriad, nn.Module):
+            fp32_deeptriad = self.deeptriad.eval()
+            int8_deeptriad = quantize_model(fp32_deeptriad, mode)
+            entry = {"quantized_linears": count_quantized_linears(int8_deeptriad)}
+            if held_out_sequences:
+                def global_probs(model: nn.Module) -> Any:
+                    return lambda seq: F.softmax(
+                        model(torch.as_tensor(seq, dtype=torch.float32).unsqueeze(0))[0], dim=-1
+                    ).numpy()
+
+                entry.update(compare_quantized(
+                    global_probs(fp32_deeptriad),
+                    global_probs(int8_deeptriad),
+                    held_out_sequences,
+                ))
+            report["deeptriad"] = entry
+            self.deeptriad = int8_deeptriad
+
+        self.quantization_report = report
+        for name in ("embedder", "deeptriad"):
+            entry = report.get(name)
+            if entry and "mean_l1" in entry:
+                logger.info(
+                    f"✅ {name} quantized ({mode}): triad drift mean L1 {entry['mean_l1']:.4f}, "
+                    f"max L1 {entry['max_l1']:.4f}, argmax agreement {entry['argmax_agreement']:.3f}, "
+                    f"speedup x{entry['speedup']:.2f} on {entry['n']} held-out samples"
+                )
+            elif entry:
+                logger.info(f"✅ {name} quantized ({mode}), no held-out set for the drift report")
+        return report
+
     # =====================================================================
     # System Status
     # =====================================================================
@@ -549,8 +1717,11 @@ class NumTriadSystemV4:
             "pillar_b_vte": VTE_AVAILABLE and self.vte is not None,
             "pillar_c_deeptriad": TORCH_AVAILABLE and self.deeptriad is not None,
             "pillar_d_rag": True,
-            "rag_documents": len(self.rag_index.docs),
+            "rag_documents": len(self.rag_index),
             "device": str(self.device) if self.device else "cpu",
+            "encode_batching": self.batcher.metrics() if self.batcher else None,
+            "inference_artifact": self.cfg.inference_artifact,
+            "quantization": self.quantization_report,
         }
 
 
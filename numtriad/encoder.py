@@ -15,6 +15,8 @@ import logging
 from typing import List, Tuple, Optional
 import numpy as np
 
+from .utils.feature_hashing import stable_gaussians
+
 logger = logging.getLogger(__name__)
 
 
@@ -181,24 +183,18 @@ class NumTriadEncoder:
         """
         n = len(texts)
         
-        # Generate mock embeddings (deterministic based on text)
-        embeddings = np.zeros((n, self.embedding_dim), dtype=np.float32)
+        # Generate mock embeddings (deterministic based on text, stable across processes)
+        embeddings = np.ascontiguousarray(stable_gaussians(texts, self.embedding_dim))
         triads = np.zeros((n, 3), dtype=np.float32)
         
         for i, text in enumerate(texts):
-            # Deterministic mock embedding based on text hash
-            seed = hash(text) % (2**31)
-            np.random.seed(seed)
-            embeddings[i] = np.random.randn(self.embedding_dim).astype(np.float32)
-            
-            # Normalize embedding
-            norm = np.linalg.norm(embeddings[i])
-            if norm > 0:
-                embeddings[i] /= norm
-            
             # Mock triads: analyze text to estimate triads
             triads[i] = self._analyze_text_for_triads(text)
         
+        # Normalize embeddings
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        np.divide(embeddings, norms, out=embeddings, where=norms > 0)
+        
         return embeddings, triads
     
     def _analyze_text_for_triads(self, text: str) -> np.ndarray:
@@ -1,10 +1,28 @@
 # numtriad/encoders/__init__.py
 
 from .base_text_encoder import BaseTextEncoder
-from .numtriad_text_v2 import NumTriadTextEncoderV2, NumTriadTextEmbeddingV2
+from .embedding_cache import EmbeddingCache
 
 __all__ = [
     "BaseTextEncoder",
-    "NumTriadTextEncoderV2", 
+    "EmbeddingCache",
+    "NumTriadTextEncoderV2",
     "NumTriadTextEmbeddingV2"
 ]
+
+# Import paresseux : numtriad_text_v2 tire numtriad.models (torch + modèles),
+# inutile pour BaseTextEncoder / EmbeddingCache.
+_LAZY = {
+    "NumTriadTextEncoderV2": ".numtriad_text_v2",
+    "NumTriadTextEmbeddingV2": ".numtriad_text_v2",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        from importlib import import_module
+
+        value = getattr(import_module(_LAZY[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
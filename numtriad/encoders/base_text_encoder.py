@@ -1,8 +1,11 @@
 # numtriad/encoders/base_text_encoder.py
 
-from typing import List
+from pathlib import Path
+from typing import List, Optional, Union
 import numpy as np
 
+from .embedding_cache import EmbeddingCache
+
 try:
     from sentence_transformers import SentenceTransformer
 except ImportError:
@@ -13,9 +16,18 @@ class BaseTextEncoder:
     """
     Wrapper autour SentenceTransformer (ou fallback) pour produire
     un embedding v_text.
+
+    Les embeddings sont mis en cache par contenu (voir embedding_cache) :
+    un batch n'encode que les textes absents du cache, puis les résultats
+    sont replacés dans l'ordre d'origine.
     """
 
-    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
+    def __init__(
+        self,
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        cache_size: int = 10000,
+        cache_dir: Optional[Union[str, Path]] = None,
+    ):
         if SentenceTransformer is None:
             raise ImportError(
                 "sentence-transformers n'est pas installé. "
@@ -23,12 +35,46 @@ class BaseTextEncoder:
             )
         self.model_name = model_name
         self.model = SentenceTransformer(model_name)
+        self.cache: Optional[EmbeddingCache] = None
+        if cache_size > 0 or cache_dir is not None:
+            self.cache = EmbeddingCache(model_name, max_entries=cache_size, cache_dir=cache_dir)
+
+    @classmethod
+    def from_config(cls, config) -> "BaseTextEncoder":
+        """Encodeur configuré par NumTriadConfig (modèle + cache)"""
+        return cls(
+            config.base_text_model_name,
+            cache_size=config.embedding_cache_size,
+            cache_dir=config.embedding_cache_dir,
+        )
 
     def encode(self, texts: List[str]) -> np.ndarray:
         """
         Retourne un tableau (batch, dim).
         """
-        return self.model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
+        if self.cache is None:
+            return self.model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
+
+        keys = [self.cache.key(t) for t in texts]
+        rows = self.cache.get_many(keys)
+
+        # textes absents du cache, chacun encodé une seule fois
+        missing: dict = {}
+        for i, row in enumerate(rows):
+            if row is None:
+                missing.setdefault(keys[i], texts[i])
+        if missing:
+            encoded = np.asarray(
+                self.model.encode(list(missing.values()), convert_to_numpy=True, show_progress_bar=False),
+                dtype="float32",
+            )
+            self.cache.put_many(list(missing), encoded)
+            by_key = dict(zip(missing, encoded))
+            rows = [by_key[keys[i]] if row is None else row for i, row in enumerate(rows)]
+
+        if not rows:
+            return np.empty((0, self.dim), dtype="float32")
+        return np.stack(rows, axis=0)
 
     @property
     def dim(self) -> int:
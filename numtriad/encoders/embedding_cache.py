@@ -0,0 +1,218 @@
+# numtriad/encoders/embedding_cache.py
+"""
+Cache d'embeddings adressé par contenu
+======================================
+
+Évite de ré-encoder les mêmes chunks avec le SentenceTransformer :
+
+  - clé = blake2b(nom du modèle + texte), stable d'un processus à l'autre
+    (contrairement à hash()) et propre à chaque modèle
+  - niveau mémoire : LRU de `max_entries` lignes
+  - niveau disque (optionnel, `cache_dir`) : un dossier par modèle avec
+      rows.f32   -> lignes float32 brutes (dim fixe), en ajout seul
+      index.bin  -> enregistrements [clé 16 octets | ligne u64], en ajout seul
+      meta.json  -> {"model", "dim"}
+    Une ligne est écrite avant son enregistrement d'index : après un crash,
+    les enregistrements incomplets ou pointant hors de rows.f32 sont ignorés.
+
+Author: GLM Research Team
+Date: 2026-10-18
+"""
+
+import hashlib
+import json
+import os
+import struct
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+
+ROWS_FILE = "rows.f32"
+INDEX_FILE = "index.bin"
+META_FILE = "meta.json"
+
+_RECORD = struct.Struct("<16sQ")  # clé, ligne
+
+
+def content_key(model_name: str, text: str) -> bytes:
+    """Digest stable (16 octets) d'un texte pour un modèle donné"""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(model_name.encode("utf-8"))
+    h.update(b"\0")
+    h.update(text.encode("utf-8", "surrogatepass"))
+    return h.digest()
+
+
+class EmbeddingCache:
+    """
+    Cache à deux niveaux (LRU mémoire + fichier en ajout seul) des
+    embeddings d'un modèle.
+
+    Args:
+        model_name: Nom du modèle (fait partie de la clé et du dossier disque)
+        max_entries: Capacité du LRU mémoire (0 = pas de niveau mémoire)
+        cache_dir: Dossier racine du niveau disque (None = mémoire seule)
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        max_entries: int = 10000,
+        cache_dir: Optional[Union[str, Path]] = None,
+    ):
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.dim: Optional[int] = None
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self.path: Optional[Path] = None
+        self._offsets: Dict[bytes, int] = {}  # clé -> ligne de rows.f32
+        self._n_rows = 0
+        self._rows_file = None
+        self._index_file = None
+        if cache_dir is not None:
+            slug = "".join(c if c.isalnum() else "_" for c in model_name)[-48:]
+            digest = hashlib.blake2b(model_name.encode("utf-8"), digest_size=6).hexdigest()
+            self.path = Path(cache_dir) / f"{slug}-{digest}"
+            self._open_disk()
+
+    def __len__(self) -> int:
+        """Nombre d'embeddings distincts en cache (disque, sinon mémoire)"""
+        return len(self._offsets) if self.path is not None else len(self._memory)
+
+    def key(self, text: str) -> bytes:
+        return content_key(self.model_name, text)
+
+    # -----------------------
+    # niveau disque
+    # -----------------------
+
+    def _open_disk(self) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+        meta_path = self.path / META_FILE
+        if meta_path.exists():
+            with open(meta_path, encoding="utf-8") as f:
+                self.dim = json.load(f).get("dim")
+
+        rows_path, index_path = self.path / ROWS_FILE, self.path / INDEX_FILE
+        if self.dim:
+            # lignes complètes seulement (une écriture interrompue est tronquée)
+            self._n_rows = (rows_path.stat().st_size if rows_path.exists() else 0) // (4 * self.dim)
+        if index_path.exists():
+            data = index_path.read_bytes()
+            valid = len(data) - len(data) % _RECORD.size
+            for key, row in _RECORD.iter_unpack(data[:valid]):
+                if row < self._n_rows:
+                    self._offsets[key] = row
+            if valid < len(data):
+                with open(index_path, "r+b") as f:
+                    f.truncate(valid)
+        if self.dim and rows_path.exists():
+            with open(rows_path, "r+b") as f:
+                f.truncate(self._n_rows * 4 * self.dim)
+
+        self._rows_file = open(rows_path, "a+b")
+        self._index_file = open(index_path, "ab")
+
+    def _read_disk(self, rows: List[int]) -> np.ndarray:
+        """Lit des lignes de rows.f32 (verrou tenu)"""
+        out = np.empty((len(rows), self.dim), dtype="float32")
+        row_bytes = 4 * self.dim
+        fd = self._rows_file.fileno()
+        for i, row in enumerate(rows):
+            if hasattr(os, "pread"):
+                buf = os.pread(fd, row_bytes, row * row_bytes)
+            else:
+                self._rows_file.seek(row * row_bytes)
+                buf = self._rows_file.read(row_bytes)
+            out[i] = np.frombuffer(buf, dtype="float32")
+        return out
+
+    def _write_disk(self, keys: List[bytes], rows: np.ndarray) -> None:
+        """Ajoute des lignes puis leurs enregistrements d'index (verrou tenu)"""
+        if not (self.path / META_FILE).exists():
+            with open(self.path / META_FILE, "w", encoding="utf-8") as f:
+                json.dump({"model": self.model_name, "dim": int(rows.shape[1])}, f)
+        start = self._n_rows
+        self._rows_file.write(np.ascontiguousarray(rows, dtype="float32").tobytes())
+        self._rows_file.flush()
+        self._index_file.write(b"".join(_RECORD.pack(k, start + i) for i, k in enumerate(keys)))
+        self._index_file.flush()
+        for i, k in enumerate(keys):
+            self._offsets[k] = start + i
+        self._n_rows += len(keys)
+
+    # -----------------------
+    # API
+    # -----------------------
+
+    def _remember(self, key: bytes, row: np.ndarray) -> None:
+        if self.max_entries <= 0:
+            return
+        self._memory[key] = row
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys: List[bytes]) -> List[Optional[np.ndarray]]:
+        """Lignes (dim,) en cache pour chaque clé, None si absente"""
+        found: List[Optional[np.ndarray]] = [None] * len(keys)
+        with self._lock:
+            on_disk = []
+            for i, key in enumerate(keys):
+                row = self._memory.get(key)
+                if row is not None:
+                    self._memory.move_to_end(key)
+                    found[i] = row
+                    self.memory_hits += 1
+                elif key in self._offsets:
+                    on_disk.append(i)
+                else:
+                    self.misses += 1
+            if on_disk:
+                rows = self._read_disk([self._offsets[keys[i]] for i in on_disk])
+                for i, row in zip(on_disk, rows):
+                    found[i] = row
+                    self._remember(keys[i], row)
+                self.disk_hits += len(on_disk)
+        return found
+
+    def put_many(self, keys: List[bytes], rows: np.ndarray) -> None:
+        """Met en cache des lignes (N,dim) calculées"""
+        rows = np.asarray(rows, dtype="float32")
+        with self._lock:
+            if self.dim is None:
+                self.dim = int(rows.shape[1])
+            for key, row in zip(keys, rows):
+                self._remember(key, row.copy())
+            if self.path is not None:
+                new = list({k: i for i, k in enumerate(keys) if k not in self._offsets}.values())
+                if new:
+                    self._write_disk([keys[i] for i in new], rows[new])
+
+    def stats(self) -> Dict[str, object]:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_entries": len(self._memory),
+            "disk_entries": len(self._offsets),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            for f in (self._rows_file, self._index_file):
+                if f is not None:
+                    f.close()
+            self._rows_file = self._index_file = None
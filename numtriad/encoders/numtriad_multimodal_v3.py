@@ -42,7 +42,7 @@ class NumTriadMultimodalEncoderV3:
         self.device = torch.device(self.config.device)
 
         # Encoders
-        self.text_encoder = BaseTextEncoder(self.config.base_text_model_name)
+        self.text_encoder = BaseTextEncoder.from_config(self.config)
         self.vision_encoder = VisionEncoder(device=self.config.device)
 
         text_dim = self.text_encoder.dim
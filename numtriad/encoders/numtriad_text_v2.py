@@ -1,7 +1,7 @@
 # numtriad/encoders/numtriad_text_v2.py
 
 from dataclasses import dataclass
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 
 import numpy as np
 import torch
@@ -10,6 +10,7 @@ from .base_text_encoder import BaseTextEncoder
 from ..models.triad_scorer_mlp_v2 import TriadScorerMLP_V2
 from ..triad_types import Triad
 from ..config import NumTriadConfig
+from ..utils.quantization import compare_quantized, count_quantized_linears, quantize_model
 
 
 def basic_linguistic_features(text: str) -> np.ndarray:
@@ -59,11 +60,13 @@ class NumTriadTextEncoderV2:
       texte -> v_text -> features (optionnel) -> triad -> concat final.
 
     E(x) = [ v_text | ∆̂ | ∞̂ | Θ̂ ]
+
+    Avec config.quantize="int8", le TriadScorer tourne en int8 (voir quantize()).
     """
 
     def __init__(self, config: Optional[NumTriadConfig] = None):
         self.config = config or NumTriadConfig()
-        self.text_encoder = BaseTextEncoder(self.config.base_text_model_name)
+        self.text_encoder = BaseTextEncoder.from_config(self.config)
 
         feat_dim = self.config.linguistic_feature_dim if self.config.use_linguistic_features else 0
 
@@ -77,6 +80,10 @@ class NumTriadTextEncoderV2:
         self.device = torch.device(self.config.device)
         self.triad_scorer.to(self.device)
 
+        self.quantization_report: Optional[Dict[str, Any]] = None
+        if self.config.quantize:
+            self.quantize(self.config.quantize, held_out_texts=self.config.quantize_held_out)
+
     def _compute_features(self, texts: List[str]) -> Optional[np.ndarray]:
         if not self.config.use_linguistic_features:
             return None
@@ -86,6 +93,45 @@ class NumTriadTextEncoderV2:
         # Optionnel : normalisation
         return feats_arr
 
+    def _scorer_inputs(self, texts: List[str]) -> Tuple[torch.Tensor, Optional[torch.Tensor]]:
+        """(v_text, features) en tenseurs, entrées du TriadScorer"""
+        v_text = torch.tensor(self.text_encoder.encode(texts), dtype=torch.float32, device=self.device)
+        feats_np = self._compute_features(texts)
+        feats = torch.tensor(feats_np, dtype=torch.float32, device=self.device) if feats_np is not None else None
+        return v_text, feats
+
+    def quantize(
+        self,
+        mode: str = "int8",
+        held_out_texts: Optional[List[str]] = None,
+        batch_size: int = 32,
+    ) -> Dict[str, Any]:
+        """
+        Remplace le TriadScorer par une copie aux couches Linear quantifiées
+        dynamiquement en int8 (CPU uniquement).
+
+        Retourne {"mode", "quantized_linears"} et, avec held_out_texts, la
+        dérive des triads int8 vs fp32 (triad_drift) et les temps des deux
+        scorers sur ces textes (voir compare_quantized).
+        """
+        fp32_scorer = self.triad_scorer.eval()
+        int8_scorer = quantize_model(fp32_scorer, mode)
+        report: Dict[str, Any] = {"mode": mode, "quantized_linears": count_quantized_linears(int8_scorer)}
+        if held_out_texts:
+            # v_text calculés une fois : seuls les scorers sont comparés
+            batches = [
+                self._scorer_inputs(held_out_texts[i : i + batch_size])
+                for i in range(0, len(held_out_texts), batch_size)
+            ]
+
+            def triad_probs(scorer):
+                return lambda inputs: np.stack([t.as_array() for t in scorer.predict_triad(*inputs)])
+
+            report.update(compare_quantized(triad_probs(fp32_scorer), triad_probs(int8_scorer), batches))
+        self.triad_scorer = int8_scorer
+        self.quantization_report = report
+        return report
+
     @torch.no_grad()
     def encode(
         self,
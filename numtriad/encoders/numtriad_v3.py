@@ -40,6 +40,7 @@ class NumTriadV3Config:
     max_len: int = 16
     triad_target_mode: TriadTargetMode = "auto"
     triad_alpha: float = 1.0     # poids de la triade dans l'embedding concaténé
+    batch_size: int = 64         # textes par forward DeepTriad (tenseur paddé (B,L,dim))
 
 
 class NumTriadEmbeddingV3:
@@ -64,7 +65,7 @@ class NumTriadEmbeddingV3:
         self.device = torch.device(device or config.device)
 
         # encodeur texte gelé
-        self.base_encoder = BaseTextEncoder(config.base_text_model_name)
+        self.base_encoder = BaseTextEncoder.from_config(config)
 
         # chargement DeepTriad
         try:
@@ -105,31 +106,65 @@ class NumTriadEmbeddingV3:
         - v_seq : embedding moyen des chunks (np.array dim)
         - triad : triade globale prédite par DeepTriad
         """
-        chunks = self._chunk_text(text)
-        embs = self.base_encoder.encode(chunks)  # (L,dim)
-        L, D = embs.shape
-
+        embs, triad = self._encode_chunks(text)
         # embedding global = moyenne des chunks
-        v_seq = embs.mean(axis=0)
+        return embs.mean(axis=0), triad
 
-        # prédire triade avec DeepTriad si disponible
-        if self.deeptriad_available and self.deeptriad is not None:
-            # préparation batch (1,L,dim)
-            x = torch.tensor(embs, dtype=torch.float32, device=self.device).unsqueeze(0)
-            mask = torch.zeros(1, L, dtype=torch.bool, device=self.device)
+    def _encode_chunks(self, text: str) -> Tuple[np.ndarray, Triad]:
+        """
+        Comme _encode_sequence, mais garde les embeddings de chaque chunk :
+        - embs  : (L,dim) un embedding par chunk
+        - triad : triade globale prédite par DeepTriad
+        """
+        embs, _, triads = self._encode_batch([text])
+        return embs, triads[0]
 
-            with torch.no_grad():
-                triads = self.deeptriad.predict_triad_global(
-                    x,
-                    triad_control=None,
-                    src_key_padding_mask=mask,
-                )
-            triad = triads[0]
+    def _encode_batch(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray, List[Triad]]:
+        """
+        Encode tous les chunks de tous les textes en un seul appel au
+        BaseTextEncoder, puis prédit les triades par batchs paddés
+        (un forward DeepTriad pour `batch_size` textes). Retourne :
+        - embs    : (C,dim) chunks de tous les textes, contigus
+        - offsets : (N+1,) chunks du texte i = embs[offsets[i]:offsets[i+1]]
+        - triads  : List[Triad] une triade globale par texte
+        """
+        chunk_lists = [self._chunk_text(t) for t in texts]
+        counts = np.array([len(c) for c in chunk_lists], dtype=np.int64)
+        offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(counts)
+
+        flat = [c for chunks in chunk_lists for c in chunks]
+        if flat:
+            embs = np.asarray(self.base_encoder.encode(flat), dtype="float32")  # (C,dim)
         else:
+            embs = np.empty((0, self.input_dim), dtype="float32")
+
+        if not (self.deeptriad_available and self.deeptriad is not None):
             # fallback : triade équilibrée
-            triad = Triad.normalize([1/3, 1/3, 1/3])
+            return embs, offsets, [Triad.normalize([1/3, 1/3, 1/3]) for _ in texts]
+
+        triads: List[Triad] = []
+        D = embs.shape[1]
+        batch_size = max(1, self.v3_cfg.batch_size)
+        for b0 in range(0, len(texts), batch_size):
+            b1 = min(b0 + batch_size, len(texts))
+            lens = counts[b0:b1]
+            B, L = b1 - b0, int(lens.max())
+
+            # (B,L,dim) paddé à zéro ; mask=True sur les positions de padding
+            rows = np.repeat(np.arange(B), lens)
+            cols = np.arange(int(lens.sum())) - np.repeat(offsets[b0:b1] - offsets[b0], lens)
+            x = np.zeros((B, L, D), dtype="float32")
+            x[rows, cols] = embs[offsets[b0]:offsets[b1]]
+            mask = np.arange(L)[None, :] >= lens[:, None]
 
-        return v_seq, triad
+            with torch.no_grad():
+                triads.extend(self.deeptriad.predict_triad_global(
+                    torch.from_numpy(x).to(self.device),
+                    triad_control=None,
+                    src_key_padding_mask=torch.from_numpy(mask).to(self.device),
+                ))
+        return embs, offsets, triads
 
     def _apply_triad_target(self, triad: Triad, mode: TriadTargetMode) -> Triad:
         """
@@ -159,6 +194,20 @@ class NumTriadEmbeddingV3:
 
         return Triad.normalize(arr)
 
+    @staticmethod
+    def _mean_chunks(embs: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+        """(N,dim) moyenne des chunks de chaque texte"""
+        if offsets.shape[0] <= 1:
+            return np.empty((0, embs.shape[1]), dtype="float32")
+        sums = np.add.reduceat(embs, offsets[:-1], axis=0)
+        return sums / np.diff(offsets)[:, None]
+
+    @staticmethod
+    def _triad_matrix(triads: List[Triad]) -> np.ndarray:
+        if not triads:
+            return np.empty((0, 3), dtype="float32")
+        return np.stack([tr.as_array() for tr in triads], axis=0)
+
     # -----------------------
     # API publique
     # -----------------------
@@ -179,17 +228,11 @@ class NumTriadEmbeddingV3:
           - enriched : (N,dim+3)
           - triads   : List[Triad]
         """
-        base_vecs = []
-        triads = []
-
-        for t in texts:
-            v_seq, triad = self._encode_sequence(t)
-            triad_adj = self._apply_triad_target(triad, triad_mode)
-            base_vecs.append(v_seq)
-            triads.append(triad_adj)
+        embs, offsets, raw_triads = self._encode_batch(texts)
+        triads = [self._apply_triad_target(tr, triad_mode) for tr in raw_triads]
 
-        base_arr = np.stack(base_vecs, axis=0)                 # (N,dim)
-        triad_arr = np.stack([tr.as_array() for tr in triads], axis=0)  # (N,3)
+        base_arr = self._mean_chunks(embs, offsets)            # (N,dim)
+        triad_arr = self._triad_matrix(triads)                 # (N,3)
 
         # embedding enrichi
         enriched = np.concatenate(
@@ -200,3 +243,27 @@ class NumTriadEmbeddingV3:
         if return_raw:
             return base_arr, enriched, triads
         return enriched, triads
+
+    def encode_multi(
+        self,
+        texts: List[str],
+        triad_mode: TriadTargetMode = "auto",
+    ):
+        """
+        Comme encode(), en gardant aussi les embeddings de chaque chunk
+        (index multi-vecteurs / late interaction). Retourne :
+          - enriched : np.ndarray (N, dim+3), identique à encode()
+          - triads   : List[Triad]
+          - chunks   : np.ndarray (C, dim), chunks de tous les textes, contigus
+          - offsets  : np.ndarray (N+1,), chunks du texte i = chunks[offsets[i]:offsets[i+1]]
+        """
+        embs, offsets, raw_triads = self._encode_batch(texts)
+        triads = [self._apply_triad_target(tr, triad_mode) for tr in raw_triads]
+
+        base_arr = self._mean_chunks(embs, offsets)            # (N,dim)
+        triad_arr = self._triad_matrix(triads)                 # (N,3)
+        enriched = np.concatenate(
+            [base_arr, self.v3_cfg.triad_alpha * triad_arr],
+            axis=1,
+        )  # (N, dim+3)
+        return enriched, triads, embs, offsets
@@ -0,0 +1,68 @@
+# numtriad/index/__init__.py
+"""
+NumTriad Index Building Blocks
+==============================
+
+Pure NumPy storage and search primitives shared by the RAG indexes
+(NumTriadRAGIndexV4, DeepTriadRAGIndex, TriadRAGEngine).
+"""
+
+from .store import VectorStore, top_k_indices, top_k_indices_2d
+from .segment import Segment, write_segment, open_segment, read_manifest, read_ids, SEGMENT_VERSION
+from .ivf import IVFIndex, spherical_kmeans
+from .hnsw import HNSWIndex, HNSWConfig
+from .simplex import TriadBuckets
+from .metadata import MetadataIndex
+from .lexical import BM25Index, tokenize
+from .multivector import MultiVectorStore
+from .dedup import MinHashLSH, shingles
+from .quantization import ScalarQuantizer, ProductQuantizer, CompressedIndex, memory_report
+from .compaction import Tombstones, ReadWriteLock, remap_rows, save_tombstones, load_tombstones
+from .wal import WALRecord, WriteAheadLog, read_checkpoint, write_checkpoint, replay
+from .streaming import BlockReader, RunningTopK, stream_top_k, read_rows
+from .ann import ann_kind, rebuild_ann, save_ann, load_ann
+
+__all__ = [
+    "VectorStore",
+    "top_k_indices",
+    "top_k_indices_2d",
+    "Segment",
+    "write_segment",
+    "open_segment",
+    "read_manifest",
+    "read_ids",
+    "SEGMENT_VERSION",
+    "IVFIndex",
+    "spherical_kmeans",
+    "HNSWIndex",
+    "HNSWConfig",
+    "TriadBuckets",
+    "MetadataIndex",
+    "BM25Index",
+    "tokenize",
+    "MultiVectorStore",
+    "MinHashLSH",
+    "shingles",
+    "ScalarQuantizer",
+    "ProductQuantizer",
+    "CompressedIndex",
+    "memory_report",
+    "Tombstones",
+    "ReadWriteLock",
+    "remap_rows",
+    "save_tombstones",
+    "load_tombstones",
+    "WALRecord",
+    "WriteAheadLog",
+    "read_checkpoint",
+    "write_checkpoint",
+    "replay",
+    "BlockReader",
+    "RunningTopK",
+    "stream_top_k",
+    "read_rows",
+    "ann_kind",
+    "rebuild_ann",
+    "save_ann",
+    "load_ann",
+]
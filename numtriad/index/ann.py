@@ -0,0 +1,111 @@
+"""
+ANN Registry
+============
+
+Approximate-search structures that can be attached to a RAG index.
+Every ANN index stores *row ids* of the owning VectorStore and exposes:
+
+    add(vectors, rows)               -> incremental insertion
+    candidates(query, k, **params)   -> candidate row ids for exact rescoring
+    save(path) / load(path)          -> single-file persistence
+
+The owning index applies its own triad-aware score to the candidates.
+
+Author: GLM Research Team
+Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Optional, Union
+
+import numpy as np
+
+from .hnsw import HNSWIndex
+from .ivf import IVFIndex
+from .quantization import CompressedIndex
+from .store import VectorStore
+
+ANN_FILE = "ann.npz"
+
+ANN_TYPES = {
+    "ivf": IVFIndex,
+    "hnsw": HNSWIndex,
+    "compressed": CompressedIndex,
+}
+
+
+def ann_kind(ann: Any) -> str:
+    """Registry name of an ANN instance"""
+    for kind, cls in ANN_TYPES.items():
+        if isinstance(ann, cls):
+            return kind
+    raise TypeError(f"Unknown ANN index type: {type(ann).__name__}")
+
+
+def rebuild_ann(ann: Any, store: VectorStore) -> Any:
+    """
+    Fresh ANN index of the same kind and settings over every row of
+    `store` (used after compaction). Trained parts (IVF centroids,
+    quantizer codebooks) are reused, not retrained.
+    """
+    rows = np.arange(len(store))
+    if isinstance(ann, IVFIndex):
+        new = IVFIndex(nlist=ann.nlist, nprobe=ann.nprobe, n_iter=ann.n_iter, seed=ann.seed)
+        new.centroids = ann.centroids
+        new._lists = [[] for _ in range(new.nlist)]
+        new._list_cache = [None] * new.nlist
+        new.add(store.embeddings, rows)
+    elif isinstance(ann, HNSWIndex):
+        new = HNSWIndex(
+            store,
+            M=ann.M,
+            ef_construction=ann.ef_construction,
+            ef_search=ann.ef_search,
+            seed=ann.seed,
+        )
+        new.add(None, rows)
+    elif isinstance(ann, CompressedIndex):
+        new = CompressedIndex(kind=ann.kind, rerank=ann.rerank, chunk_size=ann.chunk_size)
+        new.quantizer = ann.quantizer
+        new.add(store.embeddings, rows)
+    else:
+        raise TypeError(f"Unknown ANN index type: {type(ann).__name__}")
+    return new
+
+
+def save_ann(ann: Optional[Any], segment_path: Union[str, Path]) -> Optional[str]:
+    """
+    Save `ann` next to a segment. Removes a stale ANN file if ann is None.
+
+    Returns:
+        The registry kind written (to store in the segment manifest) or None
+    """
+    file = Path(segment_path) / ANN_FILE
+    if ann is None:
+        if file.exists():
+            file.unlink()
+        return None
+    ann.save(file)
+    return ann_kind(ann)
+
+
+def load_ann(
+    segment_path: Union[str, Path],
+    kind: Optional[str],
+    store: Optional[VectorStore] = None,
+) -> Optional[Any]:
+    """
+    Load the ANN index saved next to a segment, if any. Graph indexes that
+    read vectors from the store (HNSW) are bound to `store`.
+    """
+    file = Path(segment_path) / ANN_FILE
+    if kind is None or not file.exists():
+        return None
+    if kind not in ANN_TYPES:
+        raise ValueError(f"Unknown ANN index type in segment: {kind}")
+    ann = ANN_TYPES[kind].load(file)
+    if store is not None and hasattr(ann, "bind"):
+        ann.bind(store)
+    return ann
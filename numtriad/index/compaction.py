@@ -0,0 +1,159 @@
+"""
+NumTriad Tombstones & Compaction Helpers
+========================================
+
+Deletes in the RAG indexes are logical: the row is flagged in a
+tombstone bitmap and masked out at scoring time. Once dead rows pass a
+threshold, the owning index compacts:
+
+  1. snapshot the row count and tombstones (short write lock)
+  2. rebuild store / ANN / side indexes from the live rows in a
+     background thread (no lock: readers keep querying the old state)
+  3. replay rows appended and deletes made during the rebuild, then
+     swap the new state in (short write lock)
+
+ReadWriteLock lets any number of queries run concurrently; only the
+snapshot and the swap are exclusive. Tombstones of a saved index are
+kept in a `tombstones.npy` sidecar next to the segment.
+
+Author: GLM Research Team
+Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Union
+
+import numpy as np
+
+
+TOMBSTONES_FILE = "tombstones.npy"
+
+
+class Tombstones:
+    """Growable bitmap of deleted rows with a live count of set bits"""
+
+    def __init__(self):
+        self._dead = np.zeros((0,), dtype=bool)
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _reserve(self, n: int) -> None:
+        if n <= self._dead.shape[0]:
+            return
+        new_cap = max(64, self._dead.shape[0])
+        while new_cap < n:
+            new_cap *= 2
+        grown = np.zeros((new_cap,), dtype=bool)
+        grown[: self._dead.shape[0]] = self._dead
+        self._dead = grown
+
+    def mark(self, row: int) -> bool:
+        """Flag a row as deleted; False if it already was"""
+        self._reserve(row + 1)
+        if self._dead[row]:
+            return False
+        self._dead[row] = True
+        self.count += 1
+        return True
+
+    def mask(self, n: int) -> np.ndarray:
+        """(n,) boolean view, True for deleted rows"""
+        self._reserve(n)
+        return self._dead[:n]
+
+    def is_dead(self, row: int) -> bool:
+        return row < self._dead.shape[0] and bool(self._dead[row])
+
+
+class ReadWriteLock:
+    """
+    Shared (read) / exclusive (write) lock.
+
+    Writer-preferring: new readers wait while a writer holds or waits
+    for the lock, so a steady query load cannot starve a mutation. The
+    write side is reentrant for its owner, and the owner may also take
+    the read side.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None
+        self._writer_depth = 0
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer != me:
+                while self._writer is not None or self._writers_waiting:
+                    self._cond.wait()
+                self._readers += 1
+        try:
+            yield
+        finally:
+            if self._writer != me:
+                with self._cond:
+                    self._readers -= 1
+                    if self._readers == 0:
+                        self._cond.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._writer_depth += 1
+            else:
+                self._writers_waiting += 1
+                try:
+                    while self._writer is not None or self._readers:
+                        self._cond.wait()
+                finally:
+                    self._writers_waiting -= 1
+                self._writer = me
+                self._writer_depth = 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer_depth -= 1
+                if self._writer_depth == 0:
+                    self._writer = None
+                    self._cond.notify_all()
+
+
+def remap_rows(live_rows: np.ndarray, n: int) -> np.ndarray:
+    """old row -> new row after compaction (-1 for dropped rows), shape (n,)"""
+    remap = np.full((n,), -1, dtype=np.int64)
+    remap[live_rows] = np.arange(live_rows.shape[0])
+    return remap
+
+
+def save_tombstones(tombstones: Tombstones, n: int, segment_path: Union[str, Path]) -> None:
+    """Save deleted row ids next to a segment (removes a stale file if none)"""
+    file = Path(segment_path) / TOMBSTONES_FILE
+    rows = np.flatnonzero(tombstones.mask(n))
+    if rows.size == 0:
+        if file.exists():
+            file.unlink()
+        return
+    with open(file, "wb") as f:
+        np.save(f, rows)
+
+
+def load_tombstones(segment_path: Union[str, Path]) -> Tombstones:
+    """Load the tombstones saved next to a segment (empty if none)"""
+    tombstones = Tombstones()
+    file = Path(segment_path) / TOMBSTONES_FILE
+    if file.exists():
+        for row in np.load(file):
+            tombstones.mark(int(row))
+    return tombstones
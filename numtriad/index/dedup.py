@@ -0,0 +1,248 @@
+"""
+NumTriad Near-Duplicate Detection (MinHash + LSH)
+=================================================
+
+Finds near-identical texts before they are encoded:
+
+  - a text is reduced to its set of word shingles (w-grams of tokens)
+  - its MinHash signature holds, for `num_perm` hash functions, the
+    minimum hash over the shingles. Two signatures agree on a position
+    with probability equal to the Jaccard similarity of the shingle sets
+  - LSH banding splits a signature into `bands` bands of r rows and files
+    the text in one bucket per band. Texts sharing at least one bucket
+    are candidates, with probability 1 - (1 - J^r)^bands, an S-curve
+    around (1 / bands)^(1 / r)
+  - candidates are verified with the estimated Jaccard (signature
+    agreement) against `threshold`
+
+A lookup only touches `bands` buckets, so its cost does not grow with
+the number of indexed texts. Hashes are stable across processes (crc32 +
+fixed-seed multiply-shift), so saved signatures stay valid after restart.
+
+Author: GLM Research Team
+Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import zlib
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np
+
+from .lexical import tokenize
+
+
+SIGNATURES_FILE = "minhash_signatures.npy"
+KEYS_FILE = "minhash_keys.json"
+
+_SHIFT = np.uint64(32)
+
+
+def shingles(text: str, size: int = 3) -> Set[str]:
+    """Word w-grams of a text (the whole token list if shorter than `size`)"""
+    tokens = tokenize(text)
+    if len(tokens) <= size:
+        return {" ".join(tokens)}
+    return {" ".join(tokens[i : i + size]) for i in range(len(tokens) - size + 1)}
+
+
+class MinHashLSH:
+    """
+    MinHash signatures + banded LSH buckets, keyed by caller keys (doc ids).
+
+    Args:
+        threshold: Estimated Jaccard from which two texts are duplicates
+        num_perm: Signature length (number of hash functions)
+        bands: LSH bands (num_perm must be a multiple of bands)
+        shingle_size: Words per shingle
+        seed: Seed of the hash functions (keep it fixed for saved signatures)
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        num_perm: int = 128,
+        bands: int = 16,
+        shingle_size: int = 3,
+        seed: int = 1,
+    ):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.seed = seed
+
+        rng = np.random.default_rng(seed)
+        # multiply-shift hashing: h_i(x) = (a_i * x + b_i) >> 32 (mod 2^64), a_i odd
+        self._a = rng.integers(1, 2**63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64)
+
+        self._signatures: Dict[Hashable, np.ndarray] = {}
+        self._buckets: List[Dict[bytes, Set[Hashable]]] = [defaultdict(set) for _ in range(bands)]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._signatures
+
+    def empty_like(self) -> "MinHashLSH":
+        """Empty LSH with the same settings (signatures are compatible)"""
+        return MinHashLSH(self.threshold, self.num_perm, self.bands, self.shingle_size, self.seed)
+
+    @property
+    def settings(self) -> Dict[str, Any]:
+        return {
+            "threshold": self.threshold,
+            "num_perm": self.num_perm,
+            "bands": self.bands,
+            "shingle_size": self.shingle_size,
+            "seed": self.seed,
+        }
+
+    # -----------------------------------------------------------------------
+    # Signatures
+    # -----------------------------------------------------------------------
+
+    def signature(self, text: str) -> np.ndarray:
+        """(num_perm,) uint32 MinHash signature of a text"""
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) for s in shingles(text, self.shingle_size)),
+            dtype=np.uint64,
+        )
+        with np.errstate(over="ignore"):
+            permuted = (hashes[:, None] * self._a[None, :] + self._b[None, :]) >> _SHIFT
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def signatures(self, texts: Sequence[str]) -> np.ndarray:
+        """(N, num_perm) signatures"""
+        out = np.empty((len(texts), self.num_perm), dtype=np.uint32)
+        for i, text in enumerate(texts):
+            out[i] = self.signature(text)
+        return out
+
+    @staticmethod
+    def jaccard(sig_a: np.ndarray, sig_b: np.ndarray) -> float:
+        """Estimated Jaccard similarity of two signatures"""
+        return float(np.mean(sig_a == sig_b))
+
+    def _band_keys(self, sig: np.ndarray) -> List[bytes]:
+        return [sig[i * self.rows : (i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    # -----------------------------------------------------------------------
+    # Index
+    # -----------------------------------------------------------------------
+
+    def add(self, key: Hashable, sig: np.ndarray) -> None:
+        """File a signature under key (replaces the previous one of key)"""
+        with self._lock:
+            if key in self._signatures:
+                self._remove_locked(key)
+            sig = np.asarray(sig, dtype=np.uint32)
+            self._signatures[key] = sig
+            for band, band_key in zip(self._buckets, self._band_keys(sig)):
+                band[band_key].add(key)
+
+    def remove(self, key: Hashable) -> bool:
+        with self._lock:
+            if key not in self._signatures:
+                return False
+            self._remove_locked(key)
+            return True
+
+    def _remove_locked(self, key: Hashable) -> None:
+        sig = self._signatures.pop(key)
+        for band, band_key in zip(self._buckets, self._band_keys(sig)):
+            bucket = band.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del band[band_key]
+
+    def query(self, sig: np.ndarray, exclude: Optional[Hashable] = None) -> Optional[Tuple[Hashable, float]]:
+        """
+        Most similar filed key with estimated Jaccard >= threshold.
+
+        Returns:
+            (key, jaccard), or None if there is no near-duplicate
+        """
+        with self._lock:
+            candidates: Set[Hashable] = set()
+            for band, band_key in zip(self._buckets, self._band_keys(sig)):
+                bucket = band.get(band_key)
+                if bucket:
+                    candidates.update(bucket)
+            candidates.discard(exclude)
+            best = None
+            for key in candidates:
+                score = self.jaccard(sig, self._signatures[key])
+                if score >= self.threshold and (best is None or score > best[1]):
+                    best = (key, score)
+            return best
+
+    def find_duplicates(
+        self,
+        signatures: np.ndarray,
+        keys: Optional[Sequence[Hashable]] = None,
+    ) -> List[Optional[Tuple[Union[Hashable, int], float]]]:
+        """
+        Near-duplicate of each signature of a batch, among the filed keys
+        (a text never matches its own key) or, failing that, among the
+        earlier non-duplicate texts of the batch.
+
+        Returns:
+            Per text: None, (filed key, jaccard) or (batch index: int, jaccard)
+        """
+        batch = self.empty_like()
+        found: List[Optional[Tuple[Union[Hashable, int], float]]] = []
+        for i, sig in enumerate(signatures):
+            match = self.query(sig, exclude=keys[i] if keys is not None else None)
+            if match is None:
+                local = batch.query(sig)
+                if local is not None and keys is not None and keys[local[0]] == keys[i]:
+                    local = None  # same id repeated in the batch: an upsert, not a duplicate
+                if local is not None:
+                    match = (int(local[0]), local[1])
+                else:
+                    batch.add(i, sig)
+            found.append(match)
+        return found
+
+    # -----------------------------------------------------------------------
+    # Persistence (sidecar files next to a segment)
+    # -----------------------------------------------------------------------
+
+    def save(self, path: Union[str, Path]) -> None:
+        path = Path(path)
+        with self._lock:
+            keys = list(self._signatures)
+            sigs = (
+                np.stack([self._signatures[k] for k in keys])
+                if keys else np.empty((0, self.num_perm), dtype=np.uint32)
+            )
+        with open(path / SIGNATURES_FILE, "wb") as f:
+            np.save(f, sigs)
+        with open(path / KEYS_FILE, "w", encoding="utf-8") as f:
+            json.dump(keys, f)
+
+    @classmethod
+    def load(cls, path: Union[str, Path], **settings: Any) -> "MinHashLSH":
+        """Rebuild the buckets from saved signatures (settings as in save())"""
+        path = Path(path)
+        lsh = cls(**settings)
+        if (path / KEYS_FILE).exists():
+            with open(path / KEYS_FILE, encoding="utf-8") as f:
+                keys = json.load(f)
+            sigs = np.load(path / SIGNATURES_FILE)
+            for key, sig in zip(keys, sigs):
+                lsh.add(key, sig)
+        return lsh
@@ -0,0 +1,393 @@
+"""
+NumTriad HNSW Index
+===================
+
+Hierarchical Navigable Small World graph (Malkov & Yashunin) in pure
+NumPy/Python, used as a low-latency candidate generator for the RAG
+indexes.
+
+- Similarity is cosine, read directly from the owning VectorStore (the
+  graph stores row ids and links only, never a copy of the vectors).
+- Level-0 links live in a preallocated (capacity, 2*M) int32 matrix so a
+  node expansion is one fancy-index + one small matmul; the sparse upper
+  layers are dicts.
+- Insertion is online (`add`), and the graph is saved/loaded as .npz.
+
+The caller re-scores the `ef_search` returned candidates with its exact
+triad-aware score.
+
+Author: GLM Research Team
+Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .store import VectorStore
+
+
+@dataclass
+class HNSWConfig:
+    """Configuration for HNSWIndex"""
+    M: int = 16                 # links per node on upper layers (2*M on layer 0)
+    ef_construction: int = 200  # beam width while inserting
+    ef_search: int = 64         # default beam width while searching
+    seed: int = 0
+
+
+class HNSWIndex:
+    """
+    HNSW graph over the rows of a VectorStore.
+    """
+
+    def __init__(
+        self,
+        store: Optional[VectorStore] = None,
+        M: int = 16,
+        ef_construction: int = 200,
+        ef_search: int = 64,
+        seed: int = 0,
+    ):
+        self.store = store
+        self.M = int(M)
+        self.M0 = 2 * self.M
+        self.ef_construction = int(ef_construction)
+        self.ef_search = int(ef_search)
+        self.seed = seed
+        self._ml = 1.0 / math.log(max(self.M, 2))
+        self._rng = np.random.default_rng(seed)
+
+        self._capacity = 0
+        self._levels = np.full((0,), -1, dtype=np.int8)       # -1 = row not in graph
+        self._links0 = np.full((0, self.M0), -1, dtype=np.int32)
+        self._counts0 = np.zeros((0,), dtype=np.int32)
+        self._upper: Dict[int, Dict[int, List[int]]] = {}      # level -> node -> links
+        # visited marks of _search_layer, one array per thread: readers
+        # search the graph concurrently (NumTriadRAGIndexV4 read lock)
+        self._visit = threading.local()
+
+        self.entry_point: Optional[int] = None
+        self.max_level = -1
+        self._size = 0
+
+    @classmethod
+    def from_config(cls, store: Optional[VectorStore], cfg: HNSWConfig) -> "HNSWIndex":
+        return cls(store, M=cfg.M, ef_construction=cfg.ef_construction,
+                   ef_search=cfg.ef_search, seed=cfg.seed)
+
+    def bind(self, store: VectorStore) -> None:
+        """Attach the VectorStore holding the vectors (after load())"""
+        self.store = store
+
+    def __len__(self) -> int:
+        return self._size
+
+    # -----------------------------------------------------------------------
+    # Vector access
+    # -----------------------------------------------------------------------
+
+    def _unit(self, rows) -> np.ndarray:
+        emb = self.store.embeddings[rows]
+        if self.store.normalize:
+            return emb
+        norms = self.store.norms[rows]
+        return emb / (norms[..., None] + 1e-8)
+
+    def _sims(self, q: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        sims = self.store.embeddings[rows] @ q
+        if self.store.normalize:
+            return sims
+        return sims / (self.store.norms[rows] + 1e-8)
+
+    # -----------------------------------------------------------------------
+    # Graph storage
+    # -----------------------------------------------------------------------
+
+    def _reserve(self, n: int) -> None:
+        if n <= self._capacity:
+            return
+        new_cap = max(64, self._capacity)
+        while new_cap < n:
+            new_cap *= 2
+        grow = new_cap - self._capacity
+        self._levels = np.concatenate([self._levels, np.full((grow,), -1, dtype=np.int8)])
+        self._links0 = np.concatenate([self._links0, np.full((grow, self.M0), -1, dtype=np.int32)])
+        self._counts0 = np.concatenate([self._counts0, np.zeros((grow,), dtype=np.int32)])
+        self._capacity = new_cap
+
+    def _neighbors(self, node: int, level: int) -> np.ndarray:
+        if level == 0:
+            return self._links0[node, : self._counts0[node]]
+        return np.asarray(self._upper[level].get(node, ()), dtype=np.int64)
+
+    def _set_neighbors(self, node: int, level: int, links: np.ndarray) -> None:
+        if level == 0:
+            n = len(links)
+            self._links0[node, :n] = links
+            self._links0[node, n:] = -1
+            self._counts0[node] = n
+        else:
+            self._upper[level][node] = [int(x) for x in links]
+
+    def _visit_state(self) -> Tuple[np.ndarray, int]:
+        """Visited array of the calling thread and a fresh tag for it"""
+        state = self._visit
+        visited = getattr(state, "visited", None)
+        if visited is None or len(visited) < self._capacity:
+            visited = state.visited = np.zeros((self._capacity,), dtype=np.int32)
+            state.tag = 0
+        state.tag += 1
+        if state.tag >= np.iinfo(np.int32).max:
+            visited[:] = 0
+            state.tag = 1
+        return visited, state.tag
+
+    # -----------------------------------------------------------------------
+    # Core HNSW routines
+    # -----------------------------------------------------------------------
+
+    def _greedy(self, q: np.ndarray, ep: int, ep_sim: float, level: int) -> Tuple[int, float]:
+        """Greedy walk (ef=1) on an upper layer"""
+        changed = True
+        while changed:
+            changed = False
+            nbrs = self._neighbors(ep, level)
+            if len(nbrs) == 0:
+                break
+            sims = self._sims(q, nbrs)
+            best = int(np.argmax(sims))
+            if sims[best] > ep_sim:
+                ep, ep_sim = int(nbrs[best]), float(sims[best])
+                changed = True
+        return ep, ep_sim
+
+    def _search_layer(
+        self,
+        q: np.ndarray,
+        entry: List[Tuple[float, int]],
+        ef: int,
+        level: int,
+    ) -> List[Tuple[float, int]]:
+        """
+        Beam search on one layer.
+
+        Returns:
+            Up to ef (sim, node) pairs, unsorted
+        """
+        visited, tag = self._visit_state()
+        candidates = []  # max-heap on sim (stored negated)
+        results = []     # min-heap on sim
+        for sim, node in entry:
+            visited[node] = tag
+            heapq.heappush(candidates, (-sim, node))
+            heapq.heappush(results, (sim, node))
+        while len(results) > ef:
+            heapq.heappop(results)
+
+        while candidates:
+            neg_sim, node = heapq.heappop(candidates)
+            if -neg_sim < results[0][0] and len(results) >= ef:
+                break
+            nbrs = self._neighbors(node, level)
+            if len(nbrs) == 0:
+                continue
+            nbrs = nbrs[visited[nbrs] != tag]
+            if len(nbrs) == 0:
+                continue
+            visited[nbrs] = tag
+            sims = self._sims(q, nbrs)
+            worst = results[0][0]
+            if len(results) >= ef:
+                keep = sims > worst
+                sims, nbrs = sims[keep], nbrs[keep]
+            for s, n in zip(sims.tolist(), nbrs.tolist()):
+                if len(results) < ef or s > worst:
+                    heapq.heappush(candidates, (-s, n))
+                    heapq.heappush(results, (s, n))
+                    if len(results) > ef:
+                        heapq.heappop(results)
+                    worst = results[0][0]
+        return results
+
+    def _select_neighbors(
+        self,
+        base_sims: np.ndarray,
+        nodes: np.ndarray,
+        m: int,
+    ) -> np.ndarray:
+        """
+        Neighbor selection heuristic (HNSW alg. 4): keep a candidate only if
+        it is closer to the base than to every already-kept neighbor, then
+        back-fill with the closest discarded ones up to m.
+        """
+        order = np.argsort(-base_sims, kind="stable")
+        if len(nodes) <= m:
+            return nodes[order]
+        nodes, base = nodes[order], base_sims[order].tolist()
+        vecs = self._unit(nodes)
+        pair = vecs @ vecs.T
+        # max similarity of each candidate to the neighbors kept so far
+        max_to_kept = np.full((len(nodes),), -np.inf, dtype=pair.dtype)
+        kept: List[int] = []
+        discarded: List[int] = []
+        for i in range(len(nodes)):
+            if base[i] > max_to_kept[i]:
+                kept.append(i)
+                if len(kept) >= m:
+                    break
+                np.maximum(max_to_kept, pair[i], out=max_to_kept)
+            else:
+                discarded.append(i)
+        for i in discarded:
+            if len(kept) >= m:
+                break
+            kept.append(i)
+        return nodes[np.asarray(kept, dtype=np.int64)]
+
+    def _link(self, node: int, level: int, new_nbr: int) -> None:
+        """
+        Add new_nbr to node's links. When the list is full, re-prune it
+        with the selection heuristic: keeping only the m closest drops the
+        links between clusters and disconnects the graph on clustered data.
+        """
+        m = self.M0 if level == 0 else self.M
+        nbrs = self._neighbors(node, level)
+        if len(nbrs) < m:
+            self._set_neighbors(node, level, np.append(nbrs, new_nbr))
+            return
+        cand = np.append(nbrs, new_nbr).astype(np.int64)
+        sims = self._sims(self._unit(node), cand)
+        self._set_neighbors(node, level, self._select_neighbors(sims, cand, m))
+
+    def _insert(self, row: int) -> None:
+        level = int(-math.log(max(self._rng.random(), 1e-12)) * self._ml)
+        self._levels[row] = level
+        for lc in range(1, level + 1):
+            self._upper.setdefault(lc, {})[row] = []
+        self._size += 1
+
+        if self.entry_point is None:
+            self.entry_point, self.max_level = row, level
+            return
+
+        q = self._unit(row)
+        ep = self.entry_point
+        ep_sim = float(self._sims(q, np.asarray([ep]))[0])
+        for lc in range(self.max_level, level, -1):
+            ep, ep_sim = self._greedy(q, ep, ep_sim, lc)
+
+        entry = [(ep_sim, ep)]
+        for lc in range(min(level, self.max_level), -1, -1):
+            found = self._search_layer(q, entry, self.ef_construction, lc)
+            nodes = np.asarray([n for _, n in found], dtype=np.int64)
+            sims = np.asarray([s for s, _ in found], dtype="float32")
+            m = self.M0 if lc == 0 else self.M
+            selected = self._select_neighbors(sims, nodes, m)
+            self._set_neighbors(row, lc, selected)
+            for n in selected.tolist():
+                self._link(n, lc, row)
+            entry = found
+
+        if level > self.max_level:
+            self.entry_point, self.max_level = row, level
+
+    def add(self, x: Optional[np.ndarray], rows: np.ndarray) -> None:
+        """
+        Insert rows of the bound store (online insertion).
+
+        `x` is accepted for interface parity with IVFIndex; vectors are read
+        from the store.
+        """
+        if self.store is None:
+            raise RuntimeError("HNSW index is not bound to a VectorStore")
+        rows = np.asarray(rows, dtype=np.int64).reshape(-1)
+        if rows.size == 0:
+            return
+        self._reserve(int(rows.max()) + 1)
+        for r in rows.tolist():
+            if self._levels[r] < 0:
+                self._insert(r)
+
+    def candidates(
+        self,
+        query: np.ndarray,
+        k: int = 10,
+        ef_search: Optional[int] = None,
+    ) -> np.ndarray:
+        """
+        Approximate nearest rows (cosine), best first.
+
+        Returns up to max(ef_search, k) row ids.
+        """
+        if self.entry_point is None:
+            return np.empty((0,), dtype=np.int64)
+        q = np.asarray(query, dtype="float32").reshape(-1)
+        q = q / (np.linalg.norm(q) + 1e-8)
+        ef = max(int(ef_search or self.ef_search), k)
+
+        ep = self.entry_point
+        ep_sim = float(self._sims(q, np.asarray([ep]))[0])
+        for lc in range(self.max_level, 0, -1):
+            ep, ep_sim = self._greedy(q, ep, ep_sim, lc)
+
+        found = self._search_layer(q, [(ep_sim, ep)], ef, 0)
+        found.sort(reverse=True)
+        return np.asarray([n for _, n in found], dtype=np.int64)
+
+    # -----------------------------------------------------------------------
+    # Persistence
+    # -----------------------------------------------------------------------
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Save the graph (not the vectors) to a .npz file"""
+        n = self._capacity
+        up_level, up_node, up_offsets, up_links = [], [], [0], []
+        for lc, nodes in self._upper.items():
+            for node, links in nodes.items():
+                up_level.append(lc)
+                up_node.append(node)
+                up_links.extend(links)
+                up_offsets.append(len(up_links))
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                params=np.asarray([
+                    self.M, self.ef_construction, self.ef_search, self.seed,
+                    -1 if self.entry_point is None else self.entry_point,
+                    self.max_level, self._size,
+                ], dtype=np.int64),
+                levels=self._levels[:n],
+                links0=self._links0[:n],
+                counts0=self._counts0[:n],
+                up_level=np.asarray(up_level, dtype=np.int64),
+                up_node=np.asarray(up_node, dtype=np.int64),
+                up_offsets=np.asarray(up_offsets, dtype=np.int64),
+                up_links=np.asarray(up_links, dtype=np.int64),
+            )
+
+    @classmethod
+    def load(cls, path: Union[str, Path], store: Optional[VectorStore] = None) -> "HNSWIndex":
+        """Load a graph saved with save(); bind it to the store holding the vectors"""
+        with np.load(path) as data:
+            M, ef_c, ef_s, seed, entry, max_level, size = (int(v) for v in data["params"])
+            index = cls(store, M=M, ef_construction=ef_c, ef_search=ef_s, seed=seed)
+            index._levels = data["levels"].astype(np.int8)
+            index._links0 = data["links0"].astype(np.int32)
+            index._counts0 = data["counts0"].astype(np.int32)
+            index._capacity = len(index._levels)
+            offsets = data["up_offsets"]
+            links = data["up_links"]
+            for i, (lc, node) in enumerate(zip(data["up_level"].tolist(), data["up_node"].tolist())):
+                index._upper.setdefault(lc, {})[node] = links[offsets[i]:offsets[i + 1]].tolist()
+            index.entry_point = None if entry < 0 else entry
+            index.max_level = max_level
+            index._size = size
+        return index
@@ -0,0 +1,218 @@
+"""
+NumTriad IVF Index
+==================
+
+Inverted-file approximate search over NumTriad embeddings.
+
+- A spherical k-means coarse quantizer partitions the (L2-normalized)
+  embeddings into `nlist` Voronoi cells ("inverted lists").
+- At query time only the `nprobe` lists whose centroids are closest to
+  the query are visited; the caller re-scores those candidates with its
+  exact triad-aware score.
+- New rows are assigned to the nearest existing centroid, so the index
+  grows incrementally without retraining.
+
+Author: GLM Research Team
+Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import List, Optional, Union
+
+import numpy as np
+
+
+def _unit_rows(x: np.ndarray) -> np.ndarray:
+    x = np.asarray(x, dtype="float32")
+    return x / (np.linalg.norm(x, axis=-1, keepdims=True) + 1e-8)
+
+
+def spherical_kmeans(
+    x: np.ndarray,
+    n_clusters: int,
+    n_iter: int = 20,
+    seed: int = 0,
+) -> np.ndarray:
+    """
+    Spherical k-means (cosine) on the rows of x.
+
+    Args:
+        x: (N, D) vectors (normalized internally)
+        n_clusters: Number of centroids (clipped to N)
+        n_iter: Lloyd iterations
+        seed: RNG seed for the initial centroids
+
+    Returns:
+        centroids: (n_clusters, D) unit vectors
+    """
+    x = _unit_rows(x)
+    N = x.shape[0]
+    n_clusters = max(1, min(int(n_clusters), N))
+    rng = np.random.default_rng(seed)
+    centroids = x[rng.choice(N, size=n_clusters, replace=False)].copy()
+
+    for _ in range(n_iter):
+        assign = np.argmax(x @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, x)
+        counts = np.bincount(assign, minlength=n_clusters)
+
+        # Re-seed empty clusters on random points
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            sums[empty] = x[rng.choice(N, size=len(empty), replace=N < len(empty))]
+
+        new_centroids = _unit_rows(sums)
+        if np.allclose(new_centroids, centroids, atol=1e-6):
+            centroids = new_centroids
+            break
+        centroids = new_centroids
+
+    return centroids
+
+
+class IVFIndex:
+    """
+    Coarse-quantized inverted lists of row ids.
+
+    Rows are the caller's row indices (e.g. VectorStore rows); the IVF
+    index only stores ids, never a second copy of the vectors.
+    """
+
+    def __init__(
+        self,
+        nlist: int = 100,
+        nprobe: int = 8,
+        n_iter: int = 20,
+        seed: int = 0,
+    ):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.n_iter = n_iter
+        self.seed = seed
+        self.centroids: Optional[np.ndarray] = None  # (nlist, D)
+        self._lists: List[List[int]] = []
+        self._list_cache: List[Optional[np.ndarray]] = []
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    def __len__(self) -> int:
+        return sum(len(l) for l in self._lists)
+
+    def train(self, x: np.ndarray, max_train_points: Optional[int] = None) -> None:
+        """
+        Train the coarse quantizer.
+
+        Args:
+            x: (N, D) training vectors
+            max_train_points: Subsample size (default 256 * nlist)
+        """
+        x = np.asarray(x, dtype="float32")
+        if x.shape[0] == 0:
+            raise ValueError("Cannot train IVF on an empty set")
+        limit = max_train_points or 256 * self.nlist
+        if x.shape[0] > limit:
+            rng = np.random.default_rng(self.seed)
+            x = x[rng.choice(x.shape[0], size=limit, replace=False)]
+
+        self.centroids = spherical_kmeans(x, self.nlist, n_iter=self.n_iter, seed=self.seed)
+        self.nlist = self.centroids.shape[0]
+        self._lists = [[] for _ in range(self.nlist)]
+        self._list_cache = [None] * self.nlist
+
+    def assign(self, x: np.ndarray) -> np.ndarray:
+        """Nearest centroid id for each row of x"""
+        if not self.is_trained:
+            raise RuntimeError("IVF index is not trained")
+        return np.argmax(_unit_rows(np.atleast_2d(x)) @ self.centroids.T, axis=1)
+
+    def add(self, x: np.ndarray, rows: np.ndarray) -> None:
+        """
+        Assign vectors to their inverted lists (no retraining).
+
+        Args:
+            x: (B, D) vectors
+            rows: (B,) row ids to store
+        """
+        rows = np.asarray(rows, dtype=np.int64).reshape(-1)
+        if rows.size == 0:
+            return
+        assign = self.assign(x)
+        order = np.argsort(assign, kind="stable")
+        assign, rows = assign[order], rows[order]
+        bounds = np.flatnonzero(np.diff(assign)) + 1
+        for lst_rows, lst_id in zip(np.split(rows, bounds), assign[np.r_[0, bounds]]):
+            self._lists[lst_id].extend(lst_rows.tolist())
+            self._list_cache[lst_id] = None
+
+    def _list_array(self, lst_id: int) -> np.ndarray:
+        arr = self._list_cache[lst_id]
+        if arr is None:
+            arr = np.asarray(self._lists[lst_id], dtype=np.int64)
+            self._list_cache[lst_id] = arr
+        return arr
+
+    def candidates(
+        self,
+        query: np.ndarray,
+        k: int = 10,
+        nprobe: Optional[int] = None,
+    ) -> np.ndarray:
+        """
+        Row ids stored in the `nprobe` lists closest to the query.
+
+        `k` is accepted for interface parity with other ANN indexes; the
+        candidate set size is governed by nprobe.
+        """
+        if not self.is_trained:
+            raise RuntimeError("IVF index is not trained")
+        nprobe = min(int(nprobe or self.nprobe), self.nlist)
+        sims = self.centroids @ _unit_rows(query).reshape(-1)
+        if nprobe < self.nlist:
+            probe = np.argpartition(-sims, nprobe - 1)[:nprobe]
+        else:
+            probe = np.arange(self.nlist)
+        parts = [self._list_array(int(p)) for p in probe]
+        if not parts:
+            return np.empty((0,), dtype=np.int64)
+        return np.concatenate(parts)
+
+    def list_sizes(self) -> np.ndarray:
+        return np.asarray([len(l) for l in self._lists], dtype=np.int64)
+
+    # -----------------------------------------------------------------------
+    # Persistence
+    # -----------------------------------------------------------------------
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Save centroids and inverted lists to a .npz file"""
+        sizes = self.list_sizes()
+        rows = (
+            np.concatenate([self._list_array(i) for i in range(self.nlist)])
+            if self.nlist else np.empty((0,), dtype=np.int64)
+        )
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                centroids=self.centroids if self.is_trained else np.empty((0, 0), dtype="float32"),
+                list_sizes=sizes,
+                list_rows=rows,
+                params=np.asarray([self.nlist, self.nprobe, self.n_iter, self.seed], dtype=np.int64),
+            )
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "IVFIndex":
+        """Load an index saved with save()"""
+        with np.load(path) as data:
+            nlist, nprobe, n_iter, seed = (int(v) for v in data["params"])
+            ivf = cls(nlist=nlist, nprobe=nprobe, n_iter=n_iter, seed=seed)
+            if data["centroids"].size:
+                ivf.centroids = data["centroids"].astype("float32")
+                bounds = np.cumsum(data["list_sizes"])[:-1]
+                ivf._lists = [l.tolist() for l in np.split(data["list_rows"], bounds)]
+                ivf._list_cache = [None] * ivf.nlist
+        return ivf
@@ -0,0 +1,116 @@
+"""
+NumTriad Lexical Index (BM25)
+=============================
+
+Inverted term index with Okapi BM25 scoring, used as a cheap candidate
+generator next to dense retrieval:
+
+    bm25(q, d) = sum_t idf(t) * tf(t,d) * (k1 + 1)
+                 / (tf(t,d) + k1 * (1 - b + b * |d| / avgdl))
+
+    idf(t) = log(1 + (N - df(t) + 0.5) / (df(t) + 0.5))
+
+A query only touches the posting lists of its terms, so its cost is the
+number of postings of those terms, not the corpus size. Rows that share
+no term with the query are never scored.
+
+Author: GLM Research Team
+Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from .store import top_k_indices
+
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens"""
+    return TOKEN_RE.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Inverted index term -> (row ids, term frequencies) over tokenized
+    texts, keyed by caller row ids (row i <-> i-th added text).
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        self._posting_cache: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._doc_len: List[int] = []
+        self._doc_len_arr = np.zeros((0,), dtype="float32")
+        self._total_len = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    @property
+    def vocabulary_size(self) -> int:
+        return len(self._postings)
+
+    def add(self, texts: Iterable[str], rows: Iterable[int]) -> None:
+        """Index texts for the given (increasing, contiguous) row ids"""
+        for text, row in zip(texts, rows):
+            row = int(row)
+            if row != len(self._doc_len):
+                raise ValueError(f"BM25Index rows must be appended in order, got {row}")
+            tokens = tokenize(text)
+            for term, tf in Counter(tokens).items():
+                rows_t, tfs_t = self._postings.setdefault(term, ([], []))
+                rows_t.append(row)
+                tfs_t.append(tf)
+                self._posting_cache.pop(term, None)
+            self._doc_len.append(len(tokens))
+            self._total_len += len(tokens)
+        self._doc_len_arr = np.asarray(self._doc_len, dtype="float32")
+
+    def _posting(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        arrays = self._posting_cache.get(term)
+        if arrays is None:
+            rows, tfs = self._postings[term]
+            arrays = (np.asarray(rows, dtype=np.int64), np.asarray(tfs, dtype="float32"))
+            self._posting_cache[term] = arrays
+        return arrays
+
+    def scores(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        BM25 score of every row sharing at least one term with the query.
+
+        Returns:
+            (rows, scores), rows sorted increasingly
+        """
+        n = len(self._doc_len)
+        terms = [t for t in set(tokenize(query)) if t in self._postings]
+        if not n or not terms:
+            return np.empty((0,), dtype=np.int64), np.empty((0,), dtype="float32")
+
+        avgdl = max(self._total_len / n, 1e-8)
+        all_rows, all_scores = [], []
+        for term in terms:
+            rows, tfs = self._posting(term)
+            df = rows.shape[0]
+            idf = np.log1p((n - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1.0 - self.b + self.b * self._doc_len_arr[rows] / avgdl)
+            all_rows.append(rows)
+            all_scores.append(idf * tfs * (self.k1 + 1.0) / (tfs + norm))
+
+        rows, inverse = np.unique(np.concatenate(all_rows), return_inverse=True)
+        scores = np.bincount(inverse.reshape(-1), weights=np.concatenate(all_scores))
+        return rows, scores.astype("float32")
+
+    def search(self, query: str, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k rows by BM25, (rows, scores) sorted by decreasing score"""
+        rows, scores = self.scores(query)
+        idxs = top_k_indices(scores, k)
+        return rows[idxs], scores[idxs]
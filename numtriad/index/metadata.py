@@ -0,0 +1,165 @@
+"""
+NumTriad Metadata Index
+=======================
+
+Per-field inverted indexes over document metadata, so filters are
+applied *before* scoring (filter pushdown) instead of post-filtering a
+top-k list.
+
+Filter syntax (all conditions are AND-ed):
+
+    {"type": "tutorial"}                      -> equality
+    {"lang": ["en", "fr"]}                    -> IN (list / tuple / set)
+    {"year": {"$gte": 2020, "$lt": 2024}}     -> numeric range
+    {"type": {"$eq": "x"}, "tag": {"$in": [...]}}
+    {"tags": {"$eq": ["a", "b"]}}             -> exact list value
+
+- Equality / IN use posting lists (field -> value -> row ids).
+- A list-valued field is indexed as one value (not per element): a bare
+  list in a filter means IN, so list values are matched with "$eq",
+  which compares the whole list (lists and tuples are equal).
+- Ranges use a dense float64 column per numeric field (NaN = missing),
+  compared vectorized into a boolean bitmap.
+
+Author: GLM Research Team
+Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import json
+import numbers
+from typing import Any, Dict, Hashable, Iterable, List, Optional
+
+import numpy as np
+
+
+RANGE_OPS = {
+    "$gt": np.greater,
+    "$gte": np.greater_equal,
+    "$lt": np.less,
+    "$lte": np.less_equal,
+}
+
+
+def _value_key(value: Any) -> Hashable:
+    """Hashable key for a metadata value (lists / tuples and unhashable values are JSON-encoded)"""
+    if isinstance(value, (list, tuple)):
+        return json.dumps(list(value), sort_keys=True, default=str)
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return json.dumps(value, sort_keys=True, default=str)
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, numbers.Real) and not isinstance(value, bool)
+
+
+class MetadataIndex:
+    """
+    Inverted index over metadata dicts, keyed by caller row ids
+    (row i <-> i-th added record).
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[Hashable, List[int]]] = {}
+        self._posting_cache: Dict[tuple, np.ndarray] = {}
+        self._numeric: Dict[str, np.ndarray] = {}    # field -> (capacity,) float64
+        self._capacity = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def fields(self) -> List[str]:
+        return sorted(self._postings)
+
+    def _reserve(self, n: int) -> None:
+        if n <= self._capacity:
+            return
+        new_cap = max(64, self._capacity)
+        while new_cap < n:
+            new_cap *= 2
+        for field, col in self._numeric.items():
+            grown = np.full((new_cap,), np.nan)
+            grown[: self._size] = col[: self._size]
+            self._numeric[field] = grown
+        self._capacity = new_cap
+
+    def add(self, records: Iterable[Dict[str, Any]], rows: Iterable[int]) -> None:
+        """Index metadata records for the given (increasing) row ids"""
+        for record, row in zip(records, rows):
+            row = int(row)
+            self._reserve(row + 1)
+            for field, value in (record or {}).items():
+                key = _value_key(value)
+                self._postings.setdefault(field, {}).setdefault(key, []).append(row)
+                self._posting_cache.pop((field, key), None)
+                if _is_number(value):
+                    col = self._numeric.get(field)
+                    if col is None:
+                        col = np.full((self._capacity,), np.nan)
+                        self._numeric[field] = col
+                    col[row] = float(value)
+            self._size = max(self._size, row + 1)
+
+    def _posting(self, field: str, value: Any) -> np.ndarray:
+        key = _value_key(value)
+        arr = self._posting_cache.get((field, key))
+        if arr is None:
+            arr = np.asarray(self._postings.get(field, {}).get(key, []), dtype=np.int64)
+            self._posting_cache[(field, key)] = arr
+        return arr
+
+    def _field_mask(self, field: str, condition: Any, n: int) -> np.ndarray:
+        mask = np.zeros((n,), dtype=bool)
+
+        if isinstance(condition, dict) and any(op.startswith("$") for op in condition):
+            unknown = set(condition) - set(RANGE_OPS) - {"$eq", "$in"}
+            if unknown:
+                raise ValueError(f"Unsupported filter operator(s) for '{field}': {sorted(unknown)}")
+            mask[:] = True
+            if "$eq" in condition:
+                mask &= self._rows_mask(self._posting(field, condition["$eq"]), n)
+            if "$in" in condition:
+                mask &= self._field_mask(field, list(condition["$in"]), n)
+            ranges = [(op, v) for op, v in condition.items() if op in RANGE_OPS]
+            if ranges:
+                col = self._numeric.get(field)
+                if col is None:
+                    return np.zeros((n,), dtype=bool)
+                values = col[:n]
+                for op, bound in ranges:
+                    # NaN (missing / non-numeric) compares False
+                    mask &= RANGE_OPS[op](values, float(bound))
+            return mask
+
+        values = condition if isinstance(condition, (list, tuple, set, frozenset)) else [condition]
+        for value in values:
+            rows = self._posting(field, value)
+            mask[rows[rows < n]] = True
+        return mask
+
+    @staticmethod
+    def _rows_mask(rows: np.ndarray, n: int) -> np.ndarray:
+        mask = np.zeros((n,), dtype=bool)
+        mask[rows[rows < n]] = True
+        return mask
+
+    def mask(self, filters: Optional[Dict[str, Any]], n: Optional[int] = None) -> np.ndarray:
+        """Boolean bitmap (n,) of rows matching every filter condition"""
+        n = self._size if n is None else n
+        mask = np.ones((n,), dtype=bool)
+        for field, condition in (filters or {}).items():
+            mask &= self._field_mask(field, condition, n)
+            if not mask.any():
+                break
+        return mask
+
+    def rows(self, filters: Optional[Dict[str, Any]], n: Optional[int] = None) -> np.ndarray:
+        """Row ids matching the filters"""
+        return np.flatnonzero(self.mask(filters, n))
+
@@ -0,0 +1,215 @@
+"""
+NumTriad Multi-Vector Store (late interaction)
+==============================================
+
+Keeps every chunk embedding of every document instead of their mean, so
+long documents are not blurred into a single vector:
+
+    chunks   (C, D)   float32, L2-normalized, contiguous, document by document
+    offsets  (N+1,)   int64, chunks of document i = chunks[offsets[i]:offsets[i+1]]
+
+Documents are scored by MaxSim (ColBERT-style late interaction), averaged
+over the query chunks so the score stays in [-1, 1] like a cosine:
+
+    maxsim(q, d) = mean_i max_j <q_i, d_j>
+
+Scoring is one (Lq, D) x (D, C) matmul per block of documents, followed
+by a per-document max with np.maximum.reduceat over the offset table.
+There is no Python loop over documents or chunks.
+
+Saved next to a segment as `chunks.f32` + `chunk_offsets.npy`.
+
+Author: GLM Research Team
+Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+
+
+CHUNKS_FILE = "chunks.f32"
+CHUNK_OFFSETS_FILE = "chunk_offsets.npy"
+
+# max number of similarity floats (Lq * chunks) computed per block
+MAXSIM_SCORE_BUDGET = 1 << 24
+
+
+def _normalize_rows(x: np.ndarray) -> np.ndarray:
+    x = np.asarray(x, dtype="float32")
+    return x / (np.linalg.norm(x, axis=1, keepdims=True) + 1e-8)
+
+
+class MultiVectorStore:
+    """
+    Append-only chunk matrix with a doc -> chunk offset table
+    (row i <-> i-th appended document, like VectorStore rows).
+    """
+
+    def __init__(self, dim: Optional[int] = None, initial_capacity: int = 256):
+        self.dim = dim
+        self._initial_capacity = max(1, int(initial_capacity))
+        self._chunks: Optional[np.ndarray] = None  # (cap, D)
+        self._n_chunks = 0
+        self._offsets = [0]
+        self._offsets_arr = np.zeros((1,), dtype=np.int64)
+
+    def __len__(self) -> int:
+        """Number of documents"""
+        return len(self._offsets) - 1
+
+    @property
+    def n_chunks(self) -> int:
+        return self._n_chunks
+
+    @property
+    def chunks(self) -> np.ndarray:
+        """(C, D) view of the normalized chunk vectors"""
+        if self._chunks is None:
+            return np.empty((0, self.dim or 0), dtype="float32")
+        return self._chunks[: self._n_chunks]
+
+    @property
+    def offsets(self) -> np.ndarray:
+        """(N+1,) chunk offsets of the documents"""
+        if self._offsets_arr.shape[0] != len(self._offsets):
+            self._offsets_arr = np.asarray(self._offsets, dtype=np.int64)
+        return self._offsets_arr
+
+    def doc_chunks(self, row: int) -> np.ndarray:
+        """(L, D) chunk vectors of one document"""
+        return self.chunks[self._offsets[row] : self._offsets[row + 1]]
+
+    def _reserve(self, n: int) -> None:
+        cap = 0 if self._chunks is None else self._chunks.shape[0]
+        if n <= cap:
+            return
+        new_cap = max(self._initial_capacity, cap)
+        while new_cap < n:
+            new_cap *= 2
+        grown = np.empty((new_cap, self.dim), dtype="float32")
+        if self._n_chunks:
+            grown[: self._n_chunks] = self._chunks[: self._n_chunks]
+        self._chunks = grown
+
+    def append(self, chunk_vecs: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        """
+        Append documents.
+
+        Args:
+            chunk_vecs: (sum(counts), D) chunk embeddings, document by document
+            counts: (B,) number of chunks of each document (>= 1)
+
+        Returns:
+            Row indices (B,) of the new documents
+        """
+        vecs = np.asarray(chunk_vecs, dtype="float32")
+        counts = np.asarray(counts, dtype=np.int64).reshape(-1)
+        if counts.size and counts.min() < 1:
+            raise ValueError("Every document needs at least one chunk")
+        if vecs.shape[0] != int(counts.sum()):
+            raise ValueError(f"Chunk count mismatch: {vecs.shape[0]} vectors, {int(counts.sum())} expected")
+        if self.dim is None:
+            self.dim = vecs.shape[1]
+        elif vecs.shape[0] and vecs.shape[1] != self.dim:
+            raise ValueError(f"Chunk dimension mismatch: {vecs.shape[1]} != {self.dim}")
+
+        start_row = len(self)
+        start = self._n_chunks
+        self._reserve(start + vecs.shape[0])
+        self._chunks[start : start + vecs.shape[0]] = _normalize_rows(vecs)
+        self._n_chunks += vecs.shape[0]
+        self._offsets.extend((start + np.cumsum(counts)).tolist())
+        return np.arange(start_row, start_row + counts.size)
+
+    def _chunk_rows(self, rows: np.ndarray):
+        """Chunk indices and per-document counts of the given documents"""
+        offsets = self.offsets
+        counts = offsets[rows + 1] - offsets[rows]
+        starts = np.repeat(offsets[rows] - np.cumsum(counts) + counts, counts)
+        return starts + np.arange(int(counts.sum())), counts
+
+    def take(self, rows: np.ndarray) -> "MultiVectorStore":
+        """New store holding a copy of the given documents (in order)"""
+        rows = np.asarray(rows, dtype=np.int64)
+        store = MultiVectorStore(dim=self.dim, initial_capacity=self._initial_capacity)
+        if rows.size:
+            idx, counts = self._chunk_rows(rows)
+            store._reserve(idx.size)
+            store._chunks[: idx.size] = self.chunks[idx]
+            store._n_chunks = idx.size
+            store._offsets = [0] + np.cumsum(counts).tolist()
+        return store
+
+    def maxsim(
+        self,
+        query_chunks: np.ndarray,
+        rows: Optional[np.ndarray] = None,
+        budget: int = MAXSIM_SCORE_BUDGET,
+    ) -> np.ndarray:
+        """
+        MaxSim score of every document (rows=None) or of the given rows.
+
+        Args:
+            query_chunks: (Lq, D) query chunk embeddings (normalized here)
+
+        Returns:
+            (N,) or (|rows|,) scores
+        """
+        q = _normalize_rows(np.atleast_2d(query_chunks))
+        if rows is None:
+            chunks, offsets = self.chunks, self.offsets
+        else:
+            idx, counts = self._chunk_rows(np.asarray(rows, dtype=np.int64))
+            chunks = self.chunks[idx]
+            offsets = np.concatenate([[0], np.cumsum(counts)])
+        n_docs = offsets.shape[0] - 1
+        scores = np.empty((n_docs,), dtype="float32")
+        if n_docs == 0:
+            return scores
+
+        # blocks of whole documents, each with <= budget / Lq chunks
+        max_chunks = max(1, budget // q.shape[0])
+        doc = 0
+        while doc < n_docs:
+            end = int(np.searchsorted(offsets, offsets[doc] + max_chunks, side="right")) - 1
+            end = min(max(end, doc + 1), n_docs)
+            lo, hi = offsets[doc], offsets[end]
+            sims = q @ chunks[lo:hi].T                                     # (Lq, C_block)
+            best = np.maximum.reduceat(sims, offsets[doc:end] - lo, axis=1)  # (Lq, docs)
+            scores[doc:end] = best.mean(axis=0)
+            doc = end
+        return scores
+
+    # -----------------------------------------------------------------------
+    # Persistence (sidecar files next to a segment)
+    # -----------------------------------------------------------------------
+
+    def save(self, path: Union[str, Path]) -> None:
+        path = Path(path)
+        self.chunks.tofile(path / CHUNKS_FILE)
+        with open(path / CHUNK_OFFSETS_FILE, "wb") as f:
+            np.save(f, self.offsets)
+
+    @classmethod
+    def load(cls, path: Union[str, Path], dim: int, mmap: bool = True) -> "MultiVectorStore":
+        """Open the sidecar files (chunks as a read-only np.memmap with mmap=True)"""
+        path = Path(path)
+        offsets = np.load(path / CHUNK_OFFSETS_FILE).astype(np.int64)
+        store = cls(dim=dim)
+        n_chunks = int(offsets[-1])
+        if n_chunks:
+            if mmap:
+                store._chunks = np.memmap(path / CHUNKS_FILE, dtype="float32", mode="r", shape=(n_chunks, dim))
+            else:
+                store._chunks = np.fromfile(path / CHUNKS_FILE, dtype="float32").reshape(n_chunks, dim)
+        store._n_chunks = n_chunks
+        store._offsets = offsets.tolist()
+        return store
+
+    @staticmethod
+    def exists(path: Union[str, Path]) -> bool:
+        return (Path(path) / CHUNK_OFFSETS_FILE).exists()
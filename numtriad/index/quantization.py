@@ -0,0 +1,394 @@
+"""
+NumTriad Compressed Embedding Storage
+=====================================
+
+Quantized codes for the RAG indexes, used as a compressed first pass
+before an exact rerank:
+
+- ScalarQuantizer: per-dimension int8 (uint8 codes, min/max calibrated),
+  1 byte per dimension (4x smaller than float32).
+- ProductQuantizer: the vector is split into `m` sub-vectors, each
+  replaced by the id of its nearest sub-centroid (k-means, 2**nbits
+  centroids), m bytes per vector. Queries are scored with asymmetric
+  distance computation (ADC): one (m, 2**nbits) lookup table per query,
+  then a gather + sum over the codes.
+
+CompressedIndex keeps only the codes (and row ids) in RAM and returns a
+shortlist of `rerank` rows; the owning index re-scores that shortlist
+exactly against its float32 rows (np.memmap'd from the on-disk segment
+after load(), so full-precision vectors stay on disk).
+
+Codes are computed on L2-normalized vectors (cosine similarity).
+
+Author: GLM Research Team
+Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+import numpy as np
+
+from .store import top_k_indices
+
+
+def _unit_rows(x: np.ndarray) -> np.ndarray:
+    x = np.asarray(x, dtype="float32")
+    return x / (np.linalg.norm(x, axis=-1, keepdims=True) + 1e-8)
+
+
+def _kmeans_l2(x: np.ndarray, n_clusters: int, n_iter: int = 20, seed: int = 0) -> np.ndarray:
+    """Euclidean k-means on the rows of x, returns (n_clusters, D) centroids"""
+    N = x.shape[0]
+    n_clusters = max(1, min(int(n_clusters), N))
+    rng = np.random.default_rng(seed)
+    centroids = x[rng.choice(N, size=n_clusters, replace=False)].copy()
+
+    for _ in range(n_iter):
+        # ||x||^2 is constant per row and does not change the argmin
+        d = (centroids * centroids).sum(axis=1)[None, :] - 2.0 * (x @ centroids.T)
+        assign = np.argmin(d, axis=1)
+        counts = np.bincount(assign, minlength=n_clusters)
+        sums = np.stack(
+            [np.bincount(assign, weights=x[:, d], minlength=n_clusters) for d in range(x.shape[1])],
+            axis=1,
+        )
+
+        # Re-seed empty clusters on random points
+        empty = counts == 0
+        new_centroids = (sums / np.maximum(counts, 1)[:, None]).astype("float32")
+        if empty.any():
+            new_centroids[empty] = x[rng.choice(N, size=int(empty.sum()), replace=N < int(empty.sum()))]
+
+        if np.allclose(new_centroids, centroids, atol=1e-6):
+            centroids = new_centroids
+            break
+        centroids = new_centroids
+
+    return centroids.astype("float32")
+
+
+class ScalarQuantizer:
+    """
+    Per-dimension 8-bit scalar quantizer.
+
+    x[d] ~= vmin[d] + code[d] * scale[d], code in [0, 255]; the inner
+    product with a float query is (q * scale) . code + q . vmin.
+    """
+
+    kind = "sq"
+
+    def __init__(self):
+        self.vmin: Optional[np.ndarray] = None   # (D,)
+        self.scale: Optional[np.ndarray] = None  # (D,)
+
+    @property
+    def is_trained(self) -> bool:
+        return self.vmin is not None
+
+    @property
+    def code_size(self) -> int:
+        """Bytes per encoded vector"""
+        return 0 if self.vmin is None else int(self.vmin.shape[0])
+
+    def train(self, x: np.ndarray) -> None:
+        x = np.asarray(x, dtype="float32")
+        self.vmin = x.min(axis=0)
+        self.scale = np.maximum(x.max(axis=0) - self.vmin, 1e-8) / 255.0
+
+    def encode(self, x: np.ndarray) -> np.ndarray:
+        codes = np.rint((np.asarray(x, dtype="float32") - self.vmin) / self.scale)
+        return np.clip(codes, 0, 255).astype(np.uint8)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return self.vmin + codes.astype("float32") * self.scale
+
+    def query_context(self, q: np.ndarray) -> Any:
+        return (q * self.scale).astype("float32"), float(q @ self.vmin)
+
+    def scores(self, codes: np.ndarray, ctx: Any) -> np.ndarray:
+        """Approximate inner products between the query and `codes`"""
+        q_scaled, offset = ctx
+        return codes.astype("float32") @ q_scaled + offset
+
+    def state(self) -> Dict[str, np.ndarray]:
+        return {"vmin": self.vmin, "scale": self.scale}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, np.ndarray], params: np.ndarray) -> "ScalarQuantizer":
+        sq = cls()
+        sq.vmin = state["vmin"].astype("float32")
+        sq.scale = state["scale"].astype("float32")
+        return sq
+
+
+class ProductQuantizer:
+    """
+    Product quantizer with `m` sub-quantizers of 2**nbits centroids each.
+
+    The embedding dimension must be divisible by m.
+    """
+
+    kind = "pq"
+
+    def __init__(self, m: int = 8, nbits: int = 8, n_iter: int = 20, seed: int = 0):
+        if not 1 <= nbits <= 8:
+            raise ValueError(f"nbits must be in [1, 8], got {nbits}")
+        self.m = int(m)
+        self.nbits = int(nbits)
+        self.ksub = 2 ** self.nbits
+        self.n_iter = n_iter
+        self.seed = seed
+        self.codebooks: Optional[np.ndarray] = None  # (m, ksub, dsub)
+
+    @property
+    def is_trained(self) -> bool:
+        return self.codebooks is not None
+
+    @property
+    def code_size(self) -> int:
+        """Bytes per encoded vector"""
+        return self.m
+
+    def _split(self, x: np.ndarray) -> np.ndarray:
+        """(N, D) -> (m, N, dsub)"""
+        N, D = x.shape
+        if D % self.m:
+            raise ValueError(f"Embedding dimension {D} is not divisible by m={self.m}")
+        return x.reshape(N, self.m, D // self.m).transpose(1, 0, 2)
+
+    def train(self, x: np.ndarray) -> None:
+        subs = self._split(np.asarray(x, dtype="float32"))
+        books = [
+            _kmeans_l2(np.ascontiguousarray(sub), self.ksub, n_iter=self.n_iter, seed=self.seed + j)
+            for j, sub in enumerate(subs)
+        ]
+        # Fewer training points than ksub: pad by repeating the last centroid
+        ksub = max(b.shape[0] for b in books)
+        self.codebooks = np.stack([
+            np.concatenate([b, np.repeat(b[-1:], ksub - b.shape[0], axis=0)]) for b in books
+        ]).astype("float32")
+
+    def encode(self, x: np.ndarray) -> np.ndarray:
+        subs = self._split(np.asarray(x, dtype="float32"))
+        codes = np.empty((subs.shape[1], self.m), dtype=np.uint8)
+        for j, sub in enumerate(subs):
+            book = self.codebooks[j]
+            d = -2.0 * (sub @ book.T) + (book * book).sum(axis=1)[None, :]
+            codes[:, j] = np.argmin(d, axis=1)
+        return codes
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        parts = [self.codebooks[j][codes[:, j]] for j in range(self.m)]
+        return np.concatenate(parts, axis=1)
+
+    def query_context(self, q: np.ndarray) -> Any:
+        """ADC lookup table: lut[j, c] = <q_j, codebook[j, c]>"""
+        q_sub = q.reshape(self.m, -1)
+        return np.einsum("jd,jcd->jc", q_sub, self.codebooks).astype("float32")
+
+    def scores(self, codes: np.ndarray, ctx: Any) -> np.ndarray:
+        """Approximate inner products between the query and `codes`"""
+        return ctx[np.arange(self.m), codes].sum(axis=1)
+
+    def state(self) -> Dict[str, np.ndarray]:
+        return {"codebooks": self.codebooks}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, np.ndarray], params: np.ndarray) -> "ProductQuantizer":
+        m, nbits, n_iter, seed = (int(v) for v in params)
+        pq = cls(m=m, nbits=nbits, n_iter=n_iter, seed=seed)
+        pq.codebooks = state["codebooks"].astype("float32")
+        return pq
+
+
+QUANTIZERS = {
+    "sq": ScalarQuantizer,
+    "pq": ProductQuantizer,
+}
+
+
+class CompressedIndex:
+    """
+    Exhaustive scan over quantized codes, returning a shortlist for exact
+    rerank by the owning index.
+
+    Codes are kept in a capacity-doubling uint8 buffer; row ids refer to
+    the owning VectorStore.
+    """
+
+    def __init__(
+        self,
+        kind: str = "sq",
+        rerank: int = 100,
+        m: int = 8,
+        nbits: int = 8,
+        n_iter: int = 20,
+        seed: int = 0,
+        chunk_size: int = 65536,
+    ):
+        if kind not in QUANTIZERS:
+            raise ValueError(f"Unknown quantizer '{kind}' (expected one of {list(QUANTIZERS)})")
+        self.kind = kind
+        self.rerank = int(rerank)
+        self.chunk_size = int(chunk_size)
+        if kind == "pq":
+            self.quantizer = ProductQuantizer(m=m, nbits=nbits, n_iter=n_iter, seed=seed)
+        else:
+            self.quantizer = ScalarQuantizer()
+        self._codes = np.empty((0, 0), dtype=np.uint8)
+        self._rows = np.empty((0,), dtype=np.int64)
+        self._size = 0
+
+    @property
+    def is_trained(self) -> bool:
+        return self.quantizer.is_trained
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def codes(self) -> np.ndarray:
+        return self._codes[: self._size]
+
+    @property
+    def bytes_per_doc(self) -> int:
+        """Resident bytes per document (code + row id)"""
+        return self.quantizer.code_size + self._rows.itemsize
+
+    def train(self, x: np.ndarray, max_train_points: int = 65536) -> None:
+        """Train the quantizer on (a subsample of) x"""
+        x = np.asarray(x, dtype="float32")
+        if x.shape[0] == 0:
+            raise ValueError("Cannot train a quantizer on an empty set")
+        if x.shape[0] > max_train_points:
+            rng = np.random.default_rng(0)
+            x = x[rng.choice(x.shape[0], size=max_train_points, replace=False)]
+        self.quantizer.train(_unit_rows(x))
+
+    def _reserve(self, n: int) -> None:
+        cap = self._rows.shape[0]
+        if n <= cap:
+            return
+        new_cap = max(64, cap)
+        while new_cap < n:
+            new_cap *= 2
+        codes = np.empty((new_cap, self.quantizer.code_size), dtype=np.uint8)
+        rows = np.empty((new_cap,), dtype=np.int64)
+        if self._size:
+            codes[: self._size] = self._codes[: self._size]
+            rows[: self._size] = self._rows[: self._size]
+        self._codes, self._rows = codes, rows
+
+    def add(self, x: np.ndarray, rows: np.ndarray) -> None:
+        """
+        Encode vectors with the trained quantizer (no retraining).
+
+        Args:
+            x: (B, D) vectors
+            rows: (B,) row ids to store
+        """
+        if not self.is_trained:
+            raise RuntimeError("Quantizer is not trained")
+        rows = np.asarray(rows, dtype=np.int64).reshape(-1)
+        if rows.size == 0:
+            return
+        codes = self.quantizer.encode(_unit_rows(np.atleast_2d(x)))
+        start = self._size
+        self._reserve(start + rows.size)
+        self._codes[start : start + rows.size] = codes
+        self._rows[start : start + rows.size] = rows
+        self._size = start + rows.size
+
+    def approximate_scores(self, query: np.ndarray) -> np.ndarray:
+        """Approximate cosine similarity of the query to every stored code"""
+        q = _unit_rows(np.asarray(query).reshape(-1))
+        ctx = self.quantizer.query_context(q)
+        out = np.empty((self._size,), dtype="float32")
+        for start in range(0, self._size, self.chunk_size):
+            stop = min(start + self.chunk_size, self._size)
+            out[start:stop] = self.quantizer.scores(self._codes[start:stop], ctx)
+        return out
+
+    def candidates(
+        self,
+        query: np.ndarray,
+        k: int = 10,
+        rerank: Optional[int] = None,
+    ) -> np.ndarray:
+        """
+        Shortlist of max(rerank, k) row ids by approximate score, best first.
+        """
+        if self._size == 0:
+            return np.empty((0,), dtype=np.int64)
+        shortlist = max(int(rerank or self.rerank), k)
+        idxs = top_k_indices(self.approximate_scores(query), shortlist)
+        return self._rows[idxs]
+
+    # -----------------------------------------------------------------------
+    # Persistence
+    # -----------------------------------------------------------------------
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Save the quantizer and codes to a .npz file"""
+        q = self.quantizer
+        qparams = (
+            [q.m, q.nbits, q.n_iter, q.seed] if isinstance(q, ProductQuantizer) else [0, 8, 0, 0]
+        )
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                kind=np.asarray(self.kind),
+                params=np.asarray([self.rerank, self.chunk_size], dtype=np.int64),
+                qparams=np.asarray(qparams, dtype=np.int64),
+                codes=self.codes,
+                rows=self._rows[: self._size],
+                **{f"q_{name}": arr for name, arr in q.state().items()},
+            )
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "CompressedIndex":
+        """Load an index saved with save()"""
+        with np.load(path) as data:
+            kind = str(data["kind"])
+            rerank, chunk_size = (int(v) for v in data["params"])
+            index = cls(kind=kind, rerank=rerank, chunk_size=chunk_size)
+            state = {name[2:]: data[name] for name in data.files if name.startswith("q_")}
+            index.quantizer = QUANTIZERS[kind].from_state(state, data["qparams"])
+            index._codes = data["codes"].copy()
+            index._rows = data["rows"].astype(np.int64)
+            index._size = index._rows.shape[0]
+        return index
+
+
+def memory_report(
+    n_docs: int,
+    dim: Optional[int],
+    compressed: Optional[CompressedIndex] = None,
+) -> Dict[str, Any]:
+    """
+    Memory per document of the float32 store vs the compressed codes.
+
+    float32 rows hold the embedding (4*D bytes), the triad (12) and the
+    norm (4). In compressed mode only the codes + row ids are resident;
+    the float rows are read from the (memory-mapped) segment at rerank.
+    """
+    dim = int(dim or 0)
+    float_bytes = 4 * dim + 4 * 3 + 4
+    report: Dict[str, Any] = {
+        "docs": int(n_docs),
+        "dim": dim,
+        "float32_bytes_per_doc": float_bytes,
+        "float32_total_mb": n_docs * float_bytes / 2**20,
+    }
+    if compressed is not None:
+        code_bytes = compressed.bytes_per_doc
+        report.update({
+            "quantizer": compressed.kind,
+            "code_bytes_per_doc": code_bytes,
+            "compressed_total_mb": n_docs * code_bytes / 2**20,
+            "reduction": float_bytes / code_bytes if code_bytes else float("inf"),
+        })
+    return report
@@ -0,0 +1,272 @@
+"""
+NumTriad On-Disk Segment Format
+===============================
+
+Versioned directory layout used to persist the RAG indexes:
+
+    <segment>/
+      manifest.json     -> format, version, count, dim, flags, extra settings
+      embeddings.f32    -> raw float32, row-major (count, dim)
+      triads.f32        -> raw float32, row-major (count, 3)
+      norms.f32         -> raw float32, (count,) L2 norms of the raw embeddings
+      ids.jsonl         -> id table, one JSON-encoded doc id per row
+      metadata.jsonl    -> metadata sidecar, one JSON record per row
+
+Array files are headerless so they can be opened with np.memmap: startup
+is near-instant and several processes reading the same segment share the
+OS page cache. The manifest is written last, so a segment without a
+manifest is an incomplete write and is rejected on open.
+
+The id table is line-delimited (version 2) so a few rows can be read
+back without parsing the whole table; version 1 segments (ids.json, one
+JSON list) are still opened.
+
+Author: GLM Research Team
+Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+
+SEGMENT_FORMAT = "numtriad-segment"
+SEGMENT_VERSION = 2
+
+MANIFEST_FILE = "manifest.json"
+EMBEDDINGS_FILE = "embeddings.f32"
+TRIADS_FILE = "triads.f32"
+NORMS_FILE = "norms.f32"
+IDS_FILE = "ids.jsonl"
+METADATA_FILE = "metadata.jsonl"
+
+
+@dataclass
+class Segment:
+    """Opened segment (arrays are np.memmap when opened with mmap=True)"""
+    path: Path
+    manifest: Dict[str, Any]
+    embeddings: np.ndarray   # (N, D)
+    triads: np.ndarray       # (N, 3)
+    norms: np.ndarray        # (N,)
+    ids: List[str]
+    records: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def count(self) -> int:
+        return int(self.manifest["count"])
+
+    @property
+    def dim(self) -> Optional[int]:
+        return self.manifest.get("dim")
+
+    @property
+    def normalized(self) -> bool:
+        return bool(self.manifest.get("normalized", False))
+
+    @property
+    def extra(self) -> Dict[str, Any]:
+        return self.manifest.get("extra", {})
+
+
+def _replace_atomic(tmp: Path, final: Path) -> None:
+    with open(tmp, "rb+") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp, final)
+
+
+def write_segment(
+    path: Union[str, Path],
+    embeddings: np.ndarray,
+    triads: np.ndarray,
+    norms: np.ndarray,
+    ids: List[str],
+    records: Optional[List[Dict[str, Any]]] = None,
+    normalized: bool = False,
+    extra: Optional[Dict[str, Any]] = None,
+) -> Path:
+    """
+    Write a segment directory.
+
+    Args:
+        path: Segment directory (created if needed, overwritten if present)
+        embeddings: (N, D) embedding rows
+        triads: (N, 3) triad rows
+        norms: (N,) L2 norms of the raw embeddings
+        ids: N doc ids (row order)
+        records: N metadata records (JSON-serializable dicts)
+        normalized: True if embedding rows are L2-normalized
+        extra: Index-specific settings stored in the manifest
+
+    Returns:
+        Segment directory path
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+
+    emb = np.ascontiguousarray(embeddings, dtype="float32")
+    tri = np.ascontiguousarray(triads, dtype="float32").reshape(-1, 3)
+    nrm = np.ascontiguousarray(norms, dtype="float32").reshape(-1)
+    N = len(ids)
+    if records is None:
+        records = [{} for _ in range(N)]
+    if not (emb.shape[0] == tri.shape[0] == nrm.shape[0] == len(records) == N):
+        raise ValueError(
+            f"Segment row count mismatch: embeddings={emb.shape[0]}, triads={tri.shape[0]}, "
+            f"norms={nrm.shape[0]}, ids={N}, records={len(records)}"
+        )
+
+    # Invalidate any previous manifest first: a crash mid-write leaves no manifest
+    manifest_path = path / MANIFEST_FILE
+    if manifest_path.exists():
+        manifest_path.unlink()
+
+    for name, arr in ((EMBEDDINGS_FILE, emb), (TRIADS_FILE, tri), (NORMS_FILE, nrm)):
+        tmp = path / f"{name}.tmp"
+        arr.tofile(tmp)
+        _replace_atomic(tmp, path / name)
+
+    tmp = path / f"{IDS_FILE}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        for doc_id in ids:
+            f.write(json.dumps(str(doc_id), ensure_ascii=False))
+            f.write("\n")
+    _replace_atomic(tmp, path / IDS_FILE)
+
+    tmp = path / f"{METADATA_FILE}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        for rec in records:
+            f.write(json.dumps(rec, default=str, ensure_ascii=False))
+            f.write("\n")
+    _replace_atomic(tmp, path / METADATA_FILE)
+
+    manifest = {
+        "format": SEGMENT_FORMAT,
+        "version": SEGMENT_VERSION,
+        "count": N,
+        "dim": int(emb.shape[1]) if emb.ndim == 2 and N else None,
+        "dtype": "float32",
+        "normalized": bool(normalized),
+        "files": {
+            "embeddings": EMBEDDINGS_FILE,
+            "triads": TRIADS_FILE,
+            "norms": NORMS_FILE,
+            "ids": IDS_FILE,
+            "metadata": METADATA_FILE,
+        },
+        "extra": extra or {},
+    }
+    tmp = path / f"{MANIFEST_FILE}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, default=str)
+    _replace_atomic(tmp, manifest_path)
+    return path
+
+
+def read_manifest(path: Union[str, Path]) -> Dict[str, Any]:
+    """Read and validate a segment manifest"""
+    manifest_path = Path(path) / MANIFEST_FILE
+    if not manifest_path.exists():
+        raise FileNotFoundError(f"Segment manifest not found: {manifest_path}")
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != SEGMENT_FORMAT:
+        raise ValueError(f"Not a NumTriad segment: {path}")
+    if int(manifest.get("version", 0)) > SEGMENT_VERSION:
+        raise ValueError(
+            f"Unsupported segment version {manifest.get('version')} "
+            f"(max supported: {SEGMENT_VERSION})"
+        )
+    return manifest
+
+
+def read_ids(
+    path: Union[str, Path],
+    rows: Optional[List[int]] = None,
+    manifest: Optional[Dict[str, Any]] = None,
+) -> List[str]:
+    """
+    Read the id table of a segment.
+
+    Args:
+        path: Segment directory
+        rows: Row ids to read (None = all rows, in row order)
+        manifest: Already-read manifest (read from path if None)
+
+    Returns:
+        Doc ids, in the order of `rows`
+    """
+    path = Path(path)
+    manifest = read_manifest(path) if manifest is None else manifest
+    file = path / manifest["files"]["ids"]
+    with open(file, "r", encoding="utf-8") as f:
+        if file.suffix != ".jsonl":
+            # version 1: a single JSON list
+            ids = json.load(f)
+            return ids if rows is None else [ids[r] for r in rows]
+        if rows is None:
+            return [json.loads(line) for line in f if line.strip()]
+
+        wanted = set(rows)
+        by_row: Dict[int, str] = {}
+        for i, line in enumerate(f):
+            if i in wanted:
+                by_row[i] = json.loads(line)
+                if len(by_row) == len(wanted):
+                    break
+    return [by_row[r] for r in rows]
+
+
+def _open_array(file: Path, shape: tuple, mmap: bool) -> np.ndarray:
+    if shape[0] == 0:
+        return np.empty(shape, dtype="float32")
+    if mmap:
+        return np.memmap(file, dtype="float32", mode="r", shape=shape)
+    return np.fromfile(file, dtype="float32").reshape(shape)
+
+
+def open_segment(
+    path: Union[str, Path],
+    mmap: bool = True,
+    load_records: bool = True,
+) -> Segment:
+    """
+    Open a segment directory.
+
+    Args:
+        path: Segment directory
+        mmap: Map array files read-only instead of reading them into RAM
+        load_records: Parse the metadata sidecar (skip for vector-only access)
+    """
+    path = Path(path)
+    manifest = read_manifest(path)
+    files = manifest["files"]
+    N = int(manifest["count"])
+    D = int(manifest["dim"] or 0)
+
+    embeddings = _open_array(path / files["embeddings"], (N, D), mmap)
+    triads = _open_array(path / files["triads"], (N, 3), mmap)
+    norms = _open_array(path / files["norms"], (N,), mmap)
+
+    ids = read_ids(path, manifest=manifest)
+
+    records: List[Dict[str, Any]] = []
+    if load_records:
+        with open(path / files["metadata"], "r", encoding="utf-8") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+
+    return Segment(
+        path=path,
+        manifest=manifest,
+        embeddings=embeddings,
+        triads=triads,
+        norms=norms,
+        ids=ids,
+        records=records,
+    )
@@ -0,0 +1,199 @@
+"""
+NumTriad Triad-Simplex Buckets
+==============================
+
+Partition of the indexed rows by their (∆, ∞, Θ) cell on the triad
+simplex (optionally refined by a coarse semantic cluster), with
+per-bucket score bounds for exact early termination.
+
+For a score of the form
+
+    alpha_semantic * cos(q, x) + alpha_triad * (1 - L1(t, target) / 2)
+
+each bucket keeps:
+
+- the bounding box of its triads  -> lower bound on L1(t, target)
+- an anchor direction c and radius r = max ||x/|x| - c||
+                                   -> cos(q, x) <= q/|q| . c + r
+
+Buckets are visited by decreasing upper bound. Once the best buckets
+hold k rows, their k-th best score is a threshold: only buckets whose
+bound reaches it can still contribute, and they are scored in one pass.
+Results are identical to a full scan.
+
+Author: GLM Research Team
+Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .ivf import spherical_kmeans
+
+
+class TriadBuckets:
+    """
+    Triad-simplex cells over VectorStore rows (row ids only).
+
+    A cell is (floor(∆ * resolution), floor(∞ * resolution)); Θ is implied
+    by the simplex constraint. Bounds are computed from the actual members,
+    so unnormalized triads remain correct (only less well bucketed).
+
+    With `centroids` (spherical k-means, see train()), each triad cell is
+    split by nearest semantic centroid, which keeps the cosine bound tight.
+    """
+
+    def __init__(self, resolution: int = 4, centroids: Optional[np.ndarray] = None):
+        if resolution < 1:
+            raise ValueError(f"resolution must be >= 1, got {resolution}")
+        self.resolution = int(resolution)
+        self.centroids = centroids                   # (C, D) unit vectors, or None
+        self._cells: Dict[Tuple[int, int, int], int] = {}
+        self._rows: List[List[int]] = []
+        self._row_cache: List[Optional[np.ndarray]] = []
+        self._lo: List[np.ndarray] = []        # per-bucket triad min (3,)
+        self._hi: List[np.ndarray] = []        # per-bucket triad max (3,)
+        self._anchor: List[np.ndarray] = []    # per-bucket unit-vector anchor (D,)
+        self._radius: List[float] = []
+        self._anchor_size: List[int] = []      # bucket size when the anchor was computed
+        self._bound_cache: Optional[Tuple[np.ndarray, ...]] = None
+        self._stale: set = set()                # buckets whose anchor should be re-centered
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def n_buckets(self) -> int:
+        return len(self._rows)
+
+    def train(self, unit_embeddings: np.ndarray, n_clusters: int, seed: int = 0) -> None:
+        """Fit the semantic centroids used to split each triad cell"""
+        self.centroids = spherical_kmeans(unit_embeddings, n_clusters, seed=seed)
+
+    def cell_of(self, unit_embeddings: np.ndarray, triads: np.ndarray) -> np.ndarray:
+        """(B, D), (B, 3) -> (B, 3) integer cells (∆ bin, ∞ bin, semantic cluster)"""
+        cells = np.zeros((triads.shape[0], 3), dtype=np.int64)
+        tri = np.floor(np.asarray(triads, dtype="float32")[:, :2] * self.resolution)
+        cells[:, :2] = np.clip(tri, 0, self.resolution - 1)
+        if self.centroids is not None:
+            cells[:, 2] = np.argmax(unit_embeddings @ self.centroids.T, axis=1)
+        return cells
+
+    def add(self, unit_embeddings: np.ndarray, triads: np.ndarray, rows: np.ndarray) -> None:
+        """
+        Add rows to their cells.
+
+        Args:
+            unit_embeddings: (B, D) L2-normalized embeddings
+            triads: (B, 3)
+            rows: (B,) row ids
+        """
+        unit = np.atleast_2d(np.asarray(unit_embeddings, dtype="float32"))
+        triads = np.atleast_2d(np.asarray(triads, dtype="float32"))
+        rows = np.asarray(rows, dtype=np.int64).reshape(-1)
+        if rows.size == 0:
+            return
+
+        cells = self.cell_of(unit, triads)
+        _, keys = np.unique(cells, axis=0, return_inverse=True)
+        keys = keys.reshape(-1)
+        order = np.argsort(keys, kind="stable")
+        bounds = np.flatnonzero(np.diff(keys[order])) + 1
+        for sel in np.split(order, bounds):
+            cell = tuple(int(v) for v in cells[sel[0]])
+            b = self._cells.get(cell)
+            if b is None:
+                b = self._new_bucket(cell, unit[sel], triads[sel])
+            self._rows[b].extend(rows[sel].tolist())
+            self._row_cache[b] = None
+            self._lo[b] = np.minimum(self._lo[b], triads[sel].min(axis=0))
+            self._hi[b] = np.maximum(self._hi[b], triads[sel].max(axis=0))
+            dist = np.linalg.norm(unit[sel] - self._anchor[b], axis=1)
+            self._radius[b] = max(self._radius[b], float(dist.max()))
+            if len(self._rows[b]) >= 2 * self._anchor_size[b]:
+                self._stale.add(b)
+        self._size += rows.size
+        self._bound_cache = None
+
+    def _new_bucket(self, cell: Tuple[int, int, int], unit: np.ndarray, triads: np.ndarray) -> int:
+        b = len(self._rows)
+        self._cells[cell] = b
+        self._rows.append([])
+        self._row_cache.append(None)
+        self._lo.append(triads.min(axis=0))
+        self._hi.append(triads.max(axis=0))
+        self._anchor.append(unit.mean(axis=0))
+        self._radius.append(0.0)
+        self._anchor_size.append(len(unit))
+        return b
+
+    def refresh_anchors(self, unit_rows: Callable[[np.ndarray], np.ndarray]) -> None:
+        """
+        Re-center the anchors of buckets that doubled in size since their
+        anchor was computed (tightens the semantic bound). Mutates the
+        bounds: call it with add(), under the same (write) lock.
+
+        Args:
+            unit_rows: Returns the (B, D) L2-normalized embeddings of row ids
+        """
+        for b in sorted(self._stale):
+            n = len(self._rows[b])
+            unit = unit_rows(self.rows(b))
+            anchor = unit.mean(axis=0)
+            self._anchor[b] = anchor
+            self._radius[b] = float(np.linalg.norm(unit - anchor, axis=1).max())
+            self._anchor_size[b] = n
+            self._bound_cache = None
+        self._stale.clear()
+
+    def bucket_sizes(self) -> np.ndarray:
+        return np.asarray([len(r) for r in self._rows], dtype=np.int64)
+
+    def rows(self, b: int) -> np.ndarray:
+        arr = self._row_cache[b]
+        if arr is None:
+            arr = np.asarray(self._rows[b], dtype=np.int64)
+            self._row_cache[b] = arr
+        return arr
+
+    def upper_bounds(
+        self,
+        query_unit: np.ndarray,
+        target_triad: np.ndarray,
+        alpha_semantic: float,
+        alpha_triad: float,
+    ) -> np.ndarray:
+        """Upper bound of the combined score for every bucket, (n_buckets,)"""
+        if not self.n_buckets:
+            return np.empty((0,), dtype="float32")
+        # local reference: concurrent readers may each fill the cache
+        cache = self._bound_cache
+        if cache is None:
+            cache = (
+                np.stack(self._lo),
+                np.stack(self._hi),
+                np.stack(self._anchor),
+                np.asarray(self._radius, dtype="float32"),
+            )
+            self._bound_cache = cache
+        lo, hi, anchors, radius = cache
+        t = np.asarray(target_triad, dtype="float32")
+        l1_min = (np.maximum(lo - t, 0.0) + np.maximum(t - hi, 0.0)).sum(axis=1)
+        cos_max = anchors @ query_unit + radius
+        cos_max = np.clip(cos_max, -1.0, 1.0)
+        return alpha_semantic * cos_max + alpha_triad * (1.0 - l1_min / 2.0)
+
+    def stats(self) -> Dict[str, float]:
+        sizes = self.bucket_sizes()
+        return {
+            "resolution": self.resolution,
+            "clusters": 0 if self.centroids is None else int(self.centroids.shape[0]),
+            "buckets": self.n_buckets,
+            "rows": self._size,
+            "max_bucket": int(sizes.max()) if sizes.size else 0,
+            "mean_radius": float(np.mean(self._radius)) if self._radius else 0.0,
+        }
@@ -0,0 +1,207 @@
+"""
+NumTriad Vector Store
+=====================
+
+Growable, contiguous float32 storage backing the RAG indexes.
+
+Each row holds:
+  - embedding  (D,)  float32
+  - triad      (3,)  float32 - ∆, ∞, Θ
+  - norm       ()    float32 - L2 norm of the raw embedding
+
+Rows live in preallocated buffers whose capacity doubles when full, so
+appends are amortized O(batch) and scoring is a single BLAS matmul over
+a contiguous block instead of a Python loop over documents.
+
+Author: GLM Research Team
+Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+from typing import Optional
+
+import numpy as np
+
+
+class VectorStore:
+    """
+    Append-only matrix of embeddings + triads with cached norms.
+
+    If `normalize=True`, rows are L2-normalized at ingest time and the
+    raw norms are kept in `norms` (cosine then reduces to a dot product).
+    """
+
+    def __init__(
+        self,
+        dim: Optional[int] = None,
+        normalize: bool = False,
+        initial_capacity: int = 64,
+    ):
+        self.dim = dim
+        self.normalize = normalize
+        self._initial_capacity = max(1, int(initial_capacity))
+        self._size = 0
+        self._capacity = 0
+        self._emb: Optional[np.ndarray] = None     # (cap, D)
+        self._triads: Optional[np.ndarray] = None  # (cap, 3)
+        self._norms: Optional[np.ndarray] = None   # (cap,)
+
+    def __len__(self) -> int:
+        return self._size
+
+    @classmethod
+    def from_arrays(
+        cls,
+        embeddings: np.ndarray,
+        triads: np.ndarray,
+        norms: np.ndarray,
+        normalize: bool = False,
+    ) -> "VectorStore":
+        """
+        Wrap existing arrays (e.g. read-only np.memmap views of a segment)
+        without copying. The first append past capacity copies into RAM.
+        """
+        store = cls(dim=embeddings.shape[1] if embeddings.ndim == 2 else None, normalize=normalize)
+        n = embeddings.shape[0]
+        if n:
+            store._emb, store._triads, store._norms = embeddings, triads, norms
+            store._size = store._capacity = n
+        return store
+
+    def take(self, rows: np.ndarray) -> "VectorStore":
+        """New in-RAM store holding a copy of the given rows (in order)"""
+        rows = np.asarray(rows, dtype=np.int64)
+        store = VectorStore(dim=self.dim, normalize=self.normalize, initial_capacity=self._initial_capacity)
+        if rows.size:
+            store._reserve(rows.size)
+            store._emb[: rows.size] = self.embeddings[rows]
+            store._triads[: rows.size] = self.triads[rows]
+            store._norms[: rows.size] = self.norms[rows]
+            store._size = rows.size
+        return store
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def embeddings(self) -> np.ndarray:
+        """(N, D) view of the stored embeddings"""
+        if self._emb is None:
+            return np.empty((0, self.dim or 0), dtype="float32")
+        return self._emb[: self._size]
+
+    @property
+    def triads(self) -> np.ndarray:
+        """(N, 3) view of the stored triads"""
+        if self._triads is None:
+            return np.empty((0, 3), dtype="float32")
+        return self._triads[: self._size]
+
+    @property
+    def norms(self) -> np.ndarray:
+        """(N,) view of the raw embedding norms"""
+        if self._norms is None:
+            return np.empty((0,), dtype="float32")
+        return self._norms[: self._size]
+
+    def _reserve(self, n: int) -> None:
+        """Grow buffers (capacity doubling) so that at least n rows fit"""
+        if n <= self._capacity:
+            return
+        new_cap = max(self._initial_capacity, self._capacity)
+        while new_cap < n:
+            new_cap *= 2
+
+        emb = np.empty((new_cap, self.dim), dtype="float32")
+        triads = np.empty((new_cap, 3), dtype="float32")
+        norms = np.empty((new_cap,), dtype="float32")
+        if self._size:
+            emb[: self._size] = self._emb[: self._size]
+            triads[: self._size] = self._triads[: self._size]
+            norms[: self._size] = self._norms[: self._size]
+
+        self._emb, self._triads, self._norms = emb, triads, norms
+        self._capacity = new_cap
+
+    def append(self, embeddings: np.ndarray, triads: np.ndarray) -> np.ndarray:
+        """
+        Append a batch of rows.
+
+        Args:
+            embeddings: (B, D) or (D,)
+            triads: (B, 3) or (3,)
+
+        Returns:
+            Row indices (B,) assigned to the new rows
+        """
+        emb = np.asarray(embeddings, dtype="float32")
+        tri = np.asarray(triads, dtype="float32")
+        if emb.ndim == 1:
+            emb = emb.reshape(1, -1)
+        if tri.ndim == 1:
+            tri = tri.reshape(1, -1)
+        if emb.shape[0] != tri.shape[0]:
+            raise ValueError(
+                f"Batch size mismatch: {emb.shape[0]} embeddings, {tri.shape[0]} triads"
+            )
+        if tri.shape[1] != 3:
+            raise ValueError(f"Triads must have 3 components, got {tri.shape[1]}")
+
+        if self.dim is None:
+            self.dim = emb.shape[1]
+        elif emb.shape[1] != self.dim:
+            raise ValueError(
+                f"Embedding dimension mismatch: {emb.shape[1]} != {self.dim}"
+            )
+
+        B = emb.shape[0]
+        start = self._size
+        self._reserve(start + B)
+
+        norms = np.linalg.norm(emb, axis=1).astype("float32")
+        if self.normalize:
+            emb = emb / (norms[:, None] + 1e-8)
+
+        self._emb[start : start + B] = emb
+        self._triads[start : start + B] = tri
+        self._norms[start : start + B] = norms
+        self._size = start + B
+        return np.arange(start, start + B)
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k highest scores, sorted by decreasing score.
+
+    Uses argpartition (O(N)) then sorts only the k survivors.
+    """
+    n = scores.shape[0]
+    if k <= 0 or n == 0:
+        return np.empty((0,), dtype=np.int64)
+    if k < n:
+        part = np.argpartition(-scores, k - 1)[:k]
+    else:
+        part = np.arange(n)
+    order = np.argsort(-scores[part], kind="stable")
+    return part[order]
+
+
+def top_k_indices_2d(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Row-wise top_k_indices for a (Q, N) score matrix.
+
+    Returns:
+        (Q, min(k, N)) column indices, each row sorted by decreasing score
+    """
+    Q, n = scores.shape
+    k = min(k, n)
+    if k <= 0:
+        return np.empty((Q, 0), dtype=np.int64)
+    if k < n:
+        part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        part = np.broadcast_to(np.arange(n), (Q, n))
+    order = np.argsort(-np.take_along_axis(scores, part, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(part, order, axis=1)
@@ -0,0 +1,253 @@
+"""
+NumTriad Out-of-Core Streaming Search
+=====================================
+
+Exact top-k over a saved segment (see numtriad.index.segment) whose
+matrices do not fit in RAM:
+
+  - BlockReader reads the embedding / triad / norm files in blocks of
+    `block_rows` rows. A background thread reads up to `prefetch` blocks
+    ahead, so disk reads overlap with scoring.
+  - each block is scored with one matrix-vector product (BLAS) by a
+    caller-supplied function, so every index keeps its own formula
+  - RunningTopK keeps the best k (row, score) pairs seen so far. A block
+    is first cut to the rows above the current k-th score, then to its
+    own top-k (argpartition), and merged with the running k
+
+Peak memory is about (prefetch + 2) blocks plus k results, whatever the
+corpus size. Deleted rows (tombstones sidecar) never rank. Only the k
+winning rows are read back for the results (ids, metadata, vectors).
+
+Author: GLM Research Team
+Date: 2026-10-18
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import queue
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, Union
+
+import numpy as np
+
+from .compaction import TOMBSTONES_FILE
+from .segment import read_ids, read_manifest
+from .store import top_k_indices
+
+
+# (embeddings (B, D), triads (B, 3), norms (B,)) -> scores (B,)
+BlockScorer = Callable[[np.ndarray, np.ndarray, np.ndarray], np.ndarray]
+
+_END = object()
+
+
+class BlockReader:
+    """
+    Iterates (start row, embeddings, triads, norms) blocks of a segment,
+    read ahead by a background thread.
+
+    Args:
+        path: Segment directory
+        block_rows: Rows per block
+        prefetch: Blocks read ahead of the consumer (>= 1)
+    """
+
+    def __init__(self, path: Union[str, Path], block_rows: int = 65536, prefetch: int = 2):
+        if block_rows < 1:
+            raise ValueError(f"block_rows must be >= 1, got {block_rows}")
+        self.path = Path(path)
+        self.manifest = read_manifest(self.path)
+        self.count = int(self.manifest["count"])
+        self.dim = int(self.manifest["dim"] or 0)
+        self.block_rows = int(block_rows)
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, prefetch))
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        """Number of blocks"""
+        return -(-self.count // self.block_rows)
+
+    def _open(self, key: str):
+        f = open(self.path / self.manifest["files"][key], "rb", buffering=0)
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        return f
+
+    @staticmethod
+    def _read(f, shape: Tuple[int, ...]) -> np.ndarray:
+        arr = np.empty(shape, dtype="float32")
+        view = memoryview(arr.reshape(-1)).cast("B")
+        pos = 0
+        while pos < len(view):
+            n = f.readinto(view[pos:])
+            if not n:
+                raise EOFError(f"Segment file {f.name} is shorter than its manifest")
+            pos += n
+        return arr
+
+    def _put(self, item: Any) -> bool:
+        """Queue an item unless the consumer stopped (False then)"""
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self) -> None:
+        try:
+            with self._open("embeddings") as emb_f, self._open("triads") as tri_f, \
+                    self._open("norms") as nrm_f:
+                for start in range(0, self.count, self.block_rows):
+                    B = min(self.block_rows, self.count - start)
+                    block = (
+                        start,
+                        self._read(emb_f, (B, self.dim)),
+                        self._read(tri_f, (B, 3)),
+                        self._read(nrm_f, (B,)),
+                    )
+                    if not self._put(block):
+                        return
+        except Exception as e:
+            self._put(e)
+            return
+        self._put(_END)
+
+    def __iter__(self) -> Iterator[Tuple[int, np.ndarray, np.ndarray, np.ndarray]]:
+        if self._thread is not None:
+            raise RuntimeError("BlockReader can only be iterated once")
+        self._thread = threading.Thread(target=self._run, name="numtriad-block-reader", daemon=True)
+        self._thread.start()
+        try:
+            while True:
+                item = self._queue.get()
+                if item is _END:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Stop the reader thread (also called when iteration ends)"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+
+class RunningTopK:
+    """Best k (row, score) pairs over successive candidate blocks"""
+
+    def __init__(self, k: int):
+        self.k = int(k)
+        self.rows = np.empty((0,), dtype=np.int64)
+        self.scores = np.empty((0,), dtype="float32")
+
+    @property
+    def threshold(self) -> float:
+        """Score a candidate must beat to enter (-inf until k are held)"""
+        return float(self.scores[-1]) if self.scores.shape[0] >= self.k else -np.inf
+
+    def push(self, rows: np.ndarray, scores: np.ndarray) -> None:
+        if self.k <= 0:
+            return
+        keep = np.isfinite(scores) & (scores > self.threshold)
+        if not keep.any():
+            return
+        rows, scores = rows[keep], scores[keep]
+        idxs = top_k_indices(scores, self.k)
+        rows = np.concatenate([self.rows, rows[idxs]])
+        scores = np.concatenate([self.scores, scores[idxs].astype("float32")])
+        idxs = top_k_indices(scores, self.k)
+        self.rows, self.scores = rows[idxs], scores[idxs]
+
+    def result(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(rows, scores) sorted by decreasing score"""
+        return self.rows, self.scores
+
+
+def _dead_rows(path: Path) -> np.ndarray:
+    """Sorted deleted row ids of a segment"""
+    file = path / TOMBSTONES_FILE
+    if not file.exists():
+        return np.empty((0,), dtype=np.int64)
+    return np.sort(np.load(file).astype(np.int64))
+
+
+def stream_top_k(
+    path: Union[str, Path],
+    score_block: BlockScorer,
+    k: int,
+    block_rows: int = 65536,
+    prefetch: int = 2,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Exact top-k of a segment, streamed block by block from disk.
+
+    Args:
+        path: Segment directory
+        score_block: Scores of a block, see BlockScorer
+        k: Number of results
+        block_rows: Rows read and scored at a time
+        prefetch: Blocks read ahead by the reader thread
+
+    Returns:
+        (rows, scores) sorted by decreasing score (deleted rows skipped)
+    """
+    path = Path(path)
+    dead = _dead_rows(path)
+    top = RunningTopK(k)
+    for start, emb, triads, norms in BlockReader(path, block_rows, prefetch):
+        scores = np.asarray(score_block(emb, triads, norms), dtype="float32")
+        end = start + scores.shape[0]
+        lo, hi = np.searchsorted(dead, [start, end])
+        if hi > lo:
+            scores[dead[lo:hi] - start] = -np.inf
+        top.push(np.arange(start, end), scores)
+    return top.result()
+
+
+def read_rows(path: Union[str, Path], rows: np.ndarray) -> Dict[str, Any]:
+    """
+    Read back a few rows of a segment without loading it.
+
+    Returns:
+        {"ids": [...], "records": [...], "embeddings": (n, D), "triads": (n, 3)}
+        in the order of `rows`
+    """
+    path = Path(path)
+    manifest = read_manifest(path)
+    files = manifest["files"]
+    N, D = int(manifest["count"]), int(manifest["dim"] or 0)
+    rows = np.asarray(rows, dtype=np.int64)
+
+    ids = read_ids(path, rows.tolist(), manifest=manifest)
+
+    wanted = set(rows.tolist())
+    by_row: Dict[int, Dict[str, Any]] = {}
+    with open(path / files["metadata"], "r", encoding="utf-8") as f:
+        for i, line in enumerate(f):
+            if i in wanted:
+                by_row[i] = json.loads(line)
+                if len(by_row) == len(wanted):
+                    break
+
+    if N and rows.size:
+        embeddings = np.array(np.memmap(path / files["embeddings"], dtype="float32", mode="r", shape=(N, D))[rows])
+        triads = np.array(np.memmap(path / files["triads"], dtype="float32", mode="r", shape=(N, 3))[rows])
+    else:
+        embeddings = np.empty((rows.size, D), dtype="float32")
+        triads = np.empty((rows.size, 3), dtype="float32")
+
+    return {
+        "ids": ids,
+        "records": [by_row.get(r, {}) for r in rows.tolist()],
+        "embeddings": embeddings,
+        "triads": triads,
+    }
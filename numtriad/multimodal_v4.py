@@ -107,6 +107,38 @@ class Triad:
 # 3. BASE ENCODERS (Stubs / Light)
 # ============================================================================
 
+def char_histograms(texts: List[str], max_chars: int, bins: int = 128) -> np.ndarray:
+    """
+    L2-normalized histograms of (codepoint % bins) over the first
+    max_chars characters of each string, for a whole batch at once.
+
+    The truncated strings are joined into one flat codepoint array
+    (ASCII bytes, or UCS4 codepoints), and all rows are counted with a
+    single np.bincount over (row * bins + bin). Output matches the
+    per-character loop exactly.
+
+    Returns:
+        (N, bins) float32
+    """
+    truncated = [t[:max_chars] for t in texts]
+    n = len(truncated)
+    lengths = np.fromiter(map(len, truncated), dtype=np.intp, count=n)
+    joined = "".join(truncated)
+
+    # flat bin index: row offset (row * bins) + codepoint bin
+    flat = np.repeat(np.arange(0, n * bins, bins, dtype=np.intp), lengths)
+    if joined.isascii():
+        codes = np.frombuffer(joined.encode("ascii"), dtype=np.uint8)
+        flat += codes if bins >= 128 else codes % bins
+    else:
+        # numpy unicode arrays are UCS4: viewed as uint32, they are the codepoints
+        codes = np.array(joined).reshape(1).view(np.uint32)
+        flat += codes % bins
+
+    v = np.bincount(flat, minlength=n * bins).reshape(n, bins).astype("float32")
+    return v / (np.linalg.norm(v, axis=1, keepdims=True) + 1e-8)
+
+
 class SimpleTextEncoder(nn.Module):
     """
     Stub text encoder.
@@ -127,15 +159,12 @@ class SimpleTextEncoder(nn.Module):
         Returns:
             Tensor of shape (N, dim_out)
         """
-        batch = []
-        for t in texts:
-            v = np.zeros(128, dtype="float32")
-            for c in t[:256]:
-                v[ord(c) % 128] += 1.0
-            v = v / (np.linalg.norm(v) + 1e-8)
-            batch.append(v)
-        arr = torch.tensor(np.stack(batch, axis=0), dtype=torch.float32)
-        return self.proj(arr)
+        return self.proj(self.featurize(texts))
+
+    @staticmethod
+    def featurize(texts: List[str]) -> torch.Tensor:
+        """(N, 128) char histograms (NumPy preprocessing, kept out of exported graphs)"""
+        return torch.from_numpy(char_histograms(texts, max_chars=256))
 
 
 class SimpleCodeEncoder(nn.Module):
@@ -158,15 +187,12 @@ class SimpleCodeEncoder(nn.Module):
         Returns:
             Tensor of shape (N, dim_out)
         """
-        batch = []
-        for t in codes:
-            v = np.zeros(128, dtype="float32")
-            for c in t[:512]:
-                v[ord(c) % 128] += 1.0
-            v = v / (np.linalg.norm(v) + 1e-8)
-            batch.append(v)
-        arr = torch.tensor(np.stack(batch, axis=0), dtype=torch.float32)
-        return self.proj(arr)
+        return self.proj(self.featurize(codes))
+
+    @staticmethod
+    def featurize(codes: List[str]) -> torch.Tensor:
+        """(N, 128) char histograms (NumPy preprocessing, kept out of exported graphs)"""
+        return torch.from_numpy(char_histograms(codes, max_chars=512))
 
 
 class SimpleVisionEncoder(nn.Module):
@@ -425,17 +451,17 @@ class NumTriadMultimodalV4(nn.Module):
     # Helpers
     # -----------------------------------------------------------------------
 
-    def _encode_text(self, texts: Optional[List[str]]) -> Optional[torch.Tensor]:
-        """Encode text modality."""
-        if texts is None or len(texts) == 0:
+    def _encode_text(self, text_feats: Optional[torch.Tensor]) -> Optional[torch.Tensor]:
+        """Encode text modality (from SimpleTextEncoder.featurize features)."""
+        if text_feats is None:
             return None
-        return self.text_proj(self.text_encoder(texts))
+        return self.text_proj(self.text_encoder.proj(text_feats))
 
-    def _encode_code(self, codes: Optional[List[str]]) -> Optional[torch.Tensor]:
-        """Encode code modality."""
-        if codes is None or len(codes) == 0:
+    def _encode_code(self, code_feats: Optional[torch.Tensor]) -> Optional[torch.Tensor]:
+        """Encode code modality (from SimpleCodeEncoder.featurize features)."""
+        if code_feats is None:
             return None
-        return self.code_proj(self.code_encoder(codes))
+        return self.code_proj(self.code_encoder.proj(code_feats))
 
     def _encode_vision(self, images: Optional[torch.Tensor]) -> Optional[torch.Tensor]:
         """Encode vision modality."""
@@ -449,6 +475,65 @@ class NumTriadMultimodalV4(nn.Module):
             return None
         return self.audio_proj(self.audio_encoder(audio_feats))
 
+    def featurize(
+        self,
+        texts: Optional[List[str]] = None,
+        codes: Optional[List[str]] = None,
+    ) -> Tuple[Optional[torch.Tensor], Optional[torch.Tensor]]:
+        """
+        Preprocessing of the string modalities (outside the tensor graph).
+
+        Returns:
+            (text_feats (B, 128) or None, code_feats (B, 128) or None)
+        """
+        text_feats = self.text_encoder.featurize(texts) if texts else None
+        code_feats = self.code_encoder.featurize(codes) if codes else None
+        return text_feats, code_feats
+
+    def forward_features(
+        self,
+        text_feats: Optional[torch.Tensor] = None,
+        images: Optional[torch.Tensor] = None,
+        code_feats: Optional[torch.Tensor] = None,
+        audio_feats: Optional[torch.Tensor] = None,
+    ) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+        """
+        Tensor-only part of the forward pass (what gets traced / exported).
+
+        Returns:
+            - embedding: Tensor (B, dim_proj + 3 + dim_t_cross)
+            - triad_probs: Tensor (B, 3)
+            - triad_logits: Tensor (B, 3)
+        """
+        # 1. Encode each modality
+        v_text = self._encode_text(text_feats)
+        v_code = self._encode_code(code_feats)
+        v_vision = self._encode_vision(images)
+        v_audio = self._encode_audio(audio_feats)
+
+        present = [v for v in (v_text, v_code, v_vision, v_audio) if v is not None]
+        if not present:
+            raise ValueError("NumTriadMultimodalV4: at least one modality must be provided")
+
+        # 2. Fuse modalities -> v_semantic
+        v_mean = present[0]
+        for v in present[1:]:
+            v_mean = v_mean + v
+        v_mean = v_mean / len(present)
+        v_semantic = self.fusion(v_mean)  # (B, dim_proj)
+
+        # 3. Predict triad
+        triad_logits = self.triad_head(v_semantic)       # (B, 3)
+        triad_probs = F.softmax(triad_logits, dim=-1)    # (B, 3)
+
+        # 4. Cross-modal coherence
+        T_cross = self.cross_head(v_text, v_vision, v_code, v_audio)  # (B, dim_t_cross)
+
+        # 5. Final embedding concatenation
+        embedding = torch.cat([v_semantic, triad_probs, T_cross], dim=-1)
+        # Shape: (B, dim_proj + 3 + dim_t_cross)
+        return embedding, triad_probs, triad_logits
+
     # -----------------------------------------------------------------------
     # Main API
     # -----------------------------------------------------------------------
@@ -479,41 +564,14 @@ class NumTriadMultimodalV4(nn.Module):
         device = torch.device(self.cfg.device)
         self.to(device)
 
-        # 1. Encode each modality
-        v_text = self._encode_text(texts)
-        v_code = self._encode_code(codes)
-        v_vision = self._encode_vision(images)
-        v_audio = self._encode_audio(audio_feats)
-
-        # Determine batch size
-        B = None
-        for v in [v_text, v_code, v_vision, v_audio]:
-            if v is not None:
-                B = v.size(0)
-                break
-        if B is None:
-            raise ValueError("NumTriadMultimodalV4: at least one modality must be provided")
-
-        # 2. Fuse modalities -> v_semantic
-        sum_vec = torch.zeros(B, self.cfg.dim_proj, device=device)
-        count = 0
-        for v in [v_text, v_code, v_vision, v_audio]:
-            if v is not None:
-                sum_vec = sum_vec + v
-                count += 1
-        v_mean = sum_vec / max(count, 1)
-        v_semantic = self.fusion(v_mean)  # (B, dim_proj)
-
-        # 3. Predict triad
-        triad_logits = self.triad_head(v_semantic)       # (B, 3)
-        triad_probs = F.softmax(triad_logits, dim=-1)    # (B, 3)
-
-        # 4. Cross-modal coherence
-        T_cross = self.cross_head(v_text, v_vision, v_code, v_audio)  # (B, dim_t_cross)
-
-        # 5. Final embedding concatenation
-        embedding = torch.cat([v_semantic, triad_probs, T_cross], dim=-1)
-        # Shape: (B, dim_proj + 3 + dim_t_cross)
+        text_feats, code_feats = self.featurize(texts, codes)
+        embedding, triad_probs, triad_logits = self.forward_features(
+            text_feats=text_feats.to(device) if text_feats is not None else None,
+            images=images,
+            code_feats=code_feats.to(device) if code_feats is not None else None,
+            audio_feats=audio_feats,
+        )
+        B = embedding.size(0)
 
         triad_objs = None
         if return_triad_objects:
@@ -10,17 +10,48 @@ Author: GLM Research Team
 Date: 2024-11-16
 """
 
+import threading
 from dataclasses import dataclass
-from typing import List, Dict, Any, Optional, Literal, Tuple
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Literal, Tuple, Union
 
 import numpy as np
 
 from ..triad_types import Triad
 from ..config import NumTriadConfig
 from ..encoders.numtriad_v3 import NumTriadEmbeddingV3, NumTriadV3Config, TriadTargetMode
-
-
-RetrievalMode = Literal["cosine", "triad_weighted"]
+from ..index import (
+    VectorStore,
+    IVFIndex,
+    HNSWIndex,
+    CompressedIndex,
+    memory_report,
+    top_k_indices,
+    top_k_indices_2d,
+    write_segment,
+    open_segment,
+    ann_kind,
+    save_ann,
+    load_ann,
+    rebuild_ann,
+    Tombstones,
+    ReadWriteLock,
+    remap_rows,
+    save_tombstones,
+    load_tombstones,
+    MultiVectorStore,
+    MinHashLSH,
+    stream_top_k,
+    read_rows,
+)
+from ..utils.metrics import recall_at_k
+
+
+RetrievalMode = Literal["cosine", "triad_weighted", "maxsim"]
+DedupPolicy = Literal["skip", "merge", "link"]
+
+# nombre max de scores (floats) par bloc de search_batch : Q_bloc * N <= budget
+BATCH_SCORE_BUDGET = 1 << 24
 
 
 @dataclass
@@ -39,6 +70,24 @@ class DeepTriadRAGIndex:
       - indexe des documents avec NumTriadEmbeddingV3
       - recherche par similarité + distance triadique
       - permet de contrôler le niveau d'abstraction de la réponse
+
+    Les doc_id sont uniques : delete() marque la ligne (tombstone, masquée
+    au scoring), ré-ajouter un id existant le remplace (upsert). Au-delà
+    de compaction_threshold lignes supprimées, compact() reconstruit les
+    lignes vivantes en tâche de fond sans bloquer les recherches.
+
+    Avec multi_vector=True, l'index garde aussi chaque embedding de chunk
+    (numtriad.index.multivector) : le mode "maxsim" score alors les
+    documents par MaxSim sur les chunks de la question (late interaction),
+    au lieu du seul embedding moyen.
+
+    Avec dedup="skip" | "merge" | "link", add_documents() repère les
+    quasi-doublons avant l'encodage (MinHash + LSH, numtriad.index.dedup) :
+      - skip  : le doublon est ignoré (pas encodé)
+      - merge : pas encodé, son id et ses meta absentes sont fusionnés dans
+                meta["merged"] du document déjà indexé
+      - link  : indexé quand même, avec meta["duplicate_of"] = id de l'original
+    Les signatures sont sauvegardées avec l'index.
     """
 
     def __init__(
@@ -47,6 +96,12 @@ class DeepTriadRAGIndex:
         v3_config: NumTriadV3Config,
         retrieval_mode: RetrievalMode = "triad_weighted",
         triad_weight: float = 0.3,
+        compaction_threshold: float = 0.3,
+        auto_compact: bool = True,
+        multi_vector: bool = False,
+        dedup: Optional[DedupPolicy] = None,
+        dedup_threshold: float = 0.8,
+        dedup_params: Optional[Dict[str, Any]] = None,
     ):
         self.cfg = base_config
         self.v3_cfg = v3_config
@@ -55,18 +110,48 @@ class DeepTriadRAGIndex:
         self.triad_weight = triad_weight
 
         self.docs: List[DeepTriadDocument] = []
-        self.emb_matrix: Optional[np.ndarray] = None  # (N,dim+3)
+        # buffer préalloué (capacité doublée), lignes normalisées à l'ingestion
+        self._store = VectorStore(normalize=True)
+        # index ANN optionnel (IVFIndex / HNSWIndex / CompressedIndex) : candidats à re-scorer
+        self.ann = None
+        # chunks de chaque document (mode "maxsim"), lignes alignées sur _store
+        self.chunks: Optional[MultiVectorStore] = MultiVectorStore() if multi_vector else None
+
+        # détection des quasi-doublons à l'ingestion (dedup_params : num_perm, bands, shingle_size, seed)
+        self.dedup = dedup
+        self.lsh: Optional[MinHashLSH] = (
+            MinHashLSH(threshold=dedup_threshold, **(dedup_params or {})) if dedup else None
+        )
+        self.dedup_stats = {"skipped": 0, "merged": 0, "linked": 0}
+
+        # suppressions logiques + compaction (voir numtriad.index.compaction)
+        self._id_to_row: Dict[str, int] = {}  # doc_id vivant -> ligne
+        self._tombstones = Tombstones()
+        self._lock = ReadWriteLock()
+        self._next_id = 0  # compteur des ids auto "doc_<n>" (jamais réutilisés)
+        self.compaction_threshold = compaction_threshold
+        self.auto_compact = auto_compact
+        self._compaction: Optional[Dict[str, Any]] = None  # instantané d'une compaction en cours
+        self._compaction_thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        """Nombre de documents vivants (hors suppressions)"""
+        return len(self.docs) - self._tombstones.count
+
+    @property
+    def dead_fraction(self) -> float:
+        return self._tombstones.count / len(self.docs) if self.docs else 0.0
 
     # -----------------------
     # gestion index
     # -----------------------
 
-    def _rebuild_matrix(self):
-        """Reconstruit la matrice d'embeddings"""
-        if not self.docs:
-            self.emb_matrix = None
-            return
-        self.emb_matrix = np.stack([d.embedding for d in self.docs], axis=0)
+    @property
+    def emb_matrix(self) -> Optional[np.ndarray]:
+        """Matrice (N,dim+3) des embeddings normalisés (vue sur le buffer, lignes supprimées incluses)"""
+        if not len(self._store):
+            return None
+        return self._store.embeddings
 
     def add_documents(
         self,
@@ -75,21 +160,72 @@ class DeepTriadRAGIndex:
         ids: Optional[List[str]] = None,
         triad_mode: TriadTargetMode = "auto",
     ):
-        """Ajoute des documents à l'index"""
+        """
+        Ajoute des documents à l'index.
+        Un id déjà indexé est remplacé (l'ancienne ligne est supprimée).
+        Avec dedup, les quasi-doublons sont traités avant l'encodage (voir la classe).
+        """
         N = len(texts)
         if metadatas is None:
             metadatas = [{} for _ in range(N)]
-        if ids is None:
-            ids = [f"doc_{len(self.docs) + i}" for i in range(N)]
 
-        enriched, triads = self.encoder.encode(
-            texts,
-            triad_mode=triad_mode,
-            return_raw=False,
-        )  # enriched: (N,dim+3)
+        # quasi-doublons : signatures MinHash + LSH, avant tout encodage
+        duplicates: List[Optional[Tuple[Any, float]]] = [None] * N
+        signatures = None
+        if self.lsh is not None:
+            signatures = self.lsh.signatures(texts)
+            duplicates = self.lsh.find_duplicates(signatures, ids)
+        if self.dedup in ("skip", "merge") and any(d is not None for d in duplicates):
+            keep = [i for i in range(N) if duplicates[i] is None]
+            folded = [i for i in range(N) if duplicates[i] is not None]
+            # un doublon d'un texte du lot pointe vers sa nouvelle position
+            new_pos = {i: p for p, i in enumerate(keep)}
+            folded = [
+                (ids[i] if ids is not None else None, metadatas[i], self._remap_duplicate(duplicates[i], new_pos))
+                for i in folded
+            ]
+            texts = [texts[i] for i in keep]
+            metadatas = [metadatas[i] for i in keep]
+            ids = [ids[i] for i in keep] if ids is not None else None
+            signatures = signatures[keep]
+            duplicates = [None] * len(keep)
+            N = len(texts)
+        else:
+            folded = []
+
+        if N == 0:
+            with self._lock.write():
+                self._fold_duplicates(folded, [])
+            print(f"✅ Added 0 documents ({len(folded)} near-duplicates: {self.dedup}). Index size: {len(self)}")
+            return
 
-        for i in range(N):
-            self.docs.append(
+        # encodage hors verrou : les recherches continuent pendant ce temps
+        chunks = None
+        if self.chunks is not None:
+            enriched, triads, chunk_vecs, offsets = self.encoder.encode_multi(
+                texts,
+                triad_mode=triad_mode,
+            )  # enriched: (N,dim+3), chunk_vecs: (C,dim)
+            chunks = (chunk_vecs, np.diff(offsets))
+        else:
+            enriched, triads = self.encoder.encode(
+                texts,
+                triad_mode=triad_mode,
+                return_raw=False,
+            )  # enriched: (N,dim+3)
+        triad_arr = np.stack([tr.as_array() for tr in triads], axis=0)  # (N,3)
+
+        with self._lock.write():
+            dead_before = self._tombstones.count
+            if ids is None:
+                ids = [f"doc_{self._next_id + i}" for i in range(N)]
+                self._next_id += N
+            for i, dup in enumerate(duplicates):
+                if dup is not None:  # dedup="link"
+                    target = ids[dup[0]] if isinstance(dup[0], int) else dup[0]
+                    metadatas[i] = {**metadatas[i], "duplicate_of": target, "duplicate_jaccard": dup[1]}
+                    self.dedup_stats["linked"] += 1
+            docs = [
                 DeepTriadDocument(
                     doc_id=ids[i],
                     text=texts[i],
@@ -97,10 +233,424 @@ class DeepTriadRAGIndex:
                     embedding=enriched[i],
                     triad=triads[i],
                 )
+                for i in range(N)
+            ]
+            self._append(docs, enriched, triad_arr, chunks)
+            if self.lsh is not None:
+                for i in range(N):
+                    if duplicates[i] is None:
+                        self.lsh.add(ids[i], signatures[i])
+                    else:
+                        self.lsh.remove(ids[i])  # id ré-indexé comme doublon : plus un original
+            self._fold_duplicates(folded, ids)
+            replaced = self._tombstones.count - dead_before
+
+        if folded:
+            print(f"✅ Added {N} documents ({len(folded)} near-duplicates: {self.dedup}). Index size: {len(self)}")
+        else:
+            print(f"✅ Added {N} documents. Index size: {len(self)}")
+        if replaced:
+            self._maybe_compact()
+
+    @staticmethod
+    def _remap_duplicate(dup: Tuple[Any, float], new_pos: Dict[int, int]) -> Tuple[Any, float]:
+        """Doublon d'un texte du lot : index dans le lot filtré (les ids ne sont pas encore attribués)"""
+        if isinstance(dup[0], int):
+            return (new_pos[dup[0]], dup[1])
+        return dup
+
+    def _fold_duplicates(self, folded: List[Tuple[Optional[str], Dict[str, Any], Tuple[Any, float]]], ids: List[str]) -> None:
+        """Compte (skip) ou fusionne (merge) les doublons écartés (verrou en écriture tenu)"""
+        for doc_id, meta, (target, jaccard) in folded:
+            if self.dedup == "skip":
+                self.dedup_stats["skipped"] += 1
+                continue
+            row = self._id_to_row.get(ids[target] if isinstance(target, int) else target)
+            if row is None:  # original supprimé entre-temps
+                self.dedup_stats["skipped"] += 1
+                continue
+            original = self.docs[row]
+            for key, value in meta.items():
+                original.meta.setdefault(key, value)
+            original.meta.setdefault("merged", []).append({"id": doc_id, "jaccard": jaccard})
+            self.dedup_stats["merged"] += 1
+
+    def upsert(
+        self,
+        doc_id: str,
+        text: str,
+        meta: Optional[Dict[str, Any]] = None,
+        triad_mode: TriadTargetMode = "auto",
+    ):
+        """Insère ou remplace le document `doc_id`"""
+        self.add_documents([text], [meta or {}], [doc_id], triad_mode=triad_mode)
+
+    def delete(self, doc_id: str) -> bool:
+        """
+        Supprime un document (tombstone, libéré par la compaction).
+        Retourne False si l'id n'est pas indexé.
+        """
+        with self._lock.write():
+            row = self._id_to_row.get(doc_id)
+            if row is None:
+                return False
+            self._delete_row(row)
+            if self.lsh is not None:
+                self.lsh.remove(doc_id)
+        self._maybe_compact()
+        return True
+
+    def _append(
+        self,
+        docs: List[DeepTriadDocument],
+        enriched: np.ndarray,
+        triad_arr: np.ndarray,
+        chunks: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+    ) -> np.ndarray:
+        """
+        Ajoute des lignes au buffer et à l'index ANN (verrou en écriture tenu).
+        chunks = (vecteurs (C,dim), nombre de chunks par document) en mode multi-vecteurs.
+        """
+        rows = self._store.append(enriched, triad_arr)  # O(N) amorti
+        if self.chunks is not None:
+            self.chunks.append(*chunks)
+        if self.ann is not None:
+            # assignation incrémentale, sans ré-entraînement
+            self.ann.add(self._store.embeddings[rows], rows)
+        self.docs.extend(docs)
+        for doc, row in zip(docs, rows):
+            # id déjà indexé (ou répété dans le lot) : la dernière occurrence gagne
+            old_row = self._id_to_row.get(doc.doc_id)
+            if old_row is not None:
+                self._delete_row(old_row)
+            self._id_to_row[doc.doc_id] = int(row)
+        return rows
+
+    def _delete_row(self, row: int) -> None:
+        """Marque une ligne comme supprimée (verrou en écriture tenu)"""
+        self._tombstones.mark(row)
+        doc_id = self.docs[row].doc_id
+        # l'id peut déjà pointer vers une version plus récente (upsert rejoué par la compaction)
+        if self._id_to_row.get(doc_id) == row:
+            del self._id_to_row[doc_id]
+        if self._compaction is not None:
+            self._compaction["deleted"].append(row)
+
+    # -----------------------
+    # compaction
+    # -----------------------
+
+    def _maybe_compact(self) -> None:
+        if self.auto_compact and self._compaction is None \
+                and self.dead_fraction >= self.compaction_threshold:
+            self.compact(background=True)
+
+    def compact(self, background: bool = True) -> Optional[threading.Thread]:
+        """
+        Retire les lignes supprimées : reconstruit le buffer et l'index ANN
+        sur les lignes vivantes.
+
+        La reconstruction se fait sans verrou (dans un thread si
+        background=True) ; les ajouts / suppressions faits entre-temps sont
+        rejoués avant la bascule vers le nouvel état.
+
+        Retourne le thread de compaction (background=True), sinon None.
+        """
+        with self._lock.write():
+            if self._compaction is not None:
+                return self._compaction_thread
+            n = len(self.docs)
+            live = np.flatnonzero(~self._tombstones.mask(n))
+            self._compaction = {"n": n, "deleted": [], "ann": self.ann}
+
+        def run() -> None:
+            try:
+                state = self._build_compacted(live)
+                with self._lock.write():
+                    self._install_compacted(state, live)
+                print(f"🧹 Index compacted: {len(live)}/{n} rows kept")
+            except Exception as e:
+                print(f"⚠️ Compaction failed: {e}")
+            finally:
+                with self._lock.write():
+                    self._compaction = None
+                    self._compaction_thread = None
+
+        if not background:
+            run()
+            return None
+        thread = threading.Thread(target=run, name="deeptriad-rag-compaction", daemon=True)
+        self._compaction_thread = thread
+        thread.start()
+        return thread
+
+    def _build_compacted(self, live: np.ndarray) -> Dict[str, Any]:
+        """Construit l'état compacté à partir des lignes de l'instantané (sans verrou)"""
+        store = self._store.take(live)
+        docs = [self.docs[r] for r in live]
+        ann = self._compaction["ann"]
+        return {
+            "store": store,
+            "chunks": self.chunks.take(live) if self.chunks is not None else None,
+            "docs": docs,
+            "ann": rebuild_ann(ann, store) if ann is not None else None,
+            "id_to_row": {d.doc_id: i for i, d in enumerate(docs)},
+        }
+
+    def _install_compacted(self, state: Dict[str, Any], live: np.ndarray) -> None:
+        """Bascule vers l'état compacté et rejoue les changements concurrents (verrou en écriture tenu)"""
+        snapshot = self._compaction
+        self._compaction = None  # les suppressions rejouées ne doivent pas être ré-enregistrées
+        n = snapshot["n"]
+        old_docs, old_tombstones, old_ann = self.docs, self._tombstones, self.ann
+        old_triads = self._store.triads
+        old_chunks = self.chunks
+
+        self._store = state["store"]
+        self.chunks = state["chunks"]
+        self.docs = state["docs"]
+        self._id_to_row = state["id_to_row"]
+        self._tombstones = Tombstones()
+        self.ann = state["ann"]
+        if old_ann is not snapshot["ann"]:
+            # index ANN remplacé pendant la compaction : on reconstruit le courant
+            self.ann = rebuild_ann(old_ann, self._store) if old_ann is not None else None
+
+        # suppressions de lignes de l'instantané faites pendant la reconstruction
+        remap = remap_rows(live, n)
+        for row in snapshot["deleted"]:
+            if row < n and remap[row] >= 0:
+                self._delete_row(int(remap[row]))
+
+        # lignes ajoutées pendant la reconstruction (embeddings bruts des documents)
+        if len(old_docs) > n:
+            added = old_docs[n:]
+            chunks = None
+            if old_chunks is not None:
+                added_chunks = old_chunks.take(np.arange(n, len(old_docs)))
+                chunks = (added_chunks.chunks, np.diff(added_chunks.offsets))
+            rows = self._append(added, np.stack([d.embedding for d in added]), old_triads[n:], chunks)
+            for old_row, row in zip(range(n, len(old_docs)), rows):
+                if old_tombstones.is_dead(old_row):
+                    self._delete_row(int(row))
+
+    # -----------------------
+    # persistance
+    # -----------------------
+
+    def save(self, path: Union[str, Path]) -> Path:
+        """
+        Sauvegarde l'index dans un segment sur disque (numtriad.index.segment).
+        Les embeddings sont stockés normalisés, avec leurs normes brutes.
+        Les lignes supprimées sont conservées, leurs tombstones dans un fichier annexe.
+        """
+        with self._lock.read():
+            return self._save(path)
+
+    def _save(self, path: Union[str, Path]) -> Path:
+        """Corps de save() (verrou en lecture tenu)"""
+        path = write_segment(
+            path,
+            embeddings=self._store.embeddings,
+            triads=self._store.triads,
+            norms=self._store.norms,
+            ids=[d.doc_id for d in self.docs],
+            records=[{"text": d.text, "meta": d.meta} for d in self.docs],
+            normalized=True,
+            extra={
+                "index": type(self).__name__,
+                "retrieval_mode": self.retrieval_mode,
+                "triad_weight": self.triad_weight,
+                "ann": ann_kind(self.ann) if self.ann is not None else None,
+                "next_id": self._next_id,
+                "multi_vector": self.chunks is not None,
+                "chunk_dim": self.chunks.dim if self.chunks is not None else None,
+                "dedup": self.dedup,
+                "dedup_settings": self.lsh.settings if self.lsh is not None else None,
+            },
+        )
+        if self.lsh is not None:
+            self.lsh.save(path)
+        save_ann(self.ann, path)
+        if self.chunks is not None:
+            self.chunks.save(path)
+        save_tombstones(self._tombstones, len(self.docs), path)
+        print(f"💾 Index saved: {len(self)} documents -> {path}")
+        return path
+
+    @classmethod
+    def load(
+        cls,
+        path: Union[str, Path],
+        base_config: NumTriadConfig,
+        v3_config: NumTriadV3Config,
+        mmap: bool = True,
+    ) -> "DeepTriadRAGIndex":
+        """
+        Ouvre un index sauvegardé avec save() sans ré-encoder le corpus.
+
+        Avec mmap=True, les matrices sont des np.memmap en lecture seule
+        (démarrage quasi instantané, page cache partagé entre processus).
+        Note : doc.embedding est alors la ligne normalisée du segment.
+        """
+        seg = open_segment(path, mmap=mmap)
+        if not seg.normalized:
+            raise ValueError(f"Segment {path} n'est pas un DeepTriadRAGIndex (lignes non normalisées)")
+
+        extra = seg.extra
+        index = cls(
+            base_config,
+            v3_config,
+            retrieval_mode=extra.get("retrieval_mode", "triad_weighted"),
+            triad_weight=extra.get("triad_weight", 0.3),
+        )
+        index._store = VectorStore.from_arrays(seg.embeddings, seg.triads, seg.norms, normalize=True)
+        index.docs = [
+            DeepTriadDocument(
+                doc_id=doc_id,
+                text=seg.records[i].get("text", ""),
+                meta=seg.records[i].get("meta", {}),
+                embedding=seg.embeddings[i],
+                triad=Triad(*(float(x) for x in seg.triads[i])),
             )
+            for i, doc_id in enumerate(seg.ids)
+        ]
+        index._tombstones = load_tombstones(path)
+        index._id_to_row = {
+            doc.doc_id: i for i, doc in enumerate(index.docs) if not index._tombstones.is_dead(i)
+        }
+        index._next_id = extra.get("next_id", len(index.docs))
+        if extra.get("dedup"):
+            index.dedup = extra["dedup"]
+            index.lsh = MinHashLSH.load(path, **extra["dedup_settings"])
+        if extra.get("multi_vector"):
+            index.chunks = MultiVectorStore.load(path, dim=extra.get("chunk_dim") or 0, mmap=mmap)
+        index.ann = load_ann(path, extra.get("ann"), store=index._store)
+        print(f"📂 Index loaded: {len(index)} documents <- {path}")
+        return index
+
+    # -----------------------
+    # recherche approximative (IVF / HNSW / codes compressés)
+    # -----------------------
+
+    def build_ivf(
+        self,
+        nlist: Optional[int] = None,
+        nprobe: int = 8,
+        n_iter: int = 20,
+        seed: int = 0,
+    ) -> IVFIndex:
+        """
+        Entraîne un quantificateur grossier (k-means sphérique) sur les
+        embeddings indexés et active la recherche approximative.
+        Les documents ajoutés ensuite sont assignés sans ré-entraînement.
+
+        nlist par défaut : ~4*sqrt(N).
+        """
+        n = len(self._store)
+        if n == 0:
+            raise ValueError("Impossible de construire l'IVF sur un index vide")
+        if nlist is None:
+            nlist = max(1, int(4 * np.sqrt(n)))
+
+        ivf = IVFIndex(nlist=nlist, nprobe=nprobe, n_iter=n_iter, seed=seed)
+        emb = self._store.embeddings
+        ivf.train(emb)
+        ivf.add(emb, np.arange(n))
+        self.ann = ivf
+        print(f"✅ IVF built: nlist={ivf.nlist}, nprobe={nprobe}, docs={n}")
+        return ivf
+
+    def enable_hnsw(
+        self,
+        M: int = 16,
+        ef_construction: int = 200,
+        ef_search: int = 64,
+        seed: int = 0,
+    ) -> HNSWIndex:
+        """
+        Attache un graphe HNSW (insertion en ligne) et active la recherche
+        approximative. Les documents existants sont insérés immédiatement.
+        """
+        hnsw = HNSWIndex(
+            self._store,
+            M=M,
+            ef_construction=ef_construction,
+            ef_search=ef_search,
+            seed=seed,
+        )
+        if len(self._store):
+            hnsw.add(None, np.arange(len(self._store)))
+        self.ann = hnsw
+        print(f"✅ HNSW enabled: M={M}, ef_construction={ef_construction}, docs={len(hnsw)}")
+        return hnsw
+
+    def enable_compression(
+        self,
+        kind: str = "sq",
+        rerank: int = 100,
+        m: int = 8,
+        nbits: int = 8,
+        seed: int = 0,
+    ) -> CompressedIndex:
+        """
+        Premier passage sur des codes quantifiés, puis re-scoring exact de
+        la shortlist (rerank) avec les vecteurs float32.
 
-        self._rebuild_matrix()
-        print(f"✅ Added {N} documents. Index size: {len(self.docs)}")
+          - kind="sq" : quantification scalaire int8 par dimension
+          - kind="pq" : product quantization (m sous-espaces, tables ADC)
+
+        Après save() / load(mmap=True), les vecteurs float32 restent sur
+        disque : seuls les codes sont résidents (voir memory_report()).
+        """
+        n = len(self._store)
+        if n == 0:
+            raise ValueError("Impossible d'entraîner le quantificateur sur un index vide")
+        compressed = CompressedIndex(kind=kind, rerank=rerank, m=m, nbits=nbits, seed=seed)
+        emb = self._store.embeddings
+        compressed.train(emb)
+        compressed.add(emb, np.arange(n))
+        self.ann = compressed
+        report = self.memory_report()
+        print(
+            f"✅ Compression {kind}: {report['code_bytes_per_doc']} B/doc "
+            f"vs {report['float32_bytes_per_doc']} B/doc float32 ({report['reduction']:.1f}x)"
+        )
+        return compressed
+
+    def memory_report(self) -> Dict[str, Any]:
+        """Mémoire par document : lignes float32 vs codes compressés (si activés)"""
+        compressed = self.ann if isinstance(self.ann, CompressedIndex) else None
+        return memory_report(len(self.docs), self._store.dim, compressed)
+
+    def _ann_candidates(self, q_vec: np.ndarray, k: int, **params) -> np.ndarray:
+        """Candidats de l'index ANN (les paramètres à None sont ignorés)"""
+        params = {name: value for name, value in params.items() if value is not None}
+        return self.ann.candidates(q_vec, k, **params)
+
+    def evaluate_ann_recall(
+        self,
+        queries: List[str],
+        k: int = 10,
+        triad_target: TriadTargetMode = "auto",
+        **ann_params,
+    ) -> float:
+        """
+        Recall@k moyen de la recherche approximative vs recherche exacte.
+        Les paramètres supplémentaires (nprobe / ef_search / rerank) sont passés à search().
+        """
+        if self.ann is None:
+            raise RuntimeError("Aucun index ANN (appeler build_ivf, enable_hnsw ou enable_compression)")
+        recalls = []
+        for q in queries:
+            exact = self.search(q, k=k, triad_target=triad_target, exact=True)
+            approx = self.search(q, k=k, triad_target=triad_target, **ann_params)
+            recalls.append(recall_at_k(
+                [d.doc_id for d, _ in exact],
+                [d.doc_id for d, _ in approx],
+                k,
+            ))
+        return float(np.mean(recalls)) if recalls else 1.0
 
     def get_stats(self) -> Dict[str, Any]:
         """Retourne les statistiques de l'index"""
@@ -108,10 +658,13 @@ class DeepTriadRAGIndex:
             return {"num_docs": 0, "embedding_dim": 0}
         
         return {
-            "num_docs": len(self.docs),
+            "num_docs": len(self),
+            "deleted_rows": self._tombstones.count,
             "embedding_dim": self.docs[0].embedding.shape[0],
             "retrieval_mode": self.retrieval_mode,
             "triad_weight": self.triad_weight,
+            "num_chunks": self.chunks.n_chunks if self.chunks is not None else None,
+            "dedup": dict(self.dedup_stats, policy=self.dedup) if self.dedup else None,
         }
 
     # -----------------------
@@ -126,6 +679,18 @@ class DeepTriadRAGIndex:
         b_norm = b / (np.linalg.norm(b, axis=1, keepdims=True) + 1e-8)
         return (b_norm @ a_norm)
 
+    def _query_sims(self, q_vec: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Similarité cosinus de la question contre tout l'index (ou les lignes
+        `rows`). Les lignes du buffer sont déjà normalisées : seul q l'est ici.
+        """
+        q = np.asarray(q_vec, dtype="float32")
+        q = q / (np.linalg.norm(q) + 1e-8)
+        emb = self._store.embeddings
+        if rows is not None:
+            emb = emb[rows]
+        return emb @ q  # (N,)
+
     @staticmethod
     def _triad_distance(tq: Triad, td: Triad) -> float:
         """Calcule la distance L1 entre deux triades"""
@@ -143,58 +708,250 @@ class DeepTriadRAGIndex:
         k: int = 5,
         triad_target: TriadTargetMode = "auto",
         retrieval_mode: Optional[RetrievalMode] = None,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        rerank: Optional[int] = None,
+        exact: bool = False,
     ) -> List[Tuple[DeepTriadDocument, float]]:
         """
         Recherche triad-aware :
 
           - encode la question avec NumTriadEmbeddingV3
+          - (si index ANN et exact=False) restreint aux candidats de l'ANN
           - calcule similarité cosinus
           - ajuste le score avec la distance triadique (si mode triad_weighted)
 
+        retrieval_mode="maxsim" (index multi_vector) remplace la similarité
+        cosinus par le MaxSim entre chunks de la question et chunks des documents
+        (avec un index ANN, seuls ses candidats, trouvés sur l'embedding moyen, sont re-scorés).
+
         triad_target :
           - "abstract" : favorisera les documents plus abstraits
           - "concrete" : favorisera les documents plus concrets
           - "balanced" : recentre la triade
           - "auto"     : garde la triade naturelle de la question
         """
-        if self.emb_matrix is None or not len(self.docs):
+        if not len(self):
             return []
 
+        mode = retrieval_mode or self.retrieval_mode
+        q_chunks = None
         # encode la question
-        q_enriched, [q_triad] = self.encoder.encode(
-            [query],
-            triad_mode=triad_target,
-            return_raw=False,
-        )  # (1,dim+3), [Triad]
+        if mode == "maxsim":
+            self._check_multi_vector()
+            q_enriched, [q_triad], q_chunks, _ = self.encoder.encode_multi(
+                [query],
+                triad_mode=triad_target,
+            )  # (1,dim+3), [Triad], (Lq,dim)
+        else:
+            q_enriched, [q_triad] = self.encoder.encode(
+                [query],
+                triad_mode=triad_target,
+                return_raw=False,
+            )  # (1,dim+3), [Triad]
         q_vec = q_enriched[0]
 
-        mode = retrieval_mode or self.retrieval_mode
+        ann_params = {"nprobe": nprobe, "ef_search": ef_search, "rerank": rerank}
+        with self._lock.read():
+            return self._rank(q_vec, q_triad.as_array(), k, mode, exact, ann_params, q_chunks)
 
-        # similarité cosinus
-        sims = self._cosine_sim(q_vec, self.emb_matrix)  # (N,)
+    def _check_multi_vector(self) -> None:
+        if self.chunks is None:
+            raise ValueError("retrieval_mode='maxsim' nécessite un index créé avec multi_vector=True")
+
+    def _rank(
+        self,
+        q_vec: np.ndarray,
+        q_triad: np.ndarray,
+        k: int,
+        mode: RetrievalMode,
+        exact: bool,
+        ann_params: Dict[str, Any],
+        q_chunks: Optional[np.ndarray] = None,
+    ) -> List[Tuple[DeepTriadDocument, float]]:
+        """
+        Top-k pour une question déjà encodée (q_vec, q_triad (3,), et ses
+        chunks (Lq,dim) en mode maxsim), verrou en lecture tenu
+        """
+        # candidats ANN (sinon tout l'index)
+        rows = None
+        if self.ann is not None and not exact:
+            rows = self._ann_candidates(q_vec, k, **ann_params)
+            if rows.size == 0:
+                return []
+
+        if mode == "maxsim":
+            # late interaction : MaxSim sur les chunks (quelques matmuls)
+            sims = self.chunks.maxsim(q_chunks, rows)  # (N,) ou (|rows|,)
+        else:
+            # similarité cosinus
+            sims = self._query_sims(q_vec, rows)  # (N,) ou (|rows|,)
 
         if mode == "cosine":
-            # top-k sur sims
-            idxs = np.argsort(-sims)[:k]
-            return [(self.docs[i], float(sims[i])) for i in idxs]
+            scores = sims
+        else:
+            # mode triad_weighted : distance L1 vectorisée
+            triads = self._store.triads if rows is None else self._store.triads[rows]
+            triad_dist = np.abs(triads - q_triad).sum(axis=1)
+            scores = sims - self.triad_weight * triad_dist
+
+        # les lignes supprimées ne remontent jamais
+        if self._tombstones.count:
+            dead = self._tombstones.mask(len(self.docs))
+            scores[dead if rows is None else dead[rows]] = -np.inf
+
+        idxs = top_k_indices(scores, k)
+        doc_idxs = idxs if rows is None else rows[idxs]
+        return [
+            (self.docs[j], float(scores[i]))
+            for i, j in zip(idxs, doc_idxs)
+            if np.isfinite(scores[i])
+        ]
+
+    def search_batch(
+        self,
+        queries: List[str],
+        k: int = 5,
+        triad_target: TriadTargetMode = "auto",
+        retrieval_mode: Optional[RetrievalMode] = None,
+        exact: bool = False,
+        chunk_size: Optional[int] = None,
+        **ann_params,
+    ) -> List[List[Tuple[DeepTriadDocument, float]]]:
+        """
+        Recherche batch :
 
-        # sinon mode triad_weighted
-        scores = []
-        for i, d in enumerate(self.docs):
-            triad_dist = self._triad_distance(q_triad, d.triad)
-            score = float(sims[i]) - self.triad_weight * triad_dist
-            scores.append(score)
+          - encode toutes les questions en un seul appel à l'encodeur
+          - scores (Q×D)·(D×N) en un matmul par bloc de `chunk_size`
+            questions (par défaut Q_bloc * N <= BATCH_SCORE_BUDGET)
+          - distance triadique L1 en matrice Q×N (broadcast), top-k par ligne
 
-        scores = np.asarray(scores)
-        idxs = np.argsort(-scores)[:k]
+        Avec un index ANN (et exact=False), chaque question est re-scorée
+        sur ses propres candidats (nprobe / ef_search / rerank via ann_params).
+        """
+        if not queries:
+            return []
+        if not len(self):
+            return [[] for _ in queries]
+        if (retrieval_mode or self.retrieval_mode) == "maxsim":
+            # MaxSim : un passage par question (les chunks diffèrent d'une question à l'autre)
+            return [
+                self.search(q, k, triad_target, "maxsim", exact=exact, **ann_params)
+                for q in queries
+            ]
+
+        q_enriched, q_triads = self.encoder.encode(
+            queries,
+            triad_mode=triad_target,
+            return_raw=False,
+        )  # (Q,dim+3), [Triad]
+        q_tri = np.stack([tr.as_array() for tr in q_triads], axis=0).astype("float32")  # (Q,3)
+        mode = retrieval_mode or self.retrieval_mode
 
-        return [(self.docs[i], float(scores[i])) for i in idxs]
+        with self._lock.read():
+            return self._rank_batch(q_enriched, q_tri, k, mode, exact, chunk_size, ann_params)
 
-    def search_batch(
+    def search_streaming(
         self,
-        queries: List[str],
+        path: Union[str, Path],
+        query: str,
         k: int = 5,
         triad_target: TriadTargetMode = "auto",
+        retrieval_mode: Optional[RetrievalMode] = None,
+        block_rows: int = 65536,
+        prefetch: int = 2,
+    ) -> List[Tuple[DeepTriadDocument, float]]:
+        """
+        Recherche exacte sur un index sauvegardé avec save(), sans le charger :
+
+          - encode la question avec l'encodeur de cet index
+          - lit le segment par blocs de `block_rows` lignes (un thread de
+            lecture anticipe `prefetch` blocs, cf. numtriad.index.streaming)
+          - score chaque bloc comme search(exact=True) et garde un top-k courant
+
+        La mémoire reste bornée quelle que soit la taille du corpus ; seuls
+        les k documents retenus sont relus (texte, meta, vecteurs).
+        """
+        q_enriched, [q_triad] = self.encoder.encode(
+            [query],
+            triad_mode=triad_target,
+            return_raw=False,
+        )  # (1,dim+3), [Triad]
+        q = np.asarray(q_enriched[0], dtype="float32")
+        q = q / (np.linalg.norm(q) + 1e-8)
+        q_tri = q_triad.as_array().astype("float32")
+        mode = retrieval_mode or self.retrieval_mode
+        if mode == "maxsim":
+            raise ValueError("search_streaming ne lit que le segment (embeddings moyens) : mode maxsim non supporté")
+
+        def score_block(emb: np.ndarray, triads: np.ndarray, norms: np.ndarray) -> np.ndarray:
+            scores = emb @ q  # lignes du segment déjà normalisées
+            if mode != "cosine":
+                scores -= self.triad_weight * np.abs(triads - q_tri).sum(axis=1)
+            return scores
+
+        rows, scores = stream_top_k(path, score_block, k, block_rows=block_rows, prefetch=prefetch)
+        hits = read_rows(path, rows)
+        return [
+            (
+                DeepTriadDocument(
+                    doc_id=hits["ids"][i],
+                    text=hits["records"][i].get("text", ""),
+                    meta=hits["records"][i].get("meta", {}),
+                    embedding=hits["embeddings"][i],
+                    triad=Triad(*(float(x) for x in hits["triads"][i])),
+                ),
+                float(scores[i]),
+            )
+            for i in range(rows.size)
+        ]
+
+    def _rank_batch(
+        self,
+        q_enriched: np.ndarray,
+        q_tri: np.ndarray,
+        k: int,
+        mode: RetrievalMode,
+        exact: bool,
+        chunk_size: Optional[int],
+        ann_params: Dict[str, Any],
     ) -> List[List[Tuple[DeepTriadDocument, float]]]:
-        """Recherche batch"""
-        return [self.search(q, k=k, triad_target=triad_target) for q in queries]
+        """Corps de search_batch() pour des questions déjà encodées (verrou en lecture tenu)"""
+        n_queries = q_enriched.shape[0]
+        if self.ann is not None and not exact:
+            return [
+                self._rank(q_enriched[i], q_tri[i], k, mode, exact, ann_params)
+                for i in range(n_queries)
+            ]
+
+        q = np.asarray(q_enriched, dtype="float32")
+        q = q / (np.linalg.norm(q, axis=1, keepdims=True) + 1e-8)
+        emb = self._store.embeddings   # (N,dim+3), lignes normalisées
+        triads = self._store.triads    # (N,3)
+        N = emb.shape[0]
+        chunk = chunk_size or max(1, BATCH_SCORE_BUDGET // N)
+        dead = self._tombstones.mask(N) if self._tombstones.count else None
+
+        results: List[List[Tuple[DeepTriadDocument, float]]] = []
+        for start in range(0, n_queries, chunk):
+            stop = min(start + chunk, n_queries)
+            scores = q[start:stop] @ emb.T  # (Qb,N)
+
+            if mode != "cosine":
+                # distance L1 (Qb,N), accumulée composante par composante
+                triad_dist = np.zeros_like(scores)
+                for c in range(3):
+                    triad_dist += np.abs(q_tri[start:stop, c, None] - triads[None, :, c])
+                scores -= self.triad_weight * triad_dist
+            if dead is not None:
+                scores[:, dead] = -np.inf
+
+            idxs = top_k_indices_2d(scores, k)  # (Qb,k)
+            for r in range(stop - start):
+                results.append([
+                    (self.docs[j], float(scores[r, j]))
+                    for j in idxs[r]
+                    if np.isfinite(scores[r, j])
+                ])
+
+        return results
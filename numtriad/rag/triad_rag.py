@@ -1,13 +1,19 @@
 # numtriad/rag/triad_rag.py
 
 from dataclasses import dataclass
-from typing import List, Tuple, Optional
+from pathlib import Path
+from typing import List, Tuple, Optional, Union, Literal
 
 import numpy as np
 
 from ..encoders.numtriad_text_v2 import NumTriadTextEncoderV2
 from ..triad_types import Triad
 from ..config import NumTriadConfig
+from ..index import VectorStore, BM25Index, top_k_indices, write_segment, open_segment
+
+
+RetrievalMode = Literal["dense", "hybrid"]
+FusionMode = Literal["weighted", "rrf"]
 
 
 @dataclass
@@ -21,18 +27,60 @@ class TriadIndexedDoc:
 class TriadRAGEngine:
     """
     RAG simple triad-aware en mémoire.
+
+    Scoring dense vectorisé : partie sémantique normalisée (N,D-3) et
+    triades dans un VectorStore, un matmul par requête.
+
+    Mode "hybrid" : un index inversé BM25 (numtriad.index.lexical) génère
+    les candidats ; le score dense + triadique n'est calculé que sur
+    l'union des listes courtes lexicale (lexical_k) et dense (dense_k,
+    0 = candidats lexicaux seuls), puis fusionné :
+      - "weighted" : (1 - w) * dense + w * bm25 / max(bm25)
+      - "rrf"      : sum 1 / (rrf_k + rang) (reciprocal rank fusion)
     """
 
-    def __init__(self, config: Optional[NumTriadConfig] = None):
+    def __init__(
+        self,
+        config: Optional[NumTriadConfig] = None,
+        retrieval: RetrievalMode = "dense",
+        fusion: FusionMode = "weighted",
+        lexical_weight: float = 0.3,
+        lexical_k: int = 100,
+        dense_k: int = 0,
+        rrf_k: int = 60,
+    ):
         self.config = config or NumTriadConfig()
         self.encoder = NumTriadTextEncoderV2(self.config)
         self.docs: List[TriadIndexedDoc] = []
+        self.retrieval = retrieval
+        self.fusion = fusion
+        self.lexical_weight = lexical_weight
+        self.lexical_k = lexical_k
+        self.dense_k = dense_k
+        self.rrf_k = rrf_k
+
+        # row i <-> docs[i] : partie sémantique normalisée + triade brute
+        self._store = VectorStore(normalize=True)
+        self.lexical = BM25Index()
+
+    def _add_rows(self, embeddings: np.ndarray, triads: np.ndarray, texts: List[str]) -> None:
+        """Ajoute des lignes au store dense et à l'index BM25"""
+        rows = self._store.append(np.asarray(embeddings, dtype="float32")[:, :-3], triads)
+        self.lexical.add(texts, rows)
 
     def index(self, doc_ids: List[str], texts: List[str]) -> None:
         """
         Indexer une liste de docs en mémoire.
         """
+        if not texts:
+            return
         enc = self.encoder.encode(texts)
+        n = len(doc_ids)
+        self._add_rows(
+            enc.embeddings[:n],
+            np.stack([t.as_array() for t in enc.triads[:n]], axis=0),
+            texts[:n],
+        )
         for i, doc_id in enumerate(doc_ids):
             emb = enc.embeddings[i]
             triad = enc.triads[i]
@@ -45,55 +93,166 @@ class TriadRAGEngine:
                 )
             )
 
-    def _cosine(self, a: np.ndarray, b: np.ndarray) -> float:
-        na = np.linalg.norm(a) or 1.0
-        nb = np.linalg.norm(b) or 1.0
-        return float(a.dot(b) / (na * nb))
+    def save(self, path: Union[str, Path]) -> Path:
+        """
+        Sauvegarder l'index dans un segment sur disque (numtriad.index.segment).
+        """
+        if self.docs:
+            emb = np.stack([d.embedding for d in self.docs], axis=0).astype("float32")
+            triads = np.stack([d.triad.as_array() for d in self.docs], axis=0)
+        else:
+            emb = np.empty((0, 0), dtype="float32")
+            triads = np.empty((0, 3), dtype="float32")
+        return write_segment(
+            path,
+            embeddings=emb,
+            triads=triads,
+            norms=np.linalg.norm(emb, axis=1) if len(emb) else np.empty((0,)),
+            ids=[d.doc_id for d in self.docs],
+            records=[{"text": d.text} for d in self.docs],
+            normalized=False,
+            extra={
+                "index": type(self).__name__,
+                "retrieval": self.retrieval,
+                "fusion": self.fusion,
+                "lexical_weight": self.lexical_weight,
+                "lexical_k": self.lexical_k,
+                "dense_k": self.dense_k,
+                "rrf_k": self.rrf_k,
+            },
+        )
 
-    def _triad_cosine(self, t1: Triad, t2: Triad) -> float:
-        a = t1.as_array()
-        b = t2.as_array()
-        return self._cosine(a, b)
+    @classmethod
+    def load(
+        cls,
+        path: Union[str, Path],
+        config: Optional[NumTriadConfig] = None,
+        mmap: bool = True,
+    ) -> "TriadRAGEngine":
+        """
+        Recharger un index sauvegardé avec save(), sans ré-encoder les textes.
+        Avec mmap=True, doc.embedding reste sur disque (np.memmap) ; la
+        matrice de scoring et l'index BM25 sont reconstruits en mémoire.
+        """
+        seg = open_segment(path, mmap=mmap)
+        settings = {
+            name: seg.extra[name]
+            for name in ("retrieval", "fusion", "lexical_weight", "lexical_k", "dense_k", "rrf_k")
+            if name in seg.extra
+        }
+        engine = cls(config, **settings)
+        engine.docs = [
+            TriadIndexedDoc(
+                doc_id=doc_id,
+                text=seg.records[i].get("text", ""),
+                embedding=seg.embeddings[i],
+                triad=Triad(*(float(x) for x in seg.triads[i])),
+            )
+            for i, doc_id in enumerate(seg.ids)
+        ]
+        if engine.docs:
+            engine._add_rows(seg.embeddings, seg.triads, [d.text for d in engine.docs])
+        return engine
+
+    def _dense_scores(
+        self,
+        q_emb: np.ndarray,
+        q_triad: Triad,
+        triad_bias: Optional[Triad],
+        rows: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Score triad-aware vectorisé sur tout l'index (ou les lignes `rows`) :
+
+            alpha_semantic * cos_sem + beta_triad * cos_triad + 0.1 * cos_bias
+        """
+        emb = self._store.embeddings
+        triads = self._store.triads
+        if rows is not None:
+            emb, triads = emb[rows], triads[rows]
+
+        q_v = np.asarray(q_emb[:-3], dtype="float32")
+        cos_sem = emb @ (q_v / (np.linalg.norm(q_v) or 1.0))
+
+        t_norms = np.linalg.norm(triads, axis=1)
+        t_unit = triads / np.where(t_norms > 0, t_norms, 1.0)[:, None]
+
+        def triad_cos(t: Triad) -> np.ndarray:
+            a = t.as_array().astype("float32")
+            return t_unit @ (a / (np.linalg.norm(a) or 1.0))
+
+        scores = self.config.alpha_semantic * cos_sem + self.config.beta_triad * triad_cos(q_triad)
+        # si triad_bias fourni, on ajoute une "tension"
+        if triad_bias is not None:
+            scores = scores + 0.1 * triad_cos(triad_bias)
+        return scores
+
+    def _ranks(self, scores: np.ndarray) -> np.ndarray:
+        """Rang (1 = meilleur) de chaque score"""
+        ranks = np.empty(scores.shape[0], dtype=np.int64)
+        ranks[np.argsort(-scores, kind="stable")] = np.arange(1, scores.shape[0] + 1)
+        return ranks
 
     def search(
         self,
         query: str,
         k: int = 5,
         triad_bias: Optional[Triad] = None,
+        retrieval: Optional[RetrievalMode] = None,
+        fusion: Optional[FusionMode] = None,
     ) -> List[Tuple[TriadIndexedDoc, float]]:
         """
         Recherche triad-aware sur l'index interne.
 
         triad_bias : optionnel, pour forcer vers +abstrait/+concret, etc.
+        retrieval / fusion : remplacent les réglages de l'index pour cette requête
+        ("hybrid" retombe sur le dense si aucun terme de la requête n'est indexé).
         """
+        if not self.docs:
+            return []
+
         q_enc = self.encoder.encode([query])
         q_emb = q_enc.embeddings[0]
         q_triad = q_enc.triads[0]
 
-        results: List[Tuple[TriadIndexedDoc, float]] = []
-
-        for doc in self.docs:
-            # split embedding : base + triad
-            v_dim = len(q_emb) - 3
-            q_v = q_emb[:v_dim]
-            d_v = doc.embedding[:v_dim]
+        if (retrieval or self.retrieval) == "hybrid":
+            lex_rows, lex_scores = self.lexical.search(query, self.lexical_k)
+            if lex_rows.size:
+                return self._hybrid(q_emb, q_triad, triad_bias, lex_rows, lex_scores, k, fusion)
 
-            cos_sem = self._cosine(q_v, d_v)
-            cos_tri = self._triad_cosine(q_triad, doc.triad)
+        scores = self._dense_scores(q_emb, q_triad, triad_bias)
+        return [(self.docs[i], float(scores[i])) for i in top_k_indices(scores, k)]
 
-            # si triad_bias fourni, on ajoute une "tension"
-            if triad_bias is not None:
-                bias_cos = self._triad_cosine(triad_bias, doc.triad)
-            else:
-                bias_cos = 0.0
+    def _hybrid(
+        self,
+        q_emb: np.ndarray,
+        q_triad: Triad,
+        triad_bias: Optional[Triad],
+        lex_rows: np.ndarray,
+        lex_scores: np.ndarray,
+        k: int,
+        fusion: Optional[FusionMode],
+    ) -> List[Tuple[TriadIndexedDoc, float]]:
+        """Score dense sur l'union des candidats lexicaux / denses, puis fusion"""
+        if self.dense_k > 0:
+            # liste courte dense : partie sémantique seule (un matmul)
+            q_v = np.asarray(q_emb[:-3], dtype="float32")
+            dense_rows = top_k_indices(self._store.embeddings @ q_v, self.dense_k)
+            rows = np.union1d(lex_rows, dense_rows)
+            lexical = np.zeros(rows.shape[0], dtype="float32")
+            lexical[np.searchsorted(rows, lex_rows)] = lex_scores
+        else:
+            rows, lexical = lex_rows, lex_scores
 
-            score = (
-                self.config.alpha_semantic * cos_sem
-                + self.config.beta_triad * cos_tri
-                + 0.1 * bias_cos
-            )
+        dense = self._dense_scores(q_emb, q_triad, triad_bias, rows)
 
-            results.append((doc, score))
+        if (fusion or self.fusion) == "rrf":
+            fused = 1.0 / (self.rrf_k + self._ranks(dense))
+            lex_ranks = self._ranks(lexical)
+            fused = fused + np.where(lexical > 0, 1.0 / (self.rrf_k + lex_ranks), 0.0)
+        else:
+            w = self.lexical_weight
+            fused = (1.0 - w) * dense + w * lexical / max(float(lexical.max()), 1e-8)
 
-        results.sort(key=lambda x: x[1], reverse=True)
-        return results[:k]
+        idxs = top_k_indices(fused, k)
+        return [(self.docs[rows[i]], float(fused[i])) for i in idxs]
@@ -41,7 +41,7 @@ def train_deeptriad_model(
     # 1) Text Encoder
     logger.info("🔧 Initializing Text Encoder...")
     try:
-        text_encoder = BaseTextEncoder(config.base_text_model_name)
+        text_encoder = BaseTextEncoder.from_config(config)
     except Exception as e:
         logger.error(f"Failed to load text encoder: {e}")
         return {"status": "error", "message": str(e)}
@@ -1,9 +1,20 @@
 # numtriad/utils/__init__.py
 
-from .metrics import triad_distance, triad_cosine, alignment_score
+from .metrics import triad_distance, triad_cosine, alignment_score, recall_at_k, triad_drift
+from .feature_hashing import stable_hash, hash_tokens, hashed_counts, hashed_vectors, stable_gaussians
+from .quantization import quantize_model, compare_quantized
 
 __all__ = [
     "triad_distance",
     "triad_cosine", 
-    "alignment_score"
+    "alignment_score",
+    "recall_at_k",
+    "triad_drift",
+    "stable_hash",
+    "hash_tokens",
+    "hashed_counts",
+    "hashed_vectors",
+    "stable_gaussians",
+    "quantize_model",
+    "compare_quantized",
 ]
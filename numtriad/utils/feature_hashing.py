@@ -0,0 +1,151 @@
+# numtriad/utils/feature_hashing.py
+"""
+Process-stable feature hashing
+==============================
+
+Python's hash() of a str is salted per process (PYTHONHASHSEED), so
+vectors built from it differ between workers and across restarts. Any
+cache or saved index built from them goes stale. This module hashes
+tokens with crc32 (C speed, same value in every process), then mixes in
+the seed and spreads the bits over 64 with the splitmix64 finalizer,
+vectorized in NumPy:
+
+  - stable_hash(token)                  -> 64-bit int
+  - bucket(token, n)                    -> stable bucket in [0, n)
+  - hash_tokens(tokens, n)              -> (buckets, signs) arrays
+  - hashed_counts(tokens, n)            -> (n,) float32 signed counts
+  - hashed_vectors(texts, n)            -> (N, n) float32, one bincount per batch
+  - stable_gaussians(keys, n)           -> (N, n) float32 N(0, 1), counter-based
+                                           (replaces np.random.seed(hash(key)))
+
+Signed hashing: bit 63 of the mixed hash picks +1 / -1, so colliding
+tokens cancel on average instead of piling up in one bucket.
+
+Author: GLM Research Team
+Date: 2026-10-18
+"""
+
+import zlib
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+_SIGN_BIT = np.uint64(63)
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+_MASK64 = (1 << 64) - 1
+_SHIFT30, _SHIFT27, _SHIFT31 = np.uint64(30), np.uint64(27), np.uint64(31)
+
+
+def _splitmix64(x: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer of a uint64 array (array arithmetic wraps mod 2^64)"""
+    x = x + _GOLDEN
+    x = (x ^ (x >> _SHIFT30)) * _MIX1
+    x = (x ^ (x >> _SHIFT27)) * _MIX2
+    return x ^ (x >> _SHIFT31)
+
+
+def _crc(text: str) -> int:
+    return zlib.crc32(text.encode("utf-8", "surrogatepass"))
+
+
+def _digests(tokens: Iterable[str], seed: int) -> np.ndarray:
+    crcs = np.fromiter((_crc(t) for t in tokens), dtype=np.uint64)
+    return _splitmix64(crcs | np.uint64((seed & 0xFFFFFFFF) << 32))
+
+
+def stable_hash(token: str, seed: int = 0) -> int:
+    """64-bit hash of a string, identical in every process"""
+    x = (_crc(token) | ((seed & 0xFFFFFFFF) << 32)) + 0x9E3779B97F4A7C15 & _MASK64
+    x = (x ^ (x >> 30)) * 0xBF58476D1CE4E5B9 & _MASK64
+    x = (x ^ (x >> 27)) * 0x94D049BB133111EB & _MASK64
+    return x ^ (x >> 31)
+
+
+def bucket(token: str, n_buckets: int, seed: int = 0) -> int:
+    """Stable bucket of a token in [0, n_buckets)"""
+    return stable_hash(token, seed) % n_buckets
+
+
+def hash_tokens(tokens: Iterable[str], n_buckets: int, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Buckets and signs of tokens.
+
+    Returns:
+        (buckets (T,) int64, signs (T,) float32 in {-1, +1})
+    """
+    digests = _digests(tokens, seed)
+    buckets = (digests % np.uint64(n_buckets)).astype(np.int64)
+    signs = 1.0 - 2.0 * (digests >> _SIGN_BIT).astype(np.float32)
+    return buckets, signs
+
+
+def hashed_counts(
+    tokens: Sequence[str],
+    n_buckets: int,
+    weights: Optional[Sequence[float]] = None,
+    signed: bool = True,
+    seed: int = 0,
+) -> np.ndarray:
+    """(n_buckets,) float32 sum of token weights (1 by default) per bucket"""
+    buckets, signs = hash_tokens(tokens, n_buckets, seed)
+    w = np.ones(buckets.shape[0], dtype=np.float32) if weights is None else np.asarray(weights, dtype=np.float32)
+    if signed:
+        w = w * signs
+    return np.bincount(buckets, weights=w, minlength=n_buckets).astype(np.float32)
+
+
+def hashed_vectors(
+    texts: Sequence[str],
+    n_buckets: int,
+    tokenizer: Callable[[str], List[str]] = lambda t: t.lower().split(),
+    signed: bool = True,
+    normalize: bool = True,
+    seed: int = 0,
+) -> np.ndarray:
+    """
+    (N, n_buckets) float32 hashed bag-of-words of a batch of texts,
+    L2-normalized by default (all-zero rows stay zero).
+    """
+    token_lists = [tokenizer(t) for t in texts]
+    lengths = np.fromiter((len(toks) for toks in token_lists), dtype=np.int64, count=len(token_lists))
+    buckets, signs = hash_tokens((tok for toks in token_lists for tok in toks), n_buckets, seed)
+    flat = np.repeat(np.arange(len(texts), dtype=np.int64) * n_buckets, lengths) + buckets
+    out = np.bincount(
+        flat,
+        weights=signs if signed else None,
+        minlength=len(texts) * n_buckets,
+    ).astype(np.float32).reshape(len(texts), n_buckets)
+    if normalize:
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        np.divide(out, norms, out=out, where=norms > 0)
+    return out
+
+
+def stable_gaussians(keys: Sequence[str], n: int, seed: int = 0) -> np.ndarray:
+    """
+    (N, n) float32 standard normal rows, row i determined by keys[i].
+
+    Counter-based: draw j of row i is splitmix64(digest_i + (j + 1) * golden),
+    split into two 24-bit uniforms and turned into two normals with
+    Box-Muller. No RNG object, the global RNG state is left untouched.
+    """
+    half = (n + 1) // 2
+    counters = np.arange(1, half + 1, dtype=np.uint64) * _GOLDEN
+    bits = _splitmix64(_digests(keys, seed)[:, None] + counters[None, :])
+    scale = np.float32(2.0 ** -24)
+    u1 = ((bits >> np.uint64(40)).astype(np.float32) + np.float32(0.5)) * scale   # (0, 1)
+    u2 = ((bits & np.uint64(0xFFFFFF)).astype(np.float32) + np.float32(0.5)) * scale
+    r = np.sqrt(np.float32(-2.0) * np.log(u1))
+    theta = np.float32(2.0 * np.pi) * u2
+    out = np.empty((bits.shape[0], 2 * half), dtype=np.float32)
+    np.multiply(r, np.cos(theta), out=out[:, :half])
+    np.multiply(r, np.sin(theta), out=out[:, half:])
+    return out[:, :n]
+
+
+def stable_gaussian(key: str, n: int, seed: int = 0) -> np.ndarray:
+    """(n,) float32 standard normal vector determined by key"""
+    return stable_gaussians([key], n, seed)[0]
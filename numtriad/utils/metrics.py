@@ -1,6 +1,6 @@
 # numtriad/utils/metrics.py
 
-from typing import List, Tuple
+from typing import Dict, List, Sequence, Tuple
 import numpy as np
 
 from ..triad_types import Triad
@@ -31,3 +31,40 @@ def alignment_score(pred: List[Triad], target: List[Triad]) -> Tuple[float, floa
     mean_dist = float(np.mean(dists))
     mean_cos = float(np.mean(cos_list))
     return mean_dist, mean_cos
+
+
+def recall_at_k(exact: Sequence, approx: Sequence, k: int) -> float:
+    """
+    Fraction of the exact top-k ids found in the approximate top-k.
+    """
+    exact_k = list(exact)[:k]
+    if not exact_k:
+        return 1.0
+    return len(set(exact_k) & set(list(approx)[:k])) / len(exact_k)
+
+
+def triad_drift(reference: np.ndarray, candidate: np.ndarray) -> Dict[str, float]:
+    """
+    Drift of (N,3) triad probabilities against a reference (e.g. int8 vs fp32).
+
+    Returns:
+        {"n", "mean_l1", "max_l1", "max_abs", "argmax_agreement", "mean_kl"}
+        (L1 per row, KL(reference || candidate) per row)
+    """
+    p = np.asarray(reference, dtype=np.float64).reshape(-1, 3)
+    q = np.asarray(candidate, dtype=np.float64).reshape(-1, 3)
+    if p.shape != q.shape:
+        raise ValueError(f"Shape mismatch: {p.shape} vs {q.shape}")
+    if not len(p):
+        return {"n": 0, "mean_l1": 0.0, "max_l1": 0.0, "max_abs": 0.0, "argmax_agreement": 1.0, "mean_kl": 0.0}
+    l1 = np.abs(p - q).sum(axis=1)
+    eps = 1e-12
+    kl = (p * (np.log(p + eps) - np.log(q + eps))).sum(axis=1)
+    return {
+        "n": int(len(p)),
+        "mean_l1": float(l1.mean()),
+        "max_l1": float(l1.max()),
+        "max_abs": float(np.abs(p - q).max()),
+        "argmax_agreement": float(np.mean(p.argmax(axis=1) == q.argmax(axis=1))),
+        "mean_kl": float(kl.mean()),
+    }
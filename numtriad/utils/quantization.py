@@ -0,0 +1,105 @@
+# numtriad/utils/quantization.py
+"""
+Dynamic int8 quantization of the triad models
+=============================================
+
+The triad models are stacks of nn.Linear layers (projectors, fusion MLP,
+triad / cross-modal heads, transformer feed-forward). Dynamic quantization
+stores their weights in int8 and quantizes activations on the fly, per
+batch, so no calibration set is needed:
+
+  - quantize_model(model, "int8")   -> int8 copy (the fp32 model is untouched)
+  - compare_quantized(fp32, int8, batches)
+                                    -> triad_drift of the int8 outputs vs
+                                       fp32 + timing of both on the same batches
+
+Quantized ops run on CPU only. Attention projections of
+nn.TransformerEncoderLayer (fused in_proj weight, out_proj) stay fp32;
+layers whose feed-forward is quantized leave the fused encoder-layer fast
+path, which expects fp32 weight tensors.
+
+Author: GLM Research Team
+Date: 2026-10-18
+"""
+
+import copy
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from .metrics import triad_drift
+
+
+QUANTIZE_MODES = ("int8",)
+
+
+def _check_cpu(model: nn.Module) -> None:
+    for p in model.parameters():
+        if p.device.type != "cpu":
+            raise ValueError(f"int8 dynamic quantization runs on CPU only (model is on {p.device})")
+
+
+def quantize_model(model: nn.Module, mode: Optional[str] = "int8") -> nn.Module:
+    """
+    Eval-mode copy of a model with its nn.Linear layers quantized.
+
+    Args:
+        model: fp32 model (on CPU)
+        mode: None (model returned as is) or "int8"
+    """
+    if mode is None:
+        return model
+    if mode not in QUANTIZE_MODES:
+        raise ValueError(f"Unknown quantize mode {mode!r}, expected one of {QUANTIZE_MODES} or None")
+    _check_cpu(model)
+    quantized = torch.ao.quantization.quantize_dynamic(
+        copy.deepcopy(model).eval(), {nn.Linear}, dtype=torch.qint8
+    )
+    for layer in quantized.modules():
+        if isinstance(layer, nn.TransformerEncoderLayer):
+            # only read to pick the fused fast path, which cannot take
+            # packed int8 weights (the regular path uses layer.activation)
+            layer.activation_relu_or_gelu = 0
+    return quantized
+
+
+def count_quantized_linears(model: nn.Module) -> int:
+    return sum(isinstance(m, torch.ao.nn.quantized.dynamic.Linear) for m in model.modules())
+
+
+def compare_quantized(
+    fp32_fn: Callable[[Any], np.ndarray],
+    int8_fn: Callable[[Any], np.ndarray],
+    batches: Iterable[Any],
+) -> Dict[str, Any]:
+    """
+    Run both models on the same held-out batches.
+
+    Args:
+        fp32_fn / int8_fn: batch -> (B, 3) triad probabilities
+        batches: Held-out batches
+
+    Returns:
+        triad_drift(fp32, int8) + {"fp32_ms", "int8_ms", "speedup"}
+        (wall time of the second pass over the batches)
+    """
+    batches = list(batches)
+    outputs = {}
+    timings = {}
+    with torch.no_grad():
+        for name, fn in (("fp32", fp32_fn), ("int8", int8_fn)):
+            # first pass: outputs + warm-up (weight packing, allocator)
+            probs = [np.asarray(fn(b), dtype=np.float32).reshape(-1, 3) for b in batches]
+            outputs[name] = np.concatenate(probs) if probs else np.empty((0, 3), dtype=np.float32)
+            start = time.perf_counter()
+            for b in batches:
+                fn(b)
+            timings[name] = (time.perf_counter() - start) * 1000.0
+    report: Dict[str, Any] = triad_drift(outputs["fp32"], outputs["int8"])
+    report["fp32_ms"] = timings["fp32"]
+    report["int8_ms"] = timings["int8"]
+    report["speedup"] = timings["fp32"] / timings["int8"] if timings["int8"] > 0 else float("nan")
+    return report
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark inférence eager vs graphes exportés (NumTriadMultimodalV4 + DeepTriadTransformer).
+Utilisation:
+python scripts/benchmark_inference_export.py \
+  --format auto \
+  --batch_sizes 1 32 256 \
+  --seq_len 16 \
+  --repeats 20
+"""
+
+import argparse
+import tempfile
+import time
+from dataclasses import replace
+from typing import Callable, Dict, List
+
+import numpy as np
+import torch
+
+from numtriad.core.system_v4 import (
+    DeepTriadTransformerConfig,
+    NumTriadSystemConfig,
+    NumTriadSystemV4,
+)
+from numtriad.multimodal_v4 import MultimodalV4Config
+
+
+def build_config(device: str = "cpu") -> NumTriadSystemConfig:
+    return NumTriadSystemConfig(
+        multimodal=MultimodalV4Config(
+            dim_text_in=256,
+            dim_vision_in=256,
+            dim_code_in=256,
+            dim_audio_in=128,
+            dim_proj=192,
+            dim_t_cross=32,
+            fusion_hidden_dim=256,
+            fusion_num_layers=2,
+            dropout=0.1,
+            device=device,
+        ),
+        deeptriad=DeepTriadTransformerConfig(dim_in=192, dim_model=192, num_layers=2, num_heads=4, dim_ff=384),
+        device=device,
+    )
+
+
+def median_ms(fn: Callable[[], object], repeats: int, warmup: int = 3) -> float:
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times) * 1000.0)
+
+
+def benchmark(
+    fmt: str,
+    batch_sizes: List[int],
+    seq_len: int,
+    repeats: int,
+) -> List[Dict[str, float]]:
+    torch.manual_seed(0)
+    eager = NumTriadSystemV4(build_config())
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        manifest = eager.export_inference(tmp, format=fmt)
+        exported = NumTriadSystemV4(replace(build_config(), inference_artifact=tmp))
+        print(f"format: {manifest['format']}")
+
+        rng = np.random.default_rng(0)
+        for b in batch_sizes:
+            texts = [f"document {i} " + "triad abstraction concrete " * int(rng.integers(1, 20)) for i in range(b)]
+            seqs = rng.standard_normal((seq_len, 192)).astype("float32")
+            x = torch.from_numpy(rng.standard_normal((b, seq_len, 192)).astype("float32"))
+
+            emb_e, _ = eager.encode_sample(texts=texts)
+            emb_x, _ = exported.encode_sample(texts=texts)
+
+            def deep(system: NumTriadSystemV4) -> Callable[[], object]:
+                def run():
+                    system.deeptriad.eval()
+                    with torch.no_grad():
+                        return system.deeptriad(x)
+                return run
+
+            rows.append({
+                "batch": b,
+                "text_eager_ms": median_ms(lambda: eager.encode_sample(texts=texts), repeats),
+                "text_export_ms": median_ms(lambda: exported.encode_sample(texts=texts), repeats),
+                "deep_eager_ms": median_ms(deep(eager), repeats),
+                "deep_export_ms": median_ms(deep(exported), repeats),
+                "max_abs_diff": float(np.abs(emb_e - emb_x).max()),
+            })
+        # une séquence (chemin triad_sequence_analysis)
+        rows.append({
+            "batch": "seq",
+            "text_eager_ms": float("nan"),
+            "text_export_ms": float("nan"),
+            "deep_eager_ms": median_ms(lambda: eager.triad_sequence_analysis(seqs), repeats),
+            "deep_export_ms": median_ms(lambda: exported.triad_sequence_analysis(seqs), repeats),
+            "max_abs_diff": float(np.abs(
+                eager.triad_sequence_analysis(seqs)[0] - exported.triad_sequence_analysis(seqs)[0]
+            ).max()),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--format", type=str, default="auto", choices=["auto", "torchscript", "onnx"])
+    parser.add_argument("--batch_sizes", type=int, nargs="+", default=[1, 32, 256])
+    parser.add_argument("--seq_len", type=int, default=16)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--threads", type=int, default=0, help="torch.set_num_threads (0 = défaut)")
+    args = parser.parse_args()
+
+    if args.threads > 0:
+        torch.set_num_threads(args.threads)
+
+    rows = benchmark(args.format, args.batch_sizes, args.seq_len, args.repeats)
+    print(f"{'batch':>6} | {'text eager':>10} | {'text export':>11} | {'deep eager':>10} | {'deep export':>11} | {'max |diff|':>10}")
+    for r in rows:
+        print(
+            f"{r['batch']:>6} | {r['text_eager_ms']:>8.2f}ms | {r['text_export_ms']:>9.2f}ms | "
+            f"{r['deep_eager_ms']:>8.2f}ms | {r['deep_export_ms']:>9.2f}ms | {r['max_abs_diff']:>10.2e}"
+        )
+
+
+if __name__ == "__main__":
+    main()
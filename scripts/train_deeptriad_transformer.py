@@ -43,7 +43,7 @@ def train_deeptriad(
 
     # 1) Encodeur texte (freeze)
     print("🔧 Initialisation de l'encodeur texte...")
-    text_encoder = BaseTextEncoder(config.base_text_model_name)
+    text_encoder = BaseTextEncoder.from_config(config)
 
     # 2) Dataset
     print("📊 Construction du dataset séquentiel...")
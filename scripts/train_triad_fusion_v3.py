@@ -41,7 +41,7 @@ def train_triad_fusion_v3(
 
     # 1) Encoders freeze
     print("🔧 Initialisation des encodeurs...")
-    text_encoder = BaseTextEncoder(config.base_text_model_name)
+    text_encoder = BaseTextEncoder.from_config(config)
     vision_encoder = VisionEncoder(device=config.device)
 
     print("📊 Construction du dataset multimodal...")
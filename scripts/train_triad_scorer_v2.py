@@ -102,7 +102,7 @@ def train(
     device = torch.device(config.device)
 
     # 1) Encoders de base
-    base_encoder = BaseTextEncoder(config.base_text_model_name)
+    base_encoder = BaseTextEncoder.from_config(config)
     dataset = build_dataset_from_jsonl(
         jsonl_path=jsonl_path,
         text_encoder=base_encoder,
@@ -12,6 +12,8 @@ Comprehensive tests for all 4 pillars:
 
 import sys
 import logging
+import tempfile
+from pathlib import Path
 import numpy as np
 
 # Setup logging
@@ -38,6 +40,9 @@ try:
         NumTriadRAGIndexV4,
         IndexedDoc,
     )
+    from numtriad.core.sharded_rag import ShardedRAGIndexV4
+    from numtriad.core.batching import MicroBatcher
+    from numtriad.index import BM25Index, MinHashLSH, MultiVectorStore, tokenize
     SYSTEM_AVAILABLE = True
 except ImportError as e:
     SYSTEM_AVAILABLE = False
@@ -45,12 +50,92 @@ except ImportError as e:
 
 # Try importing multimodal
 try:
-    from numtriad.multimodal_v4 import MultimodalV4Config
+    from numtriad.multimodal_v4 import MultimodalV4Config, char_histograms
     MULTIMODAL_AVAILABLE = True
 except ImportError:
     MULTIMODAL_AVAILABLE = False
     logger.warning("NumTriadMultimodalV4 not available")
 
+from numtriad.utils.feature_hashing import hashed_vectors, stable_gaussians, stable_hash
+
+try:
+    from numtriad.encoders.embedding_cache import EmbeddingCache
+    EMBEDDING_CACHE_AVAILABLE = True
+except ImportError:
+    EMBEDDING_CACHE_AVAILABLE = False
+
+
+# ============================================================================
+# DEEPTRIAD RAG HELPERS
+# ============================================================================
+
+def import_without_models(name):
+    """
+    Private copy of a module whose import chain reaches numtriad.models
+    (encoders V2 / V3). When that package is absent, placeholder modules are
+    used for the import only; tests replace the models they need.
+    """
+    import importlib
+    import types
+
+    before = dict(sys.modules)
+    for loaded in [m for m in before if m == name or m.startswith("numtriad.rag")]:
+        del sys.modules[loaded]
+    try:
+        importlib.import_module("numtriad.models")
+    except ImportError:
+        package = types.ModuleType("numtriad.models")
+        package.__path__ = []
+        sys.modules["numtriad.models"] = package
+        for submodule, attrs in {
+            "deeptriad_transformer": ["DeepTriadTransformer", "DeepTriadTransformerConfig"],
+            "triad_scorer_mlp_v2": ["TriadScorerMLP_V2"],
+        }.items():
+            module = types.ModuleType(f"numtriad.models.{submodule}")
+            for attr in attrs:
+                setattr(module, attr, None)
+            sys.modules[module.__name__] = module
+    try:
+        return importlib.import_module(name)
+    finally:
+        # modules imported here (against the placeholders) stay private
+        for loaded in [m for m in sys.modules if m not in before]:
+            del sys.modules[loaded]
+        sys.modules.update(before)
+
+
+class HashingV3Encoder:
+    """
+    Deterministic stand-in for NumTriadEmbeddingV3: hashed text vectors with
+    non-unit norms, triad from three more hashed coordinates.
+    """
+
+    dim = 16
+
+    def __init__(self, base_config=None, v3_config=None):
+        self.encoded = []
+
+    def encode(self, texts, triad_mode="auto", return_raw=False):
+        from numtriad.triad_types import Triad
+
+        texts = list(texts)
+        self.encoded.extend(texts)
+        g = stable_gaussians(texts, self.dim + 4)
+        base = g[:, :self.dim] * (1.0 + np.abs(g[:, self.dim:self.dim + 1]))
+        triads = [Triad.normalize(np.exp(row)) for row in g[:, self.dim + 1:]]
+        triad_arr = np.stack([t.as_array() for t in triads]) if texts else np.zeros((0, 3))
+        enriched = np.concatenate([base, triad_arr], axis=1).astype("float32")
+        return enriched, triads
+
+
+def make_deeptriad_index(**kwargs):
+    """DeepTriadRAGIndex over HashingV3Encoder (index.encoder.encoded lists encoded texts)"""
+    from numtriad.config import NumTriadConfig
+
+    module = import_without_models("numtriad.rag.deeptriad_rag")
+    module.NumTriadEmbeddingV3 = HashingV3Encoder
+    return module.DeepTriadRAGIndex(NumTriadConfig(), None, **kwargs)
+
 
 # ============================================================================
 # TEST SUITE
@@ -221,6 +306,1051 @@ class TestNumTriadV4:
         except Exception as e:
             self.log_test("Cosine Similarity", "FAIL", str(e))
 
+    def test_rag_vectorized_scoring(self):
+        """Test 5b: Vectorized RAG scoring matches per-document reference"""
+        try:
+            rag = NumTriadRAGIndexV4()
+            rng = np.random.default_rng(0)
+            for i in range(200):
+                rag.add_document(IndexedDoc(
+                    doc_id=f"doc{i}",
+                    embedding=rng.standard_normal(64).astype("float32"),
+                    triad=rng.dirichlet([1, 1, 1]).astype("float32"),
+                ))
+
+            query_emb = rng.standard_normal(64).astype("float32")
+            query_triad = rng.dirichlet([1, 1, 1]).astype("float32")
+
+            for mode in ["auto", "abstract", "concrete", "balanced"]:
+                results = rag.query(query_emb, query_triad, k=10, mode=mode)
+                target = rag._triad_target_from_mode(mode, query_triad)
+                reference = sorted(
+                    (
+                        (d.doc_id, 0.7 * rag._cosine_sim(query_emb, d.embedding)
+                         + 0.3 * rag._triad_alignment_score(d.triad, target))
+                        for d in rag.docs
+                    ),
+                    key=lambda x: x[1],
+                    reverse=True,
+                )[:10]
+                assert [d.doc_id for d, _ in results] == [r[0] for r in reference], \
+                    f"Ranking differs from reference for mode {mode}"
+                assert np.allclose([s for _, s in results], [r[1] for r in reference], atol=1e-5), \
+                    f"Scores differ from reference for mode {mode}"
+
+            self.log_test("RAG Vectorized Scoring", "PASS")
+        except Exception as e:
+            self.log_test("RAG Vectorized Scoring", "FAIL", str(e))
+
+    def test_rag_save_load(self):
+        """Test 5c: RAG index segment save / memory-mapped load"""
+        try:
+            rag = NumTriadRAGIndexV4()
+            rng = np.random.default_rng(1)
+            for i in range(50):
+                rag.add_document(IndexedDoc(
+                    doc_id=f"doc{i}",
+                    embedding=rng.standard_normal(32).astype("float32"),
+                    triad=rng.dirichlet([1, 1, 1]).astype("float32"),
+                    metadata={"index": i},
+                ))
+
+            with tempfile.TemporaryDirectory() as tmp:
+                rag.save(tmp)
+                loaded = NumTriadRAGIndexV4.load(tmp, mmap=True)
+
+                assert len(loaded) == 50, "Loaded index size mismatch"
+                assert loaded.docs[7].metadata == {"index": 7}, "Metadata not restored"
+
+                query_emb = rng.standard_normal(32).astype("float32")
+                expected = [d.doc_id for d, _ in rag.query(query_emb, k=5, mode="abstract")]
+                got = [d.doc_id for d, _ in loaded.query(query_emb, k=5, mode="abstract")]
+                assert expected == got, "Loaded index returns different results"
+
+                # Appending to a memory-mapped index must still work
+                loaded.add_document(IndexedDoc(
+                    doc_id="new",
+                    embedding=query_emb,
+                    triad=np.array([0.2, 0.6, 0.2], dtype="float32"),
+                ))
+                top_doc, _ = loaded.query(query_emb, k=1, mode="abstract")[0]
+                assert top_doc.doc_id == "new", "Appended document not searchable"
+                del loaded, top_doc
+
+            self.log_test("RAG Save / Load", "PASS")
+        except Exception as e:
+            self.log_test("RAG Save / Load", "FAIL", str(e))
+
+    def test_rag_ivf_recall(self):
+        """Test 5d: IVF approximate search recall vs exact search"""
+        try:
+            rag = NumTriadRAGIndexV4()
+            rng = np.random.default_rng(2)
+            centers = rng.standard_normal((20, 32))
+            for i in range(2000):
+                rag.add_document(IndexedDoc(
+                    doc_id=f"doc{i}",
+                    embedding=(centers[i % 20] + 0.3 * rng.standard_normal(32)).astype("float32"),
+                    triad=rng.dirichlet([1, 1, 1]).astype("float32"),
+                ))
+
+            rag.build_ivf(nlist=40, nprobe=40)
+            queries = (centers[:10] + 0.3 * rng.standard_normal((10, 32))).astype("float32")
+
+            # Probing every list is exact
+            recall_full = rag.evaluate_ann_recall(queries, k=10, mode="balanced")
+            assert recall_full == 1.0, f"Full probe should be exact, got recall {recall_full}"
+
+            recall_low = rag.evaluate_ann_recall(queries, k=10, mode="balanced", nprobe=4)
+            assert 0.0 < recall_low <= 1.0, f"Unexpected recall {recall_low}"
+
+            # New documents are assigned without retraining
+            rag.add_document(IndexedDoc(
+                doc_id="new",
+                embedding=queries[0],
+                triad=np.array([1/3, 1/3, 1/3], dtype="float32"),
+            ))
+            top_doc, _ = rag.query(queries[0], k=1, mode="balanced", nprobe=4)[0]
+            assert top_doc.doc_id == "new", "Incrementally added document not found"
+
+            self.log_test("RAG IVF Recall", "PASS")
+        except Exception as e:
+            self.log_test("RAG IVF Recall", "FAIL", str(e))
+
+    def test_rag_hnsw(self):
+        """Test 5e: HNSW graph recall, online insertion and persistence"""
+        try:
+            rag = NumTriadRAGIndexV4()
+            rag.enable_hnsw(M=12, ef_construction=80, ef_search=64)
+            rng = np.random.default_rng(3)
+            centers = rng.standard_normal((20, 32))
+            for i in range(1000):
+                rag.add_document(IndexedDoc(
+                    doc_id=f"doc{i}",
+                    embedding=(centers[i % 20] + 0.3 * rng.standard_normal(32)).astype("float32"),
+                    triad=rng.dirichlet([1, 1, 1]).astype("float32"),
+                ))
+            assert len(rag.ann) == 1000, "All documents should be inserted online"
+
+            # clustered data: full neighbor lists must keep their links between clusters
+            seen, stack = {rag.ann.entry_point}, [rag.ann.entry_point]
+            while stack:
+                for n in rag.ann._neighbors(stack.pop(), 0).tolist():
+                    if n not in seen:
+                        seen.add(n)
+                        stack.append(n)
+            assert len(seen) == 1000, f"Only {len(seen)}/1000 nodes reachable on layer 0"
+
+            queries = (centers[:10] + 0.3 * rng.standard_normal((10, 32))).astype("float32")
+            recall = rag.evaluate_ann_recall(queries, k=10, mode="balanced", ef_search=128)
+            assert recall >= 0.95, f"HNSW recall too low: {recall}"
+
+            # concurrent readers must not share visited marks
+            from concurrent.futures import ThreadPoolExecutor
+
+            many = (centers[rng.integers(0, 20, 600)] + 0.3 * rng.standard_normal((600, 32))).astype("float32")
+            serial = [[d.doc_id for d, _ in rag.query(q, k=10, mode="balanced")] for q in many]
+            with ThreadPoolExecutor(max_workers=6) as pool:
+                parallel = list(pool.map(lambda q: [d.doc_id for d, _ in rag.query(q, k=10, mode="balanced")], many))
+            assert all(len(set(ids)) == len(ids) for ids in parallel), "Duplicate ids under concurrent queries"
+            assert parallel == serial, "Concurrent HNSW queries differ from serial ones"
+
+            with tempfile.TemporaryDirectory() as tmp:
+                rag.save(tmp)
+                loaded = NumTriadRAGIndexV4.load(tmp)
+                assert type(loaded.ann).__name__ == "HNSWIndex", "HNSW graph not restored"
+                expected = [d.doc_id for d, _ in rag.query(queries[0], k=5, mode="balanced")]
+                got = [d.doc_id for d, _ in loaded.query(queries[0], k=5, mode="balanced")]
+                assert got == expected, "Loaded graph returns different results"
+
+            self.log_test("RAG HNSW", "PASS")
+        except Exception as e:
+            self.log_test("RAG HNSW", "FAIL", str(e))
+
+    def test_rag_compressed(self):
+        """Test 5f: int8 / PQ compressed first pass with exact rerank"""
+        try:
+            rag = NumTriadRAGIndexV4()
+            rng = np.random.default_rng(4)
+            centers = rng.standard_normal((20, 32))
+            for i in range(1000):
+                rag.add_document(IndexedDoc(
+                    doc_id=f"doc{i}",
+                    embedding=(centers[i % 20] + 0.3 * rng.standard_normal(32)).astype("float32"),
+                    triad=rng.dirichlet([1, 1, 1]).astype("float32"),
+                ))
+            queries = (centers[:10] + 0.3 * rng.standard_normal((10, 32))).astype("float32")
+
+            rag.enable_compression("sq", rerank=100)
+            recall_sq = rag.evaluate_ann_recall(queries, k=10, mode="balanced")
+            assert recall_sq >= 0.8, f"SQ recall too low: {recall_sq}"
+            report = rag.memory_report()
+            assert report["reduction"] > 3.0, f"Unexpected SQ reduction: {report}"
+
+            rag.enable_compression("pq", rerank=200, m=8, nbits=6)
+            assert rag.memory_report()["code_bytes_per_doc"] < report["code_bytes_per_doc"]
+            # Reranking the whole index is exact
+            recall_full = rag.evaluate_ann_recall(queries, k=10, mode="balanced", rerank=len(rag))
+            assert recall_full == 1.0, f"Full rerank should be exact, got {recall_full}"
+
+            with tempfile.TemporaryDirectory() as tmp:
+                rag.save(tmp)
+                loaded = NumTriadRAGIndexV4.load(tmp)
+                expected = [d.doc_id for d, _ in rag.query(queries[0], k=5, mode="balanced")]
+                got = [d.doc_id for d, _ in loaded.query(queries[0], k=5, mode="balanced")]
+                assert got == expected, "Loaded codes return different results"
+
+            self.log_test("RAG Compressed", "PASS")
+        except Exception as e:
+            self.log_test("RAG Compressed", "FAIL", str(e))
+
+    def test_rag_triad_buckets(self):
+        """Test 5g: triad-simplex bucket pruning returns the full-scan results"""
+        try:
+            rag = NumTriadRAGIndexV4()
+            rng = np.random.default_rng(5)
+            centers = rng.standard_normal((20, 32))
+
+            def add(start, count):
+                for i in range(start, start + count):
+                    rag.add_document(IndexedDoc(
+                        doc_id=f"doc{i}",
+                        embedding=(centers[i % 20] + 0.3 * rng.standard_normal(32)).astype("float32"),
+                        triad=rng.dirichlet([0.5, 0.5, 0.5]).astype("float32"),
+                    ))
+
+            add(0, 1500)
+            queries = (centers[:5] + 0.3 * rng.standard_normal((5, 32))).astype("float32")
+            modes = ["abstract", "concrete", "balanced"]
+            expected = [[d.doc_id for d, _ in rag.query(q, k=10, mode=m)] for m in modes for q in queries]
+
+            rag.build_triad_buckets(resolution=4)
+            got = [[d.doc_id for d, _ in rag.query(q, k=10, mode=m)] for m in modes for q in queries]
+            assert got == expected, "Pruned search differs from the full scan"
+
+            # Documents added after the build are bucketed incrementally
+            # ... while exact queries run on other threads (anchors are
+            # re-centered by the writer, queries only read the bounds)
+            import threading
+            errors = []
+
+            def read():
+                try:
+                    for i in range(40):
+                        hits = rag.query(queries[i % 5], k=10, mode=modes[i % 3])
+                        assert len(hits) == 10
+                except Exception as e:
+                    errors.append(e)
+
+            readers = [threading.Thread(target=read) for _ in range(4)]
+            for t in readers:
+                t.start()
+            add(1500, 1500)
+            for t in readers:
+                t.join()
+            assert not errors, f"Concurrent query failed: {errors[0]!r}"
+            assert not rag.triad_buckets._stale, "Stale anchors left after the writes"
+            rag.triad_buckets, buckets = None, rag.triad_buckets
+            expected = [[d.doc_id for d, _ in rag.query(q, k=10, mode=m)] for m in modes for q in queries]
+            rag.triad_buckets = buckets
+            got = [[d.doc_id for d, _ in rag.query(q, k=10, mode=m)] for m in modes for q in queries]
+            assert got == expected, "Pruned search differs after incremental adds"
+
+            with tempfile.TemporaryDirectory() as tmp:
+                rag.save(tmp)
+                loaded = NumTriadRAGIndexV4.load(tmp)
+                assert loaded.triad_buckets is not None, "Triad buckets not restored"
+                got = [[d.doc_id for d, _ in loaded.query(q, k=10, mode=m)] for m in modes for q in queries]
+                assert got == expected, "Loaded index returns different results"
+
+            self.log_test("RAG Triad Buckets", "PASS")
+        except Exception as e:
+            self.log_test("RAG Triad Buckets", "FAIL", str(e))
+
+    def test_rag_metadata_filters(self):
+        """Test 5h: metadata filter pushdown (equality, IN, range)"""
+        try:
+            rag = NumTriadRAGIndexV4()
+            rng = np.random.default_rng(6)
+            types = ["tutorial", "paper", "api", "blog"]
+            for i in range(500):
+                rag.add_document(IndexedDoc(
+                    doc_id=f"doc{i}",
+                    embedding=rng.standard_normal(32).astype("float32"),
+                    triad=rng.dirichlet([1, 1, 1]).astype("float32"),
+                    metadata={"type": types[i % 4], "year": 2000 + i % 25, "rare": i % 97 == 0,
+                              "tags": [types[i % 4], types[i % 3]]},
+                ))
+            query = rng.standard_normal(32).astype("float32")
+
+            def reference(predicate, k):
+                allowed = [d for d in rag.docs if predicate(d.metadata)]
+                ranked = [d for d, _ in rag.query(query, k=len(rag), mode="balanced")]
+                return [d.doc_id for d in ranked if d in allowed][:k]
+
+            cases = [
+                ({"type": "paper"}, lambda m: m["type"] == "paper"),
+                ({"type": ["api", "blog"]}, lambda m: m["type"] in ("api", "blog")),
+                ({"year": {"$gte": 2010, "$lt": 2015}}, lambda m: 2010 <= m["year"] < 2015),
+                ({"type": "tutorial", "year": {"$lte": 2004}},
+                 lambda m: m["type"] == "tutorial" and m["year"] <= 2004),
+                ({"rare": True}, lambda m: m["rare"]),
+                # list values: $eq compares the whole list, a bare list stays IN
+                ({"tags": {"$eq": ["paper", "api"]}}, lambda m: m["tags"] == ["paper", "api"]),
+                ({"tags": {"$eq": ("paper", "api"), "$in": [["paper", "api"], ["blog", "api"]]}},
+                 lambda m: m["tags"] == ["paper", "api"]),
+                ({"tags": [["blog", "api"], ["tutorial", "paper"]]},
+                 lambda m: m["tags"] in (["blog", "api"], ["tutorial", "paper"])),
+            ]
+            for filters, predicate in cases:
+                got = [d.doc_id for d, _ in rag.query(query, k=10, mode="balanced", filters=filters)]
+                expected = reference(predicate, 10)
+                assert got == expected, f"Filter {filters} returned {got}, expected {expected}"
+                assert len(got) == min(10, sum(predicate(d.metadata) for d in rag.docs)), \
+                    f"Filter {filters} should return exactly k hits when enough match"
+
+            assert rag.query(query, k=10, filters={"type": "missing"}) == []
+            assert rag.query(query, k=10, filters={"tags": {"$eq": "paper"}}) == [], \
+                "$eq on a list field must not match single elements"
+
+            with tempfile.TemporaryDirectory() as tmp:
+                rag.save(tmp)
+                loaded = NumTriadRAGIndexV4.load(tmp)
+                got = [d.doc_id for d, _ in loaded.query(query, k=10, mode="balanced", filters=cases[2][0])]
+                assert got == reference(cases[2][1], 10), "Filters differ after load"
+
+            self.log_test("RAG Metadata Filters", "PASS")
+        except Exception as e:
+            self.log_test("RAG Metadata Filters", "FAIL", str(e))
+
+    def test_rag_delete_upsert(self):
+        """Test 5i: tombstone deletes, upserts and compaction"""
+        try:
+            rag = NumTriadRAGIndexV4(auto_compact=False)
+            rng = np.random.default_rng(7)
+
+            def make(i):
+                return IndexedDoc(
+                    doc_id=f"doc{i}",
+                    embedding=rng.standard_normal(32).astype("float32"),
+                    triad=rng.dirichlet([1, 1, 1]).astype("float32"),
+                    metadata={"parity": i % 2},
+                )
+
+            for i in range(400):
+                rag.add_document(make(i))
+            rag.enable_hnsw(M=8, ef_construction=64, seed=0)
+            query = rng.standard_normal(32).astype("float32")
+
+            top = rag.query(query, k=1, exact=True)[0][0].doc_id
+            assert rag.delete(top) and not rag.delete(top), "Delete should succeed once"
+            assert top not in [d.doc_id for d, _ in rag.query(query, k=len(rag), exact=True)]
+
+            rag.upsert(make(3))
+            assert len(rag) == 399, f"Upsert should not duplicate, got {len(rag)}"
+            ids = [d.doc_id for d, _ in rag.query(query, k=len(rag), exact=True)]
+            assert len(ids) == len(set(ids)) == 399, "Query returned deleted or duplicate docs"
+
+            for i in range(0, 400, 2):
+                rag.delete(f"doc{i}")
+            expected = [d.doc_id for d, _ in rag.query(query, k=10, exact=True)]
+            filtered = [d.doc_id for d, _ in rag.query(query, k=10, filters={"parity": 1})]
+            assert filtered == expected, "Filters should skip deleted rows"
+
+            with tempfile.TemporaryDirectory() as tmp:
+                rag.save(tmp)
+                loaded = NumTriadRAGIndexV4.load(tmp)
+                assert len(loaded) == len(rag), "Tombstones lost on load"
+                assert [d.doc_id for d, _ in loaded.query(query, k=10, exact=True)] == expected
+
+            n_live = len(rag)
+            rag.compact(background=False)
+            assert len(rag.docs) == len(rag) == n_live, "Compaction should drop dead rows"
+            assert [d.doc_id for d, _ in rag.query(query, k=10, exact=True)] == expected
+            assert [d.doc_id for d, _ in rag.query(query, k=10, ef_search=400)] == expected
+
+            self.log_test("RAG Delete/Upsert/Compaction", "PASS")
+        except Exception as e:
+            self.log_test("RAG Delete/Upsert/Compaction", "FAIL", str(e))
+
+    def test_rag_sharded(self):
+        """Test 5j: sharded index (worker processes) matches a single index"""
+        try:
+            rng = np.random.default_rng(8)
+            docs = [
+                IndexedDoc(
+                    doc_id=f"doc{i}",
+                    embedding=rng.standard_normal(32).astype("float32"),
+                    triad=rng.dirichlet([1, 1, 1]).astype("float32"),
+                    metadata={"type": ["a", "b", "c"][i % 3]},
+                )
+                for i in range(600)
+            ]
+            single = NumTriadRAGIndexV4()
+            for doc in docs:
+                single.add_document(doc)
+
+            with ShardedRAGIndexV4(n_shards=3) as sharded:
+                sharded.add_documents(docs[:500])
+                for doc in docs[500:]:
+                    sharded.add_document(doc)
+                assert len(sharded) == 600, f"Expected 600 docs, got {len(sharded)}"
+                assert min(sharded.shard_sizes()) > 0, "Every shard should hold documents"
+
+                for _ in range(10):
+                    query = rng.standard_normal(32).astype("float32")
+                    for kwargs in ({"mode": "balanced"}, {"mode": "abstract", "filters": {"type": "b"}}):
+                        got = [d.doc_id for d, _ in sharded.query(query, k=10, **kwargs)]
+                        expected = [d.doc_id for d, _ in single.query(query, k=10, **kwargs)]
+                        assert got == expected, f"Sharded top-k differs for {kwargs}"
+
+                assert sharded.delete("doc7") and not sharded.delete("doc7")
+                assert len(sharded) == 599
+
+                with tempfile.TemporaryDirectory() as tmp:
+                    sharded.save(tmp)
+                    with ShardedRAGIndexV4.load(tmp) as loaded:
+                        assert loaded.shard_sizes() == sharded.shard_sizes(), "Shards differ after load"
+
+            self.log_test("RAG Sharded Index", "PASS")
+        except Exception as e:
+            self.log_test("RAG Sharded Index", "FAIL", str(e))
+
+    def test_rag_wal_recovery(self):
+        """Test 5l: write-ahead log, checkpoints and crash recovery"""
+        try:
+            rng = np.random.default_rng(10)
+            docs = [
+                IndexedDoc(
+                    doc_id=f"doc{i}",
+                    embedding=rng.standard_normal(32).astype("float32"),
+                    triad=rng.dirichlet([1, 1, 1]).astype("float32"),
+                    metadata={"i": i},
+                )
+                for i in range(300)
+            ]
+            reference = NumTriadRAGIndexV4()
+
+            with tempfile.TemporaryDirectory() as tmp:
+                rag = NumTriadRAGIndexV4.recover(tmp, checkpoint_every=40)
+                rag.add_documents(docs[:100])
+                # checkpoint_every counts records: one bulk add of 100 is past it
+                assert (Path(tmp) / "CHECKPOINT").exists(), "Bulk add should trigger a checkpoint"
+                assert rag._logged_since_checkpoint == 0
+                for doc in docs[100:250]:
+                    rag.add_document(doc)
+                for i in range(0, 250, 5):
+                    rag.delete(f"doc{i}")
+                assert (Path(tmp) / "CHECKPOINT").exists(), "Expected a checkpoint"
+
+                reference.add_documents(docs[:250])
+                for i in range(0, 250, 5):
+                    reference.delete(f"doc{i}")
+
+                # crash: no close(), then a torn record at the end of the log
+                wal_files = sorted(Path(tmp).glob("wal-*.log"))
+                with open(wal_files[-1], "ab") as f:
+                    f.write(b"\x40\x00\x00\x00torn")
+
+                recovered = NumTriadRAGIndexV4.recover(tmp, checkpoint_every=40)
+                assert len(recovered) == len(reference) == 200, f"Recovered {len(recovered)} docs"
+                for _ in range(5):
+                    query = rng.standard_normal(32).astype("float32")
+                    got = [d.doc_id for d, _ in recovered.query(query, k=10, exact=True)]
+                    expected = [d.doc_id for d, _ in reference.query(query, k=10, exact=True)]
+                    assert got == expected, "Recovered index differs"
+
+                recovered.add_documents(docs[250:])
+                recovered.close()
+                reopened = NumTriadRAGIndexV4.recover(tmp)
+                assert len(reopened) == 250, f"Expected 250 docs after reopen, got {len(reopened)}"
+                reopened.close()
+
+                # the sharded index has no WAL: asking for both must not silently drop durability
+                try:
+                    NumTriadSystemV4(NumTriadSystemConfig(rag_shards=2, rag_wal_dir=tmp))
+                    raise AssertionError("rag_wal_dir with rag_shards > 0 should be rejected")
+                except ValueError:
+                    pass
+
+            self.log_test("RAG Write-Ahead Log", "PASS")
+        except Exception as e:
+            self.log_test("RAG Write-Ahead Log", "FAIL", str(e))
+
+    def test_rag_stream_query(self):
+        """Test 5m: out-of-core streaming query matches the exact in-memory query"""
+        try:
+            rng = np.random.default_rng(11)
+            rag = NumTriadRAGIndexV4()
+            rag.add_documents([
+                IndexedDoc(
+                    doc_id=f"doc{i}",
+                    embedding=rng.standard_normal(32).astype("float32"),
+                    triad=rng.dirichlet([1, 1, 1]).astype("float32"),
+                    metadata={"i": i},
+                )
+                for i in range(1000)
+            ])
+            for i in range(0, 1000, 3):
+                rag.delete(f"doc{i}")
+
+            with tempfile.TemporaryDirectory() as tmp:
+                rag.save(tmp)
+                for _ in range(5):
+                    query = rng.standard_normal(32).astype("float32")
+                    for mode in ("auto", "concrete"):
+                        expected = rag.query(query, k=10, mode=mode, exact=True)
+                        got = NumTriadRAGIndexV4.stream_query(tmp, query, k=10, mode=mode, block_rows=64)
+                        assert [d.doc_id for d, _ in got] == [d.doc_id for d, _ in expected], \
+                            f"Streamed top-k differs ({mode})"
+                        assert np.allclose([s for _, s in got], [s for _, s in expected], atol=1e-5)
+                        assert got[0][0].metadata == expected[0][0].metadata, "Metadata not read back"
+
+                # ids are read back row by row; version 1 segments (one JSON list) still open
+                from numtriad.index import read_ids, read_rows
+                import json
+                ids = read_ids(tmp)
+                last = len(ids) - 1
+                assert read_ids(tmp, [last, 5, 7]) == [ids[last], ids[5], ids[7]]
+                manifest = json.loads((Path(tmp) / "manifest.json").read_text())
+                (Path(tmp) / "ids.json").write_text(json.dumps(ids))
+                manifest.update(version=1, files={**manifest["files"], "ids": "ids.json"})
+                (Path(tmp) / "manifest.json").write_text(json.dumps(manifest))
+                assert read_rows(tmp, np.array([last, 5]))["ids"] == [ids[last], ids[5]]
+                assert len(NumTriadRAGIndexV4.load(tmp)) == len(rag), "Version 1 segment not loaded"
+
+            self.log_test("RAG Streaming Query", "PASS")
+        except Exception as e:
+            self.log_test("RAG Streaming Query", "FAIL", str(e))
+
+    def test_bm25_index(self):
+        """Test 5k: BM25 inverted index matches the reference formula"""
+        try:
+            rng = np.random.default_rng(9)
+            vocab = [f"w{i}" for i in range(50)]
+            texts = [" ".join(rng.choice(vocab, rng.integers(3, 20))) for _ in range(300)]
+            bm25 = BM25Index(k1=1.2, b=0.75)
+            bm25.add(texts, range(len(texts)))
+
+            docs = [tokenize(t) for t in texts]
+            avgdl = np.mean([len(d) for d in docs])
+
+            def reference(query):
+                scores = np.zeros(len(docs))
+                for term in set(tokenize(query)):
+                    df = sum(term in d for d in docs)
+                    if not df:
+                        continue
+                    idf = np.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+                    for i, d in enumerate(docs):
+                        tf = d.count(term)
+                        scores[i] += idf * tf * 2.2 / (tf + 1.2 * (0.25 + 0.75 * len(d) / avgdl))
+                return scores
+
+            for query in ["w1 w2", "W7 w7 w49", "w3 missing"]:
+                expected = reference(query)
+                rows, scores = bm25.scores(query)
+                assert np.array_equal(rows, np.flatnonzero(expected > 0)), "Candidate rows differ"
+                assert np.allclose(scores, expected[rows], atol=1e-4), "BM25 scores differ"
+                top_rows, _ = bm25.search(query, 5)
+                assert np.allclose(expected[top_rows], np.sort(expected)[::-1][:5], atol=1e-4)
+
+            rows, _ = bm25.scores("unknown terms")
+            assert rows.size == 0, "Unknown terms should match nothing"
+
+            self.log_test("BM25 Lexical Index", "PASS")
+        except Exception as e:
+            self.log_test("BM25 Lexical Index", "FAIL", str(e))
+
+    def test_multivector_maxsim(self):
+        """Test 5n: multi-vector store scores documents by MaxSim over chunks"""
+        try:
+            rng = np.random.default_rng(12)
+            counts = rng.integers(1, 6, 300)
+            vecs = rng.standard_normal((int(counts.sum()), 16)).astype("float32")
+            split = int(counts[:100].sum())
+            store = MultiVectorStore()
+            store.append(vecs[:split], counts[:100])
+            store.append(vecs[split:], counts[100:])
+            assert len(store) == 300 and store.n_chunks == vecs.shape[0]
+
+            query = rng.standard_normal((4, 16)).astype("float32")
+            q = query / np.linalg.norm(query, axis=1, keepdims=True)
+            v = vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+            offsets = np.concatenate([[0], np.cumsum(counts)])
+            expected = np.array([
+                (q @ v[offsets[i]:offsets[i + 1]].T).max(axis=1).mean() for i in range(300)
+            ])
+
+            assert np.allclose(store.maxsim(query), expected, atol=1e-5), "MaxSim scores differ"
+            assert np.allclose(store.maxsim(query, budget=20), expected, atol=1e-5), "Blocked MaxSim differs"
+            rows = np.array([5, 2, 299, 0])
+            assert np.allclose(store.maxsim(query, rows), expected[rows], atol=1e-5)
+            assert np.allclose(store.take(rows).maxsim(query), expected[rows], atol=1e-5)
+
+            with tempfile.TemporaryDirectory() as tmp:
+                store.save(tmp)
+                loaded = MultiVectorStore.load(tmp, dim=16)
+                assert np.allclose(loaded.maxsim(query), expected, atol=1e-5), "MaxSim differs after load"
+
+            self.log_test("Multi-Vector MaxSim", "PASS")
+        except Exception as e:
+            self.log_test("Multi-Vector MaxSim", "FAIL", str(e))
+
+    def test_minhash_dedup(self):
+        """Test 5o: MinHash-LSH finds near-duplicates, in the index and within a batch"""
+        try:
+            lsh = MinHashLSH(threshold=0.7)
+            base = [
+                f"document {i} covers topic {i * 7 % 13} with alpha{i} beta{i} gamma{i} delta{i}"
+                for i in range(200)
+            ]
+            for i, sig in enumerate(lsh.signatures(base)):
+                lsh.add(f"doc{i}", sig)
+
+            batch = [base[3] + " again", "an unrelated text about vectors", base[3] + " again!"]
+            found = lsh.find_duplicates(lsh.signatures(batch))
+            assert found[0] is not None and found[0][0] == "doc3", f"Expected doc3, got {found[0]}"
+            assert found[1] is None, "Unrelated text flagged as duplicate"
+            assert found[2][0] == "doc3", "Repeated text should match the indexed original"
+
+            fresh = ["brand new text one two three four", "brand new text one two three four five"]
+            found = lsh.find_duplicates(lsh.signatures(fresh))
+            assert found[0] is None and found[1] is not None and found[1][0] == 0, "In-batch duplicate missed"
+
+            # a text never matches its own key (upsert)
+            assert lsh.find_duplicates(lsh.signatures([base[5]]), ["doc5"])[0] is None
+
+            assert lsh.remove("doc3") and lsh.query(lsh.signature(base[3])) is None
+            with tempfile.TemporaryDirectory() as tmp:
+                lsh.save(tmp)
+                loaded = MinHashLSH.load(tmp, **lsh.settings)
+                assert len(loaded) == len(lsh) == 199
+                assert loaded.query(lsh.signature(base[10] + " again"))[0] == "doc10"
+
+            self.log_test("MinHash-LSH Dedup", "PASS")
+        except Exception as e:
+            self.log_test("MinHash-LSH Dedup", "FAIL", str(e))
+
+    def test_embedding_cache(self):
+        """Test 5p: Content-addressed embedding cache (memory LRU + disk tier)"""
+        if not EMBEDDING_CACHE_AVAILABLE:
+            self.log_test("Embedding Cache", "SKIP", "EmbeddingCache not available")
+            return
+        try:
+            rng = np.random.default_rng(0)
+            texts = [f"chunk {i}" for i in range(10)]
+            rows = rng.standard_normal((10, 16)).astype("float32")
+            with tempfile.TemporaryDirectory() as tmp:
+                cache = EmbeddingCache("model-a", max_entries=4, cache_dir=tmp)
+                keys = [cache.key(t) for t in texts]
+                assert all(r is None for r in cache.get_many(keys)), "Empty cache returned rows"
+                cache.put_many(keys, rows)
+                assert cache.key("chunk 0") != EmbeddingCache("model-b").key("chunk 0"), "Keys must depend on the model"
+
+                # LRU holds 4 rows, the others come back from disk
+                found = cache.get_many(keys)
+                assert np.allclose(np.stack(found), rows), "Cached rows differ"
+                stats = cache.stats()
+                assert stats["memory_hits"] == 4 and stats["disk_hits"] == 6, f"Unexpected tiers: {stats}"
+                cache.close()
+
+                reopened = EmbeddingCache("model-a", max_entries=4, cache_dir=tmp)
+                assert len(reopened) == 10
+                assert np.allclose(np.stack(reopened.get_many(keys[::-1])), rows[::-1]), "Disk tier lost rows"
+                reopened.close()
+
+            # BaseTextEncoder.encode only sends unique uncached texts to the model
+            from numtriad.encoders.base_text_encoder import BaseTextEncoder
+
+            class CountingModel:
+                calls = []
+
+                def encode(self, batch, convert_to_numpy=True, show_progress_bar=False):
+                    self.calls.append(list(batch))
+                    return np.stack([np.full(8, len(t), dtype="float32") for t in batch])
+
+                def get_sentence_embedding_dimension(self):
+                    return 8
+
+            encoder = BaseTextEncoder.__new__(BaseTextEncoder)
+            encoder.model_name, encoder.model = "counting", CountingModel()
+            encoder.cache = EmbeddingCache("counting", max_entries=100)
+            out = encoder.encode(["a", "bb", "a", "ccc"])
+            assert encoder.model.calls == [["a", "bb", "ccc"]], f"Unexpected model calls: {encoder.model.calls}"
+            assert out[:, 0].tolist() == [1, 2, 1, 3], "Rows not restored in input order"
+            encoder.encode(["ccc", "dddd"])
+            assert encoder.model.calls[-1] == ["dddd"], "Cached text was re-encoded"
+            assert encoder.encode([]).shape == (0, 8)
+
+            self.log_test("Embedding Cache", "PASS")
+        except Exception as e:
+            self.log_test("Embedding Cache", "FAIL", str(e))
+
+    def test_v3_batched_encode(self):
+        """Test 5q: NumTriadEmbeddingV3 padded-batch encode matches the per-text path"""
+        if not SYSTEM_AVAILABLE or not TORCH_AVAILABLE:
+            self.log_test("V3 Batched Encode", "SKIP", "PyTorch not available")
+            return
+        try:
+            import importlib
+            import types
+
+            # numtriad_v3 imports numtriad.models.deeptriad_transformer at module
+            # level; when that package is absent, a placeholder module is used
+            # for the import only (the model itself is injected below)
+            stubbed = []
+            try:
+                importlib.import_module("numtriad.models.deeptriad_transformer")
+            except ImportError:
+                package = types.ModuleType("numtriad.models")
+                package.__path__ = []
+                module = types.ModuleType("numtriad.models.deeptriad_transformer")
+                module.DeepTriadTransformer = module.DeepTriadTransformerConfig = None
+                stubbed = ["numtriad.models", "numtriad.models.deeptriad_transformer", "numtriad.encoders.numtriad_v3"]
+                sys.modules.update({stubbed[0]: package, stubbed[1]: module})
+            try:
+                from numtriad.encoders.numtriad_v3 import NumTriadEmbeddingV3, NumTriadV3Config
+            finally:
+                for name in stubbed:
+                    sys.modules.pop(name, None)
+            from numtriad.config import NumTriadConfig
+            from numtriad.core.system_v4 import DeepTriadTransformer
+            from numtriad.encoders.base_text_encoder import BaseTextEncoder
+            from numtriad.triad_types import Triad
+            from numtriad.utils.feature_hashing import stable_gaussians
+
+            class HashingModel:
+                def encode(self, batch, convert_to_numpy=True, show_progress_bar=False):
+                    return stable_gaussians(list(batch), 16)
+
+                def get_sentence_embedding_dimension(self):
+                    return 16
+
+            class MaskedDeepTriad:
+                """predict_triad_global over DeepTriadTransformer (masked attention + pooling)"""
+
+                def __init__(self):
+                    torch.manual_seed(0)
+                    self.model = DeepTriadTransformer(DeepTriadTransformerConfig(
+                        dim_in=16, dim_model=32, num_layers=2, num_heads=4, dim_ff=64)).eval()
+
+                def predict_triad_global(self, x, triad_control=None, src_key_padding_mask=None):
+                    logits, _ = self.model(x, padding_mask=src_key_padding_mask)
+                    return [Triad.normalize(p) for p in torch.softmax(logits, dim=-1).numpy()]
+
+            base = BaseTextEncoder.__new__(BaseTextEncoder)
+            base.model_name, base.model, base.cache = "hashing", HashingModel(), None
+            encoder = NumTriadEmbeddingV3.__new__(NumTriadEmbeddingV3)
+            encoder.cfg, encoder.device = NumTriadConfig(), torch.device("cpu")
+            encoder.v3_cfg = NumTriadV3Config(deeptriad_ckpt="", max_len=16, batch_size=4)
+            encoder.base_encoder, encoder.input_dim, encoder.max_len = base, 16, 16
+            encoder.deeptriad, encoder.deeptriad_available = MaskedDeepTriad(), True
+
+            # 1 to 7 chunks per text: every batch of 4 is padded
+            texts = [". ".join(f"sentence {i}-{j}" for j in range(i % 7 + 1)) for i in range(11)]
+            enriched, triads = encoder.encode(texts)
+            for i, text in enumerate(texts):
+                single, single_triads = encoder.encode([text])
+                assert np.allclose(enriched[i], single[0], atol=1e-5), f"Text {i} differs from the per-text path"
+                assert np.allclose(triads[i].as_array(), single_triads[0].as_array(), atol=1e-5)
+                chunks = HashingModel().encode(encoder._chunk_text(text))
+                assert np.allclose(enriched[i, :16], chunks.mean(axis=0), atol=1e-6), f"Chunk mean of text {i}"
+
+            multi, _, chunks, offsets = encoder.encode_multi(texts)
+            assert np.allclose(multi, enriched) and offsets[-1] == len(chunks) == sum(i % 7 + 1 for i in range(11))
+            assert encoder.encode([])[0].shape == (0, 19)
+
+            self.log_test("V3 Batched Encode", "PASS")
+        except Exception as e:
+            self.log_test("V3 Batched Encode", "FAIL", str(e))
+
+    def test_deeptriad_compaction_replay(self):
+        """Test 5r: DeepTriadRAGIndex compaction replays concurrent upserts / deletes"""
+        if not SYSTEM_AVAILABLE or not TORCH_AVAILABLE:
+            self.log_test("DeepTriad Compaction Replay", "SKIP", "PyTorch not available")
+            return
+        try:
+            index = make_deeptriad_index(auto_compact=False)
+            index.add_documents([f"document {i}" for i in range(10)], ids=[f"d{i}" for i in range(10)])
+            for i in range(0, 10, 3):
+                index.delete(f"d{i}")
+
+            # writes made while the compacted state is being built
+            build = index._build_compacted
+
+            def build_with_writes(live):
+                state = build(live)
+                index.upsert("d1", "document 1 v2")
+                index.upsert("d1", "document 1 v3")  # same id twice during one compaction
+                index.upsert("new", "added then deleted")
+                index.delete("new")
+                index.delete("d2")
+                return state
+
+            index._build_compacted = build_with_writes
+            index.compact(background=False)
+
+            expected = {f"d{i}" for i in range(10) if i % 3 and i != 2}
+            assert set(index._id_to_row) == expected, f"Live ids {sorted(index._id_to_row)}"
+            for doc_id, row in index._id_to_row.items():
+                assert index.docs[row].doc_id == doc_id and not index._tombstones.is_dead(row)
+            assert index.docs[index._id_to_row["d1"]].text == "document 1 v3"
+            assert len(index) == len(expected)
+            hits = [doc.doc_id for doc, _ in index.search("document 1 v3", k=len(expected), exact=True)]
+            assert hits[0] == "d1" and sorted(hits) == sorted(expected)
+
+            self.log_test("DeepTriad Compaction Replay", "PASS")
+        except Exception as e:
+            self.log_test("DeepTriad Compaction Replay", "FAIL", str(e))
+
+    def test_deeptriad_search_batch(self):
+        """Test 5s: DeepTriadRAGIndex search_batch matches per-query search"""
+        if not SYSTEM_AVAILABLE or not TORCH_AVAILABLE:
+            self.log_test("DeepTriad Search Batch", "SKIP", "PyTorch not available")
+            return
+        try:
+            index = make_deeptriad_index(auto_compact=False)
+            index.add_documents([f"passage {i} about topic {i % 7}" for i in range(300)])
+            for i in range(0, 300, 4):
+                index.delete(f"doc_{i}")
+            queries = [f"topic {i % 7} passage {3 * i}" for i in range(23)]
+
+            for mode in ("cosine", "triad_weighted"):
+                expected = [index.search(q, k=8, retrieval_mode=mode) for q in queries]
+                # chunk_size=5: 23 queries over uneven blocks
+                for chunk_size in (None, 5):
+                    got = index.search_batch(queries, k=8, retrieval_mode=mode, chunk_size=chunk_size)
+                    assert len(got) == len(queries)
+                    for g, e in zip(got, expected):
+                        assert [d.doc_id for d, _ in g] == [d.doc_id for d, _ in e], \
+                            f"Batch top-k differs ({mode}, chunk_size={chunk_size})"
+                        assert np.allclose([sc for _, sc in g], [sc for _, sc in e], atol=1e-5)
+                        assert all(int(d.doc_id[4:]) % 4 for d, _ in g), "Deleted document returned"
+
+            assert index.search_batch([]) == []
+            self.log_test("DeepTriad Search Batch", "PASS")
+        except Exception as e:
+            self.log_test("DeepTriad Search Batch", "FAIL", str(e))
+
+    def test_deeptriad_append(self):
+        """Test 5t: DeepTriadRAGIndex buffer appends (capacity growth, rows normalized at ingest)"""
+        if not SYSTEM_AVAILABLE or not TORCH_AVAILABLE:
+            self.log_test("DeepTriad Append", "SKIP", "PyTorch not available")
+            return
+        try:
+            index = make_deeptriad_index(triad_weight=0.3)
+            assert index.emb_matrix is None, "Empty index should have no matrix"
+
+            # small batches (1 to 7 texts) across several capacity doublings
+            texts = [f"note {i} on subject {i % 11}" for i in range(230)]
+            capacities, start = set(), 0
+            while start < len(texts):
+                stop = min(start + 1 + start % 7, len(texts))
+                index.add_documents(texts[start:stop])
+                capacities.add(index._store.capacity)
+                start = stop
+            assert len(capacities) >= 3, f"Expected capacity growth, saw {sorted(capacities)}"
+
+            raw, triads = HashingV3Encoder().encode(texts)
+            emb = index.emb_matrix
+            assert emb.shape == raw.shape == (230, HashingV3Encoder.dim + 3)
+            assert np.allclose(np.linalg.norm(emb, axis=1), 1.0, atol=1e-5), "Rows not normalized at ingest"
+            assert np.allclose(emb, raw / np.linalg.norm(raw, axis=1, keepdims=True), atol=1e-5)
+            assert np.allclose(index._store.norms, np.linalg.norm(raw, axis=1), rtol=1e-5), "Raw norms lost"
+            assert np.allclose(index.docs[17].embedding, raw[17]), "Document keeps its raw embedding"
+
+            # scores equal a brute-force reference normalizing every row per query
+            triad_arr = np.stack([t.as_array() for t in triads])
+            for query in ("subject 3", "note 42 on subject 9"):
+                q, [q_triad] = HashingV3Encoder().encode([query])
+                q = q[0] / np.linalg.norm(q[0])
+                ref = np.array([
+                    row @ q / np.linalg.norm(row) - 0.3 * np.abs(tri - q_triad.as_array()).sum()
+                    for row, tri in zip(raw, triad_arr)
+                ])
+                got = index.search(query, k=len(texts))
+                assert [d.doc_id for d, _ in got][:10] == [f"doc_{j}" for j in np.argsort(-ref)[:10]]
+                assert np.allclose(sorted((sc for _, sc in got), reverse=True), np.sort(ref)[::-1], atol=1e-5)
+
+            self.log_test("DeepTriad Append", "PASS")
+        except Exception as e:
+            self.log_test("DeepTriad Append", "FAIL", str(e))
+
+    def test_deeptriad_dedup(self):
+        """Test 5u: DeepTriadRAGIndex near-duplicate policies (skip / merge / link) and LSH persistence"""
+        if not SYSTEM_AVAILABLE or not TORCH_AVAILABLE:
+            self.log_test("DeepTriad Dedup", "SKIP", "PyTorch not available")
+            return
+        try:
+            from numtriad.config import NumTriadConfig
+
+            base = [
+                f"document {i} covers topic {i * 7 % 13} with alpha{i} beta{i} gamma{i} delta{i}"
+                for i in range(20)
+            ]
+            fresh = "brand new text one two three four"
+            # x0 duplicates an indexed document; x3 duplicates x2, which moves
+            # from position 2 to 1 once x0 is folded (skip / merge)
+            batch = [base[3] + " again", "an unrelated text about vectors", fresh, fresh + " five"]
+            ids = ["x0", "x1", "x2", "x3"]
+            metas = [{"src": "x0"}, {"src": "x1"}, {"src": "x2"}, {"src": "x3", "extra": 1}]
+
+            for policy in ("skip", "merge", "link"):
+                index = make_deeptriad_index(dedup=policy, dedup_threshold=0.7)
+                index.add_documents(base, [{"i": i} for i in range(20)], [f"doc{i}" for i in range(20)])
+                index.encoder.encoded.clear()
+                index.add_documents(batch, [dict(m) for m in metas], ids)
+                docs = {d.doc_id: d for d in index.docs}
+
+                if policy == "link":
+                    assert index.encoder.encoded == batch, "link indexes every text"
+                    assert len(index) == 24 and index.dedup_stats["linked"] == 2
+                    assert docs["x0"].meta["duplicate_of"] == "doc3"
+                    assert docs["x3"].meta["duplicate_of"] == "x2", "In-batch duplicate not linked to its id"
+                    assert "duplicate_of" not in docs["x1"].meta
+                else:
+                    assert index.encoder.encoded == [batch[1], batch[2]], f"{policy}: duplicates encoded"
+                    assert len(index) == 22 and "x0" not in docs and "x3" not in docs
+                if policy == "skip":
+                    assert index.dedup_stats["skipped"] == 2
+                    assert "merged" not in docs["doc3"].meta and "merged" not in docs["x2"].meta
+                if policy == "merge":
+                    assert index.dedup_stats["merged"] == 2
+                    assert [m["id"] for m in docs["doc3"].meta["merged"]] == ["x0"]
+                    assert docs["doc3"].meta["i"] == 3 and docs["doc3"].meta["src"] == "x0"
+                    assert [m["id"] for m in docs["x2"].meta["merged"]] == ["x3"], "In-batch merge target"
+                    assert docs["x2"].meta["src"] == "x2" and docs["x2"].meta["extra"] == 1
+
+                with tempfile.TemporaryDirectory() as tmp:
+                    index.save(tmp)
+                    loaded = type(index).load(tmp, NumTriadConfig(), None)
+                    assert loaded.dedup == policy and len(loaded.lsh) == len(index.lsh), "LSH not restored"
+                    assert loaded.lsh.settings == index.lsh.settings
+                    loaded.add_documents([base[5] + " again"], ids=["y"])
+                    folded = loaded.dedup_stats["skipped"] + loaded.dedup_stats["merged"]
+                    if policy == "link":
+                        assert loaded.docs[-1].meta["duplicate_of"] == "doc5"
+                    else:
+                        assert folded == 1 and len(loaded) == 22, "Duplicate of a loaded document missed"
+
+            self.log_test("DeepTriad Dedup", "PASS")
+        except Exception as e:
+            self.log_test("DeepTriad Dedup", "FAIL", str(e))
+
+    def test_triad_rag_hybrid(self):
+        """Test 5v: TriadRAGEngine hybrid retrieval (weighted / RRF fusion) against a per-document reference"""
+        if not SYSTEM_AVAILABLE or not TORCH_AVAILABLE:
+            self.log_test("TriadRAG Hybrid", "SKIP", "PyTorch not available")
+            return
+        try:
+            from types import SimpleNamespace
+            from numtriad.config import NumTriadConfig
+            from numtriad.triad_types import Triad
+
+            class HashingV2Encoder:
+                """Stand-in for NumTriadTextEncoderV2: E(x) = hashed vector + triad"""
+
+                def __init__(self, config=None):
+                    self.v3 = HashingV3Encoder()
+
+                def encode(self, texts):
+                    embeddings, triads = self.v3.encode(texts)
+                    return SimpleNamespace(embeddings=embeddings, triads=triads)
+
+            module = import_without_models("numtriad.rag.triad_rag")
+            module.NumTriadTextEncoderV2 = HashingV2Encoder
+            rng = np.random.default_rng(13)
+            vocab = [f"w{i}" for i in range(30)]
+            texts = [" ".join(rng.choice(vocab, size=int(rng.integers(4, 12)))) for _ in range(120)]
+            cfg = NumTriadConfig()
+            engine = module.TriadRAGEngine(cfg, retrieval="hybrid", lexical_k=len(texts))
+            engine.index([f"t{i}" for i in range(len(texts))], texts)
+
+            emb, triads = HashingV2Encoder().v3.encode(texts)
+            bias = Triad(0.2, 0.7, 0.1)
+
+            def cos(a, b):
+                return float(a @ b / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+            def dense_ref(query, triad_bias=None):
+                q, [q_triad] = HashingV2Encoder().v3.encode([query])
+                return np.array([
+                    cfg.alpha_semantic * cos(e[:-3], q[0, :-3])
+                    + cfg.beta_triad * cos(t.as_array(), q_triad.as_array())
+                    + (0.1 * cos(t.as_array(), triad_bias.as_array()) if triad_bias else 0.0)
+                    for e, t in zip(emb, triads)
+                ])
+
+            def lexical_ref(query):
+                lexical = np.zeros(len(texts))
+                index = BM25Index()
+                index.add(texts, range(len(texts)))
+                rows, scores = index.search(query, len(texts))
+                lexical[rows] = scores
+                return lexical
+
+            query = "w3 w7 w12"
+            q_enc = engine.encoder.encode([query])
+            dense = dense_ref(query, bias)
+            lexical = lexical_ref(query)
+            hits = np.flatnonzero(lexical > 0)
+            assert 0 < hits.size < len(texts)
+
+            # vectorized dense scores, full index and a row subset
+            got = engine._dense_scores(q_enc.embeddings[0], q_enc.triads[0], bias)
+            assert np.allclose(got, dense, atol=1e-5), "_dense_scores differs from the reference"
+            got = engine._dense_scores(q_enc.embeddings[0], q_enc.triads[0], bias, hits[::2])
+            assert np.allclose(got, dense[hits[::2]], atol=1e-5)
+
+            def check(results, fused, candidates, label):
+                # RRF can tie exactly (swapped ranks): compare scores, and each hit against its own
+                expected = sorted((fused[r] for r in candidates), reverse=True)[:8]
+                assert np.allclose([sc for _, sc in results], expected, atol=1e-5), f"{label}: ranking differs"
+                for doc, score in results:
+                    row = int(doc.doc_id[1:])
+                    assert row in candidates and abs(fused[row] - score) < 1e-5, f"{label}: score of {doc.doc_id}"
+
+            # weighted: (1 - w) * dense + w * bm25 / max(bm25) over the lexical candidates
+            w = engine.lexical_weight
+            fused = (1 - w) * dense + w * lexical / lexical.max()
+            check(engine.search(query, k=8, triad_bias=bias), fused, hits, "weighted")
+
+            # RRF over lexical hits + dense short list (semantic part only)
+            engine.dense_k = 10
+            sem = emb[:, :-3] / np.linalg.norm(emb[:, :-3], axis=1, keepdims=True)
+            q_sem = q_enc.embeddings[0, :-3]
+            candidates = sorted(set(hits) | set(np.argsort(-(sem @ q_sem))[:10].tolist()))
+
+            def rank(values, r):
+                return 1 + sum(values[c] > values[r] or (values[c] == values[r] and c < r) for c in candidates)
+
+            fused = np.zeros(len(texts))
+            for r in candidates:
+                fused[r] = 1.0 / (engine.rrf_k + rank(dense, r))
+                if lexical[r] > 0:
+                    fused[r] += 1.0 / (engine.rrf_k + rank(lexical, r))
+            results = engine.search(query, k=8, triad_bias=bias, fusion="rrf")
+            check(results, fused, candidates, "rrf")
+
+            # no indexed query term: hybrid falls back to the dense scan
+            dense_only = dense_ref("zz unknown")
+            check(engine.search("zz unknown", k=8), dense_only, range(len(texts)), "fallback")
+
+            with tempfile.TemporaryDirectory() as tmp:
+                engine.save(tmp)
+                loaded = module.TriadRAGEngine.load(tmp, cfg)
+                assert (loaded.retrieval, loaded.dense_k, loaded.lexical_k) == ("hybrid", 10, len(texts))
+                for fusion in ("weighted", "rrf"):
+                    a = engine.search(query, k=8, triad_bias=bias, fusion=fusion)
+                    b = loaded.search(query, k=8, triad_bias=bias, fusion=fusion)
+                    assert [d.doc_id for d, _ in a] == [d.doc_id for d, _ in b], f"Loaded engine differs ({fusion})"
+                    assert np.allclose([sc for _, sc in a], [sc for _, sc in b], atol=1e-5)
+
+            self.log_test("TriadRAG Hybrid", "PASS")
+        except Exception as e:
+            self.log_test("TriadRAG Hybrid", "FAIL", str(e))
+
     def test_system_status(self):
         """Test 6: System status reporting"""
         if not self.system:
@@ -253,6 +1383,98 @@ class TestNumTriadV4:
         except Exception as e:
             self.log_test("Multimodal Encoding", "FAIL", str(e))
 
+    def test_encode_micro_batching(self):
+        """Test 7d: concurrent single-text encodes are batched and scattered back in order"""
+        if not self.system or not MULTIMODAL_AVAILABLE:
+            self.log_test("Encode Micro-Batching", "SKIP", "Multimodal not available")
+            return
+
+        try:
+            from concurrent.futures import ThreadPoolExecutor
+
+            texts = [f"micro batch text {i} " * (i % 5 + 1) for i in range(64)]
+            expected_emb, expected_triad = self.system.encode_sample(texts=texts)
+
+            with MicroBatcher(max_batch=16, max_wait_ms=20.0) as batcher:
+                batcher.register("text", lambda batch: self.system.encode_sample(texts=batch))
+                with ThreadPoolExecutor(max_workers=32) as pool:
+                    results = list(pool.map(lambda t: batcher.run("text", t, timeout=30), texts))
+                metrics = batcher.metrics("text")
+
+            for i, (emb, triad) in enumerate(results):
+                assert np.allclose(emb, expected_emb[i], atol=1e-5), f"Embedding {i} scattered to the wrong caller"
+                assert np.allclose(triad, expected_triad[i], atol=1e-5)
+            assert metrics["requests"] == 64 and metrics["batches"] < 64, f"Nothing was batched: {metrics}"
+            assert max(metrics["batch_sizes"]) <= 16
+            assert metrics["queue_wait_ms"]["max"] >= metrics["queue_wait_ms"]["p50"] >= 0.0
+
+            self.log_test("Encode Micro-Batching", "PASS",
+                          f"{metrics['batches']} batches, mean size {metrics['mean_batch_size']:.1f}")
+        except Exception as e:
+            self.log_test("Encode Micro-Batching", "FAIL", str(e))
+
+    def test_char_histograms(self):
+        """Test 7b: batched char histograms match the per-character loop"""
+        if not MULTIMODAL_AVAILABLE:
+            self.log_test("Char Histograms", "SKIP", "Multimodal not available")
+            return
+
+        try:
+            def reference(texts, max_chars):
+                rows = []
+                for t in texts:
+                    v = np.zeros(128, dtype="float32")
+                    for c in t[:max_chars]:
+                        v[ord(c) % 128] += 1.0
+                    rows.append(v / (np.linalg.norm(v) + 1e-8))
+                return np.stack(rows, axis=0)
+
+            ascii_texts = ["def f(x):\n    return x + 1", "", "hello world " * 40]
+            mixed_texts = ascii_texts + ["héllo ∆∞Θ 中文 \U0001F600", "\x00trailing\x00"]
+            for texts in (ascii_texts, mixed_texts):
+                for max_chars in (256, 512):
+                    assert np.array_equal(char_histograms(texts, max_chars), reference(texts, max_chars)), \
+                        f"Histograms differ (max_chars={max_chars})"
+            assert char_histograms([], 256).shape == (0, 128)
+
+            self.log_test("Char Histograms", "PASS")
+        except Exception as e:
+            self.log_test("Char Histograms", "FAIL", str(e))
+
+    def test_feature_hashing(self):
+        """Test 7c: feature hashing is identical across processes and leaves the global RNG alone"""
+        try:
+            import os
+            import subprocess
+
+            code = (
+                "from numtriad.utils.feature_hashing import stable_hash, stable_gaussians, hashed_vectors;"
+                "print(stable_hash('triad'), float(stable_gaussians(['a b'], 7).sum()),"
+                " hashed_vectors(['the cat sat on the mat'], 16)[0].tolist())"
+            )
+            outputs = set()
+            for seed in ("1", "2"):
+                env = dict(os.environ, PYTHONHASHSEED=seed, PYTHONPATH=str(Path(__file__).resolve().parent))
+                outputs.add(subprocess.run(
+                    [sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True,
+                ).stdout)
+            assert len(outputs) == 1, f"Hashes differ between processes: {outputs}"
+
+            state = np.random.get_state()[1].copy()
+            g = stable_gaussians([f"text {i}" for i in range(500)], 64)
+            assert np.array_equal(np.random.get_state()[1], state), "Global RNG was reseeded"
+            assert g.shape == (500, 64) and g.dtype == np.float32
+            assert abs(float(g.mean())) < 0.02 and abs(float(g.std()) - 1.0) < 0.02, "Not standard normal"
+            assert np.array_equal(stable_gaussians(["text 3"], 64)[0], g[3]), "Row depends on the batch"
+
+            v = hashed_vectors(["cat cat dog", ""], 32)
+            assert v.dtype == np.float32 and np.isclose(np.linalg.norm(v[0]), 1.0) and not v[1].any()
+            assert stable_hash("cat") != stable_hash("cat", seed=1)
+
+            self.log_test("Feature Hashing", "PASS")
+        except Exception as e:
+            self.log_test("Feature Hashing", "FAIL", str(e))
+
     def test_document_indexing(self):
         """Test 8: Document indexing (if available)"""
         if not self.system or not MULTIMODAL_AVAILABLE:
@@ -288,6 +1510,32 @@ class TestNumTriadV4:
         except Exception as e:
             self.log_test("Document Querying", "FAIL", str(e))
 
+    def test_bulk_indexing(self):
+        """Test 9b: Bulk indexing from a generator matches per-document indexing"""
+        if not self.system or not MULTIMODAL_AVAILABLE:
+            self.log_test("Bulk Indexing", "SKIP", "Multimodal not available")
+            return
+
+        try:
+            texts = [f"Bulk document {i} about topic {i % 7}" for i in range(50)]
+            before = len(self.system.rag_index)
+            stats = self.system.add_documents(
+                ((f"bulk{i}", text, {"i": i}) for i, text in enumerate(texts)),
+                batch_size=16,
+            )
+            assert stats["documents"] == 50 and stats["batches"] == 4, f"Unexpected stats: {stats}"
+            assert stats["docs_per_sec"] > 0, "docs/sec not reported"
+            assert len(self.system.rag_index) == before + 50, "Documents not added"
+
+            emb, _ = self.system.encode_sample(texts=[texts[3]])
+            row = self.system.rag_index._id_to_row["bulk3"]
+            assert np.allclose(self.system.rag_index.docs[row].embedding, emb[0], atol=1e-5), \
+                "Batched embedding differs from single-document encoding"
+            assert self.system.rag_index.docs[row].metadata == {"i": 3}
+            self.log_test("Bulk Indexing", "PASS")
+        except Exception as e:
+            self.log_test("Bulk Indexing", "FAIL", str(e))
+
     def test_sequence_analysis(self):
         """Test 10: Sequence analysis (if available)"""
         if not self.system or not TORCH_AVAILABLE or not self.system.deeptriad:
@@ -306,6 +1554,95 @@ class TestNumTriadV4:
         except Exception as e:
             self.log_test("Sequence Analysis", "FAIL", str(e))
 
+    def test_inference_export(self):
+        """Test 10b: exported graphs (TorchScript) match the eager Pillar A / C modules"""
+        if not self.system or not TORCH_AVAILABLE or not self.system.embedder or not self.system.deeptriad:
+            self.log_test("Inference Export", "SKIP", "Pillar A / C not available")
+            return
+
+        try:
+            from dataclasses import replace
+
+            with tempfile.TemporaryDirectory() as tmp:
+                manifest = self.system.export_inference(tmp, format="torchscript")
+                exported = NumTriadSystemV4(replace(self.system.cfg, inference_artifact=tmp))
+                assert sorted(manifest["multimodal"]["files"]) == ["code", "text", "text+code"]
+
+                for n in (1, 5, 33):
+                    texts = [f"exported text {i} " * (i % 4 + 1) for i in range(n)]
+                    codes = [f"def f{i}(x): return x * {i}" for i in range(n)]
+                    for kwargs in ({"texts": texts}, {"codes": codes}, {"texts": texts, "codes": codes}):
+                        emb_e, triad_e = self.system.encode_sample(**kwargs)
+                        emb_x, triad_x = exported.encode_sample(**kwargs)
+                        assert emb_x.shape == emb_e.shape
+                        assert np.allclose(emb_e, emb_x, atol=1e-5), f"Embeddings differ for {list(kwargs)} (n={n})"
+                        assert np.allclose(triad_e, triad_x, atol=1e-5)
+
+                for length in (1, 7):
+                    seq = np.random.randn(length, 192).astype("float32")
+                    for eager, exp in zip(self.system.triad_sequence_analysis(seq), exported.triad_sequence_analysis(seq)):
+                        assert np.allclose(eager, exp, atol=1e-5), f"DeepTriad outputs differ (L={length})"
+
+                x = torch.randn(3, 6, 192)
+                mask = torch.zeros(3, 6, dtype=torch.bool)
+                mask[1, 4:] = True
+                self.system.deeptriad.eval()
+                with torch.no_grad():
+                    g_e, s_e = self.system.deeptriad(x, padding_mask=mask)
+                g_x, s_x = exported.deeptriad(x, padding_mask=mask)
+                assert torch.allclose(g_e, g_x, atol=1e-5), "Padded DeepTriad outputs differ"
+                assert torch.allclose(s_e[~mask], s_x[~mask], atol=1e-5)
+
+                try:
+                    exported.encode_sample(images=torch.rand(1, 3, 32, 32))
+                    raise AssertionError("Signature that was not exported should be rejected")
+                except ValueError:
+                    pass
+
+            self.log_test("Inference Export", "PASS", f"format={manifest['format']}")
+        except Exception as e:
+            self.log_test("Inference Export", "FAIL", str(e))
+
+    def test_int8_quantization(self):
+        """Test 10c: int8 dynamic quantization of Pillars A / C + triad drift report vs fp32"""
+        if not self.system or not TORCH_AVAILABLE or not self.system.embedder or not self.system.deeptriad:
+            self.log_test("Int8 Quantization", "SKIP", "Pillar A / C not available")
+            return
+
+        try:
+            from dataclasses import replace
+            from numtriad.utils.metrics import triad_drift
+
+            texts = [f"held out text {i} " * (i % 6 + 1) for i in range(64)]
+            seqs = [np.random.randn(n, 192).astype("float32") for n in (3, 8, 12)]
+            system = NumTriadSystemV4(replace(self.system.cfg, quantize="int8", quantize_held_out=texts))
+            report = system.quantization_report
+            assert report["embedder"]["quantized_linears"] > 0 and report["embedder"]["n"] == 64
+            assert report["embedder"]["mean_l1"] < 0.05, f"Embedder drift too large: {report['embedder']}"
+            assert report["embedder"]["argmax_agreement"] >= 0.9
+            assert report["deeptriad"]["quantized_linears"] > 0 and "mean_l1" not in report["deeptriad"]
+
+            emb, triad = system.encode_sample(texts=texts[:4])
+            assert emb.shape == (4, system.embedder.get_embedding_dim())
+            assert np.allclose(triad.sum(axis=1), 1.0, atol=1e-4)
+
+            # DeepTriad report through the method, on the fp32 modules of a fresh system
+            fresh = NumTriadSystemV4(self.system.cfg)
+            fp32_global = [fresh.triad_sequence_analysis(seq)[0] for seq in seqs]
+            report = fresh.quantize("int8", held_out_sequences=seqs)["deeptriad"]
+            int8_global = [fresh.triad_sequence_analysis(seq)[0] for seq in seqs]
+            expected = triad_drift(np.stack(fp32_global), np.stack(int8_global))
+            assert report["n"] == 3 and abs(report["mean_l1"] - expected["mean_l1"]) < 1e-5
+            assert report["mean_l1"] < 0.05, f"DeepTriad drift too large: {report}"
+
+            assert triad_drift(np.eye(3), np.eye(3))["mean_l1"] == 0.0
+            assert triad_drift(np.eye(3), np.eye(3)[::-1])["argmax_agreement"] == 1 / 3
+
+            self.log_test("Int8 Quantization", "PASS",
+                          f"embedder drift L1 {system.quantization_report['embedder']['mean_l1']:.4f}")
+        except Exception as e:
+            self.log_test("Int8 Quantization", "FAIL", str(e))
+
     def run_all_tests(self):
         """Run all tests"""
         logger.info("=" * 70)
@@ -317,11 +1654,38 @@ class TestNumTriadV4:
         self.test_rag_query_modes()
         self.test_triad_alignment_scoring()
         self.test_cosine_similarity()
+        self.test_rag_vectorized_scoring()
+        self.test_rag_save_load()
+        self.test_rag_ivf_recall()
+        self.test_rag_hnsw()
+        self.test_rag_compressed()
+        self.test_rag_triad_buckets()
+        self.test_rag_metadata_filters()
+        self.test_rag_delete_upsert()
+        self.test_rag_sharded()
+        self.test_rag_wal_recovery()
+        self.test_rag_stream_query()
+        self.test_bm25_index()
+        self.test_multivector_maxsim()
+        self.test_minhash_dedup()
+        self.test_embedding_cache()
+        self.test_v3_batched_encode()
+        self.test_deeptriad_compaction_replay()
+        self.test_deeptriad_search_batch()
+        self.test_deeptriad_append()
+        self.test_deeptriad_dedup()
+        self.test_triad_rag_hybrid()
         self.test_system_status()
         self.test_multimodal_encoding()
+        self.test_char_histograms()
+        self.test_feature_hashing()
+        self.test_encode_micro_batching()
         self.test_document_indexing()
         self.test_document_querying()
+        self.test_bulk_indexing()
         self.test_sequence_analysis()
+        self.test_inference_export()
+        self.test_int8_quantization()
 
         logger.info("=" * 70)
         logger.info(f"Results: ✅ {self.passed} passed, ❌ {self.failed} failed, ⏭️  {self.skipped} skipped")
@@ -192,6 +192,30 @@ def test_unified_glm():
             print(f"   Learned: {metadata.get('learned', False)}")
             print(f"   NumTriad used: {metadata.get('numtriad_used', False)}")
         
+        # Test query result cache
+        if glm.numtriad_system:
+            print("\n4.4 Testing query cache...")
+            glm.add_document("cache_doc", "Cached search document")
+            first = glm.search("cached   search", k=3)
+            second = glm.search("cached search", k=3)
+            stats = glm.get_metrics()["query_cache"]
+            assert second == first, "Cached results differ"
+            assert any(r.content == "Cached search document" for r in first), "Content not stored at ingestion"
+            assert all("content" not in r.metadata for r in first), "Content leaked into the index metadata"
+            first[0].metadata["mutated"] = True
+            first[0].score = -1.0
+            third = glm.search("cached search", k=3)
+            assert third == second and "mutated" not in third[0].metadata, "Cached results shared with callers"
+            assert all("mutated" not in d.metadata for d in glm.numtriad_system.rag_index.docs), \
+                "Search results share the index metadata"
+            assert stats["hits"] == 1 and stats["misses"] == 1, f"Unexpected cache stats: {stats}"
+
+            glm.add_document("cache_doc_2", "Another document")
+            glm.search("cached search", k=3)
+            stats = glm.get_metrics()["query_cache"]
+            assert stats["invalidations"] == 1, "Index epoch change should invalidate the entry"
+            print(f"✅ Query cache works (hit rate {stats['hit_rate']:.2f})")
+        
         return True
     
     except Exception as e: